@@ -0,0 +1,92 @@
+import numpy as np
+from numpy.random import randint, random
+
+from lab.util.distributed_graph import DistributedGraph, FOREIGN
+
+# Policies to choose the vertices at which random walkers start, uniformly or proportional to their degree
+UNIFORM = 'uniform'
+DEGREE = 'degree'
+
+
+class RandomWalkEngine:
+    """ Advances all random walkers of a worker at once. The position of each walker is the index of its vertex in the
+    arrays of the graph, so a step is a single random draw and a few array lookups for all walkers together.
+    """
+
+    def __init__(self, graph: DistributedGraph):
+        self.graph = graph
+        self.positions = np.zeros(0, dtype=np.int64)
+
+    def add_random_walkers(self, vertex_labels):
+        """
+        :param vertex_labels: Labels of vertices of the worker at which random walkers start
+        """
+
+        vertex_labels = np.asarray(vertex_labels, dtype=np.int64).ravel()
+        if len(vertex_labels) == 0:
+            return
+
+        self.graph.build()
+
+        indices = np.minimum(np.searchsorted(self.graph.labels, vertex_labels), len(self.graph.labels) - 1)
+        if len(self.graph.labels) == 0 or not np.array_equal(self.graph.labels[indices], vertex_labels):
+            raise KeyError("Random walkers can only start at vertices of the worker")
+
+        self.positions = np.concatenate((self.positions, indices))
+
+    def sample_positions(self, number: int, policy: str = UNIFORM) -> np.ndarray:
+        """
+        :param number: Number of vertices to sample
+        :param policy: UNIFORM or DEGREE
+        :return: Indices of randomly chosen vertices of the worker
+        """
+
+        graph = self.graph
+        graph.build()
+        if len(graph.labels) == 0:
+            raise ValueError("The worker has no vertices to start random walkers at")
+
+        if policy == DEGREE and graph.offsets[-1] > 0:
+            # The offsets are the cumulative degrees, so each edge is equally likely to be chosen
+            return np.searchsorted(graph.offsets[1:], random(number) * graph.offsets[-1], side='right')
+
+        return randint(0, len(graph.labels), number)
+
+    def start_random_walkers(self, number: int, policy: str = UNIFORM):
+        """
+        :param number: Number of random walkers that start at randomly chosen vertices of the worker
+        :param policy: UNIFORM or DEGREE
+        """
+
+        if number > 0:
+            self.positions = np.concatenate((self.positions, self.sample_positions(number, policy)))
+
+    def step(self):
+        """
+        Moves every random walker along a random edge of its vertex. Random walkers on vertices without edges stay
+        where they are, random walkers that reach a vertex of another worker are removed
+
+        :return: Array of shape (number of edges, 2) with the walked edges, and the labels of the reached vertices of
+        other workers
+        """
+
+        graph = self.graph
+        positions = self.positions
+        starts = graph.offsets[positions]
+        degrees = graph.offsets[positions + 1] - starts
+
+        is_moving = degrees > 0
+        stuck_positions = positions[~is_moving]
+        positions, starts, degrees = positions[is_moving], starts[is_moving], degrees[is_moving]
+
+        choices = starts + (random(len(positions)) * degrees).astype(np.int64)
+        edges = np.column_stack((graph.labels[positions], graph.neighbours[choices]))
+        next_positions = graph.neighbour_indices[choices]
+
+        is_foreign = next_positions == FOREIGN
+        self.positions = np.concatenate((stuck_positions, next_positions[~is_foreign]))
+
+        return edges, graph.neighbours[choices][is_foreign]
+
+    def __len__(self):
+        return len(self.positions)
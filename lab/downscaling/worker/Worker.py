@@ -1,14 +1,19 @@
 from lab.master.WorkerInterface import WorkerInterface
-from lab.util.distributed_graph import DistributedGraph, ForeignVertex, Vertex, Edge
-from lab.downscaling.worker.RandomWalker import RandomWalker, ForeignVertexException
-from numpy.random import randint, random
-from numpy import array
+from lab.util.distributed_graph import DistributedGraph, Vertex, Edge
+from lab.downscaling.worker.RandomWalkEngine import RandomWalkEngine
+from numpy.random import random
+from numpy import array, ndarray, unique
 from lab.util import message, file_io
-from time import sleep, time
+from lab.util.edge_set import EdgeSet
+from time import time
+from typing import Dict, List
+
+# Maximum number of random walkers that are handed off to another worker in one message
+RANDOM_WALKER_BATCH_SIZE = 1000
 
 
 class Worker(WorkerInterface):
-    def __init__(self, worker_id: int, master_host: str, master_port: int, scale: float, method: str, load_backup: bool, number_of_random_walkers: int, backup_size: int, walking_iterations: int):
+    def __init__(self, worker_id: int, master_host: str, master_port: int, scale: float, method: str, load_backup: bool, number_of_random_walkers: int, backup_size: int, walking_iterations: int, start_policy: str):
         started_at = time()
 
         super().__init__(worker_id, master_host, master_port)
@@ -20,9 +25,10 @@ class Worker(WorkerInterface):
             message.WORKER_FAILED: self.handle_worker_failed,
             message.CONTINUE: self.handle_continue,
             message.START_SEND_FILE: self.handle_start_send_file,
+            message.STREAM_FILE: self.handle_stream_file,
             message.FILE_CHUNK: self.handle_file_chunk,
             message.END_SEND_FILE: self.handle_end_send_file,
-            message.MISSING_CHUNK: self.handle_missing_chunk,
+            message.ACKNOWLEDGE_CHUNKS: self.handle_acknowledge_chunks,
             message.RECEIVED_FILE: self.handle_received_file
         }
 
@@ -37,6 +43,8 @@ class Worker(WorkerInterface):
 
         self.number_of_random_walkers = number_of_random_walkers
         self.add_random_walker_at = []
+        # Vertex labels of the random walkers that still have to be send, per worker
+        self.outgoing_random_walkers: Dict[int, List[int]] = {}
 
         self.receive_graph()
         self.send_debug_message(
@@ -46,8 +54,7 @@ class Worker(WorkerInterface):
         if method == "random_edge":
             self.scale = scale
             self.edges = []
-            for line in self.file_receivers[message.GRAPH].file:
-                vertex1_label, vertex2_label = file_io.parse_to_edge(line)
+            for vertex1_label, vertex2_label in file_io.parse_edges(self.file_receivers[message.GRAPH].file).tolist():
                 self.edges.append(
                     Edge(Vertex(vertex1_label), Vertex(vertex2_label)))
             self.edges = array(self.edges)
@@ -59,90 +66,102 @@ class Worker(WorkerInterface):
         elif method == "random_walk":
             self.graph = DistributedGraph(
                 worker_id, self.combined_meta_data, self.file_receivers[message.GRAPH].file)
-            self.random_walkers = [
-                RandomWalker(self.get_random_vertex()) for _ in range(number_of_random_walkers)
-            ]
+            self.random_walkers = RandomWalkEngine(self.graph)
+            self.random_walkers.start_random_walkers(number_of_random_walkers, start_policy)
             self.send_debug_message(
                 f"Setting up graph took {time() - setup_graph_started_at}")
 
-            for vertex_label in self.add_random_walker_at:
-                self.random_walkers.append(RandomWalker(
-                    self.graph.vertices[vertex_label]))
+            self.random_walkers.add_random_walkers(self.add_random_walker_at)
 
             if load_backup:
                 self.collected_edges = self.build_from_backup()
             else:
-                self.collected_edges = {}
+                self.collected_edges = EdgeSet()
 
             self.send_debug_message(f"Setup time: {time() - started_at}")
             self.wait_until_continue()
             self.run_random_walk()
 
     def build_from_backup(self):
-        while self.file_receivers[message.BACKUP] is None or not self.file_receivers[message.BACKUP].received_complete_file:
-            self.handle_queue()
-            sleep(0.1)
-
-        collected_edges = {}
-
-        for line in self.file_receivers[message.BACKUP].file:
-            if line == '':
-                continue
+        self.wait_for(lambda: self.file_receivers[message.BACKUP] is not None
+                      and self.file_receivers[message.BACKUP].received_complete_file)
 
-            collected_edges[line.strip()] = True
-
-        return collected_edges
-
-    def get_random_vertex(self):
-        print(self.combined_meta_data[self.worker_id].max_vertex)
-        while True:
-            # generate vertex indices until a valid one is found (in case of missing vertices)
-            try:
-                return self.graph.vertices[
-                    randint(
-                        self.combined_meta_data[self.worker_id].min_vertex,
-                        self.combined_meta_data[self.worker_id].max_vertex
-                    )
-                ]
-            except KeyError:
-                pass
+        return EdgeSet(file_io.parse_edges(self.file_receivers[message.BACKUP].file))
 
-    def handle_random_walker(self, vertex_label: int):
+    def handle_random_walker(self, vertex_labels: list):
         # If worker is still being setup after crash and receives a message from another already running worker
         if not hasattr(self, 'random_walkers'):
-            self.add_random_walker_at.append(vertex_label)
+            self.add_random_walker_at += vertex_labels
             return
 
-        self.random_walkers.append(RandomWalker(
-            self.graph.vertices[vertex_label]))
+        self.random_walkers.add_random_walkers(vertex_labels)
 
     def handle_continue(self):
         self.running = True
 
     def handle_worker_failed(self):
         self.running = False
+        # The random walkers that arrived before the pause are counted as well
+        self.handle_bulk_queue()
 
         # If worker is still being setup after crash and receives a message from another already running worker
         if not hasattr(self, 'random_walkers'):
             number_of_random_walkers = self.number_of_random_walkers + \
                 len(self.add_random_walker_at)
         else:
-            number_of_random_walkers = len(self.random_walkers)
+            number_of_random_walkers = len(
+                self.random_walkers) + self.number_of_outgoing_random_walkers
 
         self.send_message_to_master(message.write_random_walker_count(
             self.worker_id, number_of_random_walkers))
         self.wait_until_continue()
 
     def wait_until_continue(self):
-        while not self.running:
-            self.handle_queue()
-            sleep(0.01)
+        self.wait_for(lambda: self.running)
+
+    @property
+    def number_of_outgoing_random_walkers(self):
+        return sum([len(vertex_labels) for vertex_labels in self.outgoing_random_walkers.values()])
+
+    def add_outgoing_random_walkers(self, vertex_labels: ndarray):
+        worker_ids = self.combined_meta_data.get_worker_ids_that_have_vertices(
+            vertex_labels)
+
+        for worker_id in unique(worker_ids).tolist():
+            worker_vertex_labels = vertex_labels[worker_ids == worker_id].tolist()
+
+            try:
+                self.outgoing_random_walkers[worker_id] += worker_vertex_labels
+            except KeyError:
+                self.outgoing_random_walkers[worker_id] = worker_vertex_labels
+
+            if len(self.outgoing_random_walkers[worker_id]) >= RANDOM_WALKER_BATCH_SIZE:
+                self.send_random_walker_message(worker_id)
+
+    def send_random_walker_message(self, worker_id: int):
+        """
+        Hands off the buffered random walkers to a worker, they remain buffered if the worker cannot be reached
+
+        :param worker_id: Id of the worker that has the vertices of the random walkers
+        """
+
+        vertex_labels = self.outgoing_random_walkers.get(worker_id)
+        if not vertex_labels or not self.combined_meta_data[worker_id].is_registered():
+            return
+
+        try:
+            self.send_message_to_node(
+                *self.combined_meta_data[worker_id].get_connection_info(),
+                message.write_random_walker(vertex_labels)
+            )
+        except ConnectionRefusedError:
+            return
+
+        del self.outgoing_random_walkers[worker_id]
 
-    def send_random_walker_message(self, vertex: ForeignVertex):
-        self.send_message_to_node(
-            *self.combined_meta_data.get_connection_that_has_vertex(vertex.label),
-            message.write_random_walker(vertex.label)
-        )
+    def send_random_walker_messages(self):
+        for worker_id in list(self.outgoing_random_walkers.keys()):
+            self.send_random_walker_message(worker_id)
 
     def run_random_edge(self):
         """
@@ -151,6 +170,7 @@ class Worker(WorkerInterface):
         self.collected_edges = self.edges[random(len(self.edges)) < self.scale]
         self.send_backup_to_master(
             [str(edge) + '\n' for edge in self.collected_edges])
+        self.wait_for_backups()
         self.send_job_complete()
 
     def run_random_walk(self):
@@ -164,23 +184,18 @@ class Worker(WorkerInterface):
 
         while not self.cancel:
             self.handle_queue()
+            self.send_backup_messages()
 
             for _ in range(self.walking_iterations):
-                for random_walker in self.random_walkers:
-                    try:
-                        edge = random_walker.step()
-
-                        if str(edge) not in self.collected_edges:
-                            self.collected_edges[str(edge)] = True
-                            new_edges.append(str(edge) + "\n")
-                    except ForeignVertexException:
-                        try:
-                            self.send_random_walker_message(
-                                random_walker.vertex)
-                        except ConnectionRefusedError:
-                            continue
-
-                        self.random_walkers.remove(random_walker)
+                edges, foreign_vertex_labels = self.random_walkers.step()
+
+                is_new = self.collected_edges.add_edges(edges)
+                new_edges += [f"{vertex1_label} {vertex2_label}\n"
+                              for vertex1_label, vertex2_label in edges[is_new].tolist()]
+
+                self.add_outgoing_random_walkers(foreign_vertex_labels)
+
+                self.send_random_walker_messages()
 
             # Make sure to not overload the master with progress messages
             if len(self.collected_edges) % 100 == 0 and last_progress_message_at != len(self.collected_edges):
@@ -193,6 +208,7 @@ class Worker(WorkerInterface):
 
         if len(new_edges) > 0:
             self.send_backup_to_master(new_edges)
+        self.wait_for_backups()
 
         self.send_debug_message(f"Runtime: {time() - started_at}")
         self.send_job_complete()
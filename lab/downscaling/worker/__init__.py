@@ -6,7 +6,8 @@ from lab.util.validation import (
     assert_host,
     assert_bool,
     assert_pos_float,
-    assert_downscaling_method)
+    assert_downscaling_method,
+    assert_start_policy)
 from lab.downscaling.worker.Worker import Worker
 
 
@@ -28,6 +29,8 @@ def main():
             "--backup-size", assert_nonnegative_int, default=100)
         walking_iterations = get_arg(
             "--walking-iterations", assert_positive_int, default=1)
+        start_policy = get_arg(
+            "--start-policy", assert_start_policy, default='uniform')
 
     except AssertionError as e:
         print_error(e)
@@ -42,11 +45,12 @@ def main():
             "\t--n-random-walkers: Number of random walkers to start with\n"
             "\t--backup-size: Minimum size of the backup before it will be send to the master during a run, 0 if you want no backups\n"
             "\t--walking-iterations: The number of steps a random walker sets before the queue will be handled\n"
+            "\t--start-policy: Choose the start vertices of the random walkers `uniform` or proportional to their `degree`\n"
         )
         return
 
     Worker(worker_id, master_host, master_port, scale, method, load_backup,
-           number_of_random_walkers, backup_size, walking_iterations)
+           number_of_random_walkers, backup_size, walking_iterations, start_policy)
 
 
 if __name__ == '__main__':
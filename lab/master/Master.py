@@ -1,14 +1,18 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
 from time import time, sleep
 from sys import stdout
 from uuid import uuid4
 from math import ceil
 
+import numpy as np
+
 from lab.master.worker_info import WorkerInfoCollection, WorkerInfo
 from lab.util.distributed_graph import DistributedGraph
 from lab.util import message, sockets
-from lab.util.file_io import read_in_chunks, get_start_vertex, get_first_line, get_last_line, read_as_reversed_edges, \
-    append_edge, get_number_of_lines, write_to_file, read_file
-from lab.util.file_transfer import FileSender, UnexpectedChunkIndex, FileReceiver
+from lab.util.file_io import read_in_chunks, get_start_vertex, get_first_line, get_last_line, read_edges, \
+    write_edges, get_number_of_lines, write_to_file
+from lab.util.file_transfer import FileSender, FileReceiver, FileStreamServer, RETRANSMISSION_TIMEOUT
 from lab.util.server import Server
 from lab.util.meta_data import MetaData
 
@@ -16,13 +20,24 @@ from lab.util.meta_data import MetaData
 # by default, let shared_filesystem = 0
 from lab.util.ssh_connection_info import shared_filesystem
 
+# Maximum number of seconds between two checks for failed workers
+CONTROL_INTERVAL = 0.1
+# Statuses of the messages whose first argument is the id of the sending worker. A REGISTER is not included, it is
+# sent by a process that is not registered yet
+WORKER_STATUSES = {
+    message.ALIVE, message.DEBUG, message.JOB_COMPLETE, message.RANDOM_WALKER_COUNT, message.ACKNOWLEDGE_CHUNKS,
+    message.RECEIVED_FILE, message.START_SEND_FILE, message.END_SEND_FILE, message.FILE_CHUNK, message.PROGRESS
+}
+
 
 class Master(Server):
     def __init__(self, worker_hostnames: list, graph_path: str, worker_script: str, split_graph: bool, output_file: str,
                  scale: float, method: str = '', random_walkers_per_worker: int = 1, backup_size: int = 0, walking_iterations: int = 1,
-                 show_debug_messages: bool = True):
+                 start_policy: str = 'uniform', show_debug_messages: bool = True):
         started_at = time()
         super().__init__()
+        # Sends to all workers concurrently, the connection to each worker is used by one thread at a time
+        self.executor = ThreadPoolExecutor(max_workers=max(len(worker_hostnames), 1))
         self.worker_script = worker_script
         self.worker_hostnames = worker_hostnames
         self.output_file = output_file
@@ -32,6 +47,7 @@ class Master(Server):
         self.random_walkers_per_worker = random_walkers_per_worker
         self.backup_size = backup_size
         self.walking_iterations = walking_iterations
+        self.start_policy = start_policy
         self.show_debug_messages = show_debug_messages
 
         self.random_walker_counts_received = 0
@@ -47,7 +63,7 @@ class Master(Server):
             message.DEBUG: self.handle_debug,
             message.JOB_COMPLETE: self.handle_job_complete,
             message.RANDOM_WALKER_COUNT: self.handle_random_walker_count,
-            message.MISSING_CHUNK: self.handle_missing_chunk,
+            message.ACKNOWLEDGE_CHUNKS: self.handle_acknowledge_chunks,
             message.RECEIVED_FILE: self.handle_received_file,
             message.START_SEND_FILE: self.handle_start_send_file,
             message.END_SEND_FILE: self.handle_end_send_file,
@@ -81,6 +97,7 @@ class Master(Server):
                 f"Random walker per worker: {self.random_walkers_per_worker}")
             print(f"Backup size: {self.backup_size}")
             print(f"Walking iterations: {self.walking_iterations}")
+            print(f"Start policy: {self.start_policy}")
 
         print(f"Output file: {self.output_file}")
         print(f"Goal size: {self.goal_size:0.5f}")
@@ -93,15 +110,23 @@ class Master(Server):
     def get_goal_size(self):
         return self.worker_info_collection.get_total_number_of_edges() * self.scale
 
-    def send_graph_to_worker(self, worker_id):
-        data = read_file(
-            self.worker_info_collection[worker_id].input_sub_graph_path)
-        self.send_data_to_worker(worker_id, data, message.GRAPH)
-        self.debug(f'Worker {worker_id} received graph')
+    def send_graphs_to_workers(self, worker_ids: list = None):
+        """
+        Streams the sub graphs to the workers concurrently
+
+        :param worker_ids: Ids of the workers, all workers by default
+        """
+
+        if worker_ids is None:
+            worker_ids = list(self.worker_info_collection.keys())
 
-    def send_graphs_to_workers(self):
-        for worker_id in self.worker_info_collection.keys():
-            self.send_graph_to_worker(worker_id)
+        received = self.send_files_to_workers({
+            worker_id: self.worker_info_collection[worker_id].input_sub_graph_path for worker_id in worker_ids
+        }, message.GRAPH)
+
+        for worker_id in worker_ids:
+            if received[worker_id]:
+                self.debug(f'Worker {worker_id} received graph')
 
     def process_graph(self, graph_path: str, split_graph: bool) -> [MetaData]:
         """
@@ -164,23 +189,17 @@ class Master(Server):
     def make_sub_graphs_bidirectional(self, graph_path: str):
         combined_meta_data = self.worker_info_collection.get_combined_meta_data()
 
-        f = open(graph_path, "r")
-        for edge in read_as_reversed_edges(f):
-            start_vertex = get_start_vertex(edge)
+        for edges in read_edges(graph_path):
+            reversed_edges = edges[:, ::-1]
 
-            if start_vertex < combined_meta_data.bottom_layer.min_vertex:
-                worker_id = combined_meta_data.bottom_layer.worker_id
-            elif start_vertex > combined_meta_data.top_layer.max_vertex:
-                worker_id = combined_meta_data.top_layer.worker_id
-            else:
-                worker_id = combined_meta_data.get_worker_id_that_has_vertex(
-                    start_vertex)
+            # Vertices below or above all ranges belong to the bottom or top layer
+            start_vertices = reversed_edges[:, 0].clip(
+                combined_meta_data.bottom_layer.min_vertex, combined_meta_data.top_layer.max_vertex)
+            worker_ids = combined_meta_data.get_worker_ids_that_have_vertices(start_vertices)
 
-            append_edge(
-                path=self.worker_info_collection[worker_id].input_sub_graph_path,
-                edge=edge
-            )
-        f.close()
+            for worker_id in np.unique(worker_ids).tolist():
+                with open(self.worker_info_collection[worker_id].input_sub_graph_path, "a") as f:
+                    write_edges(f, reversed_edges[worker_ids == worker_id])
 
     def create_workers(self, graph_path, split_graph):
         """
@@ -196,7 +215,8 @@ class Master(Server):
             self.method,
             self.random_walkers_per_worker,
             self.backup_size,
-            self.walking_iterations
+            self.walking_iterations,
+            self.start_policy
         )
 
     @staticmethod
@@ -215,15 +235,41 @@ class Master(Server):
         sleep(0.5)
         self.handle_queue()
         self.worker_info_collection.terminate_workers()
+        self.executor.shutdown()
+
+    def handle_message(self, status, *args, peer: str = None):
+        if status in WORKER_STATUSES:
+            if not self.is_registered_process(args[0], peer):
+                # E.g. a late message of a process that was replaced after it was suspected to have failed
+                self.debug(f'Ignored a message of worker {args[0]} from {peer}, which is not registered')
+                return
+
+            # Every message of a worker shows that it is alive, so workers only send ALIVE messages when they are idle
+            self.handle_alive(args[0])
+
+        super().handle_message(status, *args, peer=peer)
+
+    def is_registered_process(self, worker_id, peer: str) -> bool:
+        """
+        :param worker_id: Id of worker
+        :param peer: Listen address that the sender announced, or its host if it has no server
+        :return: Boolean whether the sender is the process that is registered for the worker
+        """
+
+        meta_data = self.worker_info_collection[worker_id].meta_data
+        if not meta_data.is_registered():
+            return False
+
+        return peer is None or peer == '{}:{}'.format(*meta_data.get_connection_info())
 
     def handle_alive(self, worker_id):
         """
-        Updates the last-alive value of the worker
+        Records a heartbeat of the worker
 
         :param worker_id: Id of worker
         """
 
-        self.worker_info_collection[worker_id].last_alive = time()
+        self.worker_info_collection[worker_id].failure_detector.heartbeat()
 
     def handle_register(self, worker_id, host, port):
         """
@@ -246,8 +292,9 @@ class Master(Server):
     def handle_progress(self, worker_id, count):
         self.worker_info_collection[worker_id].progress = count
 
-    def handle_job_complete(self, worker_id):
+    def handle_job_complete(self, worker_id, traffic_statistics):
         self.worker_info_collection[worker_id].job_complete = True
+        self.worker_info_collection[worker_id].traffic_statistics = traffic_statistics
 
     def handle_random_walker_count(self, worker_id, count):
         self.debug(f'Worker {worker_id} has {count} random walkers')
@@ -265,64 +312,158 @@ class Master(Server):
             message
         )
 
-    def handle_missing_chunk(self, worker_id, file_type, index):
-        self.worker_info_collection[worker_id].file_senders[file_type].index = index
+    def send_messages_to_worker(self, worker_id, messages: [bytes]):
+        for message_to_send in messages:
+            self.send_message_to_worker(worker_id, message_to_send)
+
+    def fan_out(self, function, worker_ids, *args) -> dict:
+        """
+        Calls the function for each of the workers concurrently, a failing call does not stop the other calls
+
+        :param function: Function that takes the id of a worker and the arguments
+        :param worker_ids: Ids of the workers
+        :param args: Arguments for each call
+        :return: Exceptions of the calls that failed, by worker id
+        """
+
+        futures = {worker_id: self.executor.submit(function, worker_id, *args) for worker_id in worker_ids}
+        errors = {}
+
+        for worker_id, future in futures.items():
+            error = future.exception()
+            if error is not None:
+                errors[worker_id] = error
+
+        return errors
+
+    def handle_acknowledge_chunks(self, worker_id, file_type, ranges):
+        if self.worker_info_collection[worker_id].file_senders[file_type] is not None:
+            self.worker_info_collection[worker_id].file_senders[file_type].handle_acknowledgement(ranges)
 
     def handle_received_file(self, worker_id, file_type):
         if self.worker_info_collection[worker_id].file_senders[file_type] is not None:
             self.worker_info_collection[worker_id].file_senders[file_type].target_received_file = True
 
-    def send_data_to_worker(self, worker_id: int, data: list, file_type: int):
-        self.worker_info_collection[worker_id].file_senders[file_type] = FileSender(
-            worker_id, file_type, data)
-        file_sender = self.worker_info_collection[worker_id].file_senders[file_type]
-
-        self.send_message_to_worker(worker_id, message.write_start_send_file(
-            worker_id, file_type, len(file_sender.messages)))
-        while not file_sender.target_received_file or not file_sender.complete_file_send:
-            if file_sender.complete_file_send:
-                self.send_message_to_worker(
-                    worker_id, message.write_end_send_file(worker_id, file_type))
-                sleep(0.1)
+    def send_data_to_workers(self, data: dict, file_type: int) -> dict:
+        """
+        Sends data to the workers concurrently, each in a window of chunks that the worker acknowledges
+
+        :param data: Data per worker id
+        :param file_type: Type of the data, e.g. message.BACKUP
+        :return: Boolean per worker id whether the worker received the data
+        """
+
+        file_senders = {}
+        for worker_id, worker_data in data.items():
+            file_senders[worker_id] = FileSender(worker_id, file_type, worker_data)
+            self.worker_info_collection[worker_id].file_senders[file_type] = file_senders[worker_id]
+
+        pending = set(file_senders.keys())
+        errors = self.fan_out(lambda worker_id: self.send_message_to_worker(worker_id, message.write_start_send_file(
+            worker_id, file_type, len(file_senders[worker_id].messages), file_senders[worker_id].encoding)), pending)
+
+        while True:
+            for worker_id, error in errors.items():
+                self.debug(f'Worker {worker_id} failed while receiving data: {error!r}')
+                pending.discard(worker_id)
+
+            pending = {worker_id for worker_id in pending if not file_senders[worker_id].target_received_file}
+            if len(pending) == 0:
+                break
+
+            messages = {worker_id: file_senders[worker_id].get_messages_to_send() for worker_id in pending}
+            sending = [worker_id for worker_id in pending if len(messages[worker_id]) > 0]
+            errors = self.fan_out(lambda worker_id: self.send_messages_to_worker(worker_id, messages[worker_id]),
+                                  sending)
+
+            if len(sending) == 0:
+                # Wait for an acknowledgement, or until unacknowledged chunks are send again
+                if not self.wait_for_message(RETRANSMISSION_TIMEOUT):
+                    errors = {worker_id: ConnectionError('Worker failed') for worker_id in pending
+                              if self.has_failed(worker_id)}
             else:
-                self.send_message_to_worker(
-                    worker_id, file_sender.get_next_message())
+                self.handle_queue()
+
+        for worker_id in file_senders.keys():
+            self.worker_info_collection[worker_id].file_senders[file_type] = None
+
+        return {worker_id: file_sender.target_received_file for worker_id, file_sender in file_senders.items()}
+
+    def start_file_stream(self, worker_id: int, path: str, file_type: int):
+        file_sender = FileStreamServer(path)
+        self.worker_info_collection[worker_id].file_senders[file_type] = file_sender
+        file_sender.start()
+
+        self.send_message_to_worker(worker_id, message.write_stream_file(
+            worker_id, file_type, file_sender.hostname, file_sender.port, file_sender.size, file_sender.checksum))
+
+    def send_files_to_workers(self, paths: dict, file_type: int) -> dict:
+        """
+        Streams a file to each of the workers concurrently, each over a dedicated connection. The workers fetch the
+        files and confirm with RECEIVED_FILE once the checksum matches. Workers that failed are given up on, they are
+        restarted by `control_workers`
+
+        :param paths: Path to the file to send per worker id
+        :param file_type: Type of the files, e.g. message.GRAPH
+        :return: Boolean per worker id whether the worker received its file
+        """
 
-            self.handle_queue()
+        worker_infos = {worker_id: self.worker_info_collection[worker_id] for worker_id in paths.keys()}
+        errors = self.fan_out(lambda worker_id: self.start_file_stream(worker_id, paths[worker_id], file_type), paths)
+        file_senders = {worker_id: worker_info.file_senders[file_type] for worker_id, worker_info in worker_infos.items()}
+        received = {worker_id: False for worker_id in paths.keys()}
 
-        self.worker_info_collection[worker_id].file_senders[file_type] = None
+        def is_pending(worker_id) -> bool:
+            return worker_id not in errors and not file_senders[worker_id].target_received_file
 
-    def handle_start_send_file(self, worker_id, file_type, number_of_chunks):
+        try:
+            pending = [worker_id for worker_id in paths.keys() if is_pending(worker_id)]
+            while not self.wait_for(lambda: not any(is_pending(worker_id) for worker_id in pending), CONTROL_INTERVAL):
+                pending = [worker_id for worker_id in pending if is_pending(worker_id) and not self.has_failed(worker_id)]
+        finally:
+            for worker_id, file_sender in file_senders.items():
+                if file_sender is not None:
+                    file_sender.terminate()
+                    received[worker_id] = file_sender.target_received_file
+                worker_infos[worker_id].file_senders[file_type] = None
+
+        for worker_id, error in errors.items():
+            self.debug(f'Worker {worker_id} could not be sent a file: {error!r}')
+        for worker_id, is_received in received.items():
+            if not is_received:
+                self.debug(f'Worker {worker_id} failed while receiving a file')
+
+        return received
+
+    def handle_start_send_file(self, worker_id, file_type, number_of_chunks, encoding):
         self.worker_info_collection[worker_id].file_receivers[file_type] = FileReceiver(
-            number_of_chunks)
+            number_of_chunks, encoding)
 
     def handle_file_chunk(self, worker_id, file_type, index, chunk):
-        if self.worker_info_collection[worker_id].file_receivers[file_type] is None:
+        file_receiver = self.worker_info_collection[worker_id].file_receivers[file_type]
+        if file_receiver is None:
             return
 
-        try:
-            self.worker_info_collection[worker_id].file_receivers[file_type].receive_chunk(
-                index, chunk)
-        except UnexpectedChunkIndex as e:
-            self.send_message_to_worker(worker_id, message.write_missing_chunk(
-                worker_id, file_type, e.expected_index))
+        if file_receiver.receive_chunk(index, chunk):
+            self.send_message_to_worker(worker_id, message.write_acknowledge_chunks(
+                worker_id, file_type, file_receiver.get_received_ranges()))
 
     def handle_end_send_file(self, worker_id, file_type):
-        try:
-            self.worker_info_collection[worker_id].file_receivers[file_type].handle_end_send_file(
-            )
-            self.send_message_to_worker(
-                worker_id, message.write_received_file(worker_id, file_type))
-
-            if file_type == message.BACKUP:
-                self.handle_backup(worker_id)
+        file_receiver = self.worker_info_collection[worker_id].file_receivers[file_type]
+        if file_receiver is None:
+            return
 
-        except UnexpectedChunkIndex as e:
-            self.send_message_to_worker(worker_id, message.write_missing_chunk(
-                worker_id, file_type, e.expected_index))
-        except AttributeError:
+        if not file_receiver.received_complete_file:
+            self.send_message_to_worker(worker_id, message.write_acknowledge_chunks(
+                worker_id, file_type, file_receiver.get_received_ranges()))
             return
 
+        self.send_message_to_worker(
+            worker_id, message.write_received_file(worker_id, file_type))
+
+        if file_type == message.BACKUP:
+            self.handle_backup(worker_id)
+
     def handle_backup(self, worker_id):
         new_edges = self.worker_info_collection[worker_id].file_receivers[message.BACKUP].file
         self.worker_info_collection[worker_id].backup += new_edges
@@ -330,17 +471,23 @@ class Master(Server):
         self.worker_info_collection[worker_id].file_receivers[message.BACKUP] = None
 
     def broadcast(self, message, allow_connection_refused: bool = False):
-        for worker_info in self.worker_info_collection.values():
-            if worker_info.is_registered():
-                if allow_connection_refused:
-                    try:
-                        sockets.send_message(
-                            *worker_info.meta_data.get_connection_info(), message)
-                    except ConnectionRefusedError:
-                        continue
-                else:
-                    sockets.send_message(
-                        *worker_info.meta_data.get_connection_info(), message)
+        """
+        Sends the message to all registered workers concurrently
+
+        :param message: Encoded message
+        :param allow_connection_refused: Skip the workers that refuse the connection, instead of raising
+        """
+
+        worker_ids = [worker_id for worker_id, worker_info in self.worker_info_collection.items()
+                      if worker_info.is_registered()]
+        errors = self.fan_out(self.send_message_to_worker, worker_ids, message)
+
+        for worker_id, error in errors.items():
+            if allow_connection_refused and isinstance(error, ConnectionRefusedError):
+                continue
+
+            # Every worker was sent to, the first error is raised
+            raise error
 
     def send_meta_data_to_workers(self, allow_connection_refused: bool = False):
         self.broadcast(message.write_meta_data([
@@ -360,9 +507,26 @@ class Master(Server):
         stdout.flush()
 
     def wait_for_workers_to_complete(self):
-        while not self.worker_info_collection.all_workers_done():
-            sleep(0.01)
-            self.handle_queue()
+        self.wait_for(self.worker_info_collection.all_workers_done)
+
+        if self.show_debug_messages:
+            self.write_traffic_statistics(f'{self.output_file}.traffic.json')
+
+    def write_traffic_statistics(self, path: str):
+        """
+        Writes the traffic and latencies of the messages of the master and of each worker as JSON
+
+        :param path: Path to the JSON file
+        """
+
+        with open(path, 'w') as f:
+            json.dump({
+                'master': self.get_traffic_statistics(),
+                'workers': {
+                    worker_id: worker_info.traffic_statistics
+                    for worker_id, worker_info in self.worker_info_collection.items()
+                }
+            }, f, indent=4)
 
     def create_graph(self):
         graph = DistributedGraph(distributed=False)
@@ -372,15 +536,11 @@ class Master(Server):
         return graph
 
     def wait_for_random_walker_counts(self, expected_number: int):
-        while self.random_walker_counts_received < expected_number:
-            self.handle_queue()
-            sleep(0.01)
+        self.wait_for(lambda: self.random_walker_counts_received >= expected_number)
         self.random_walker_counts_received = 0
 
     def wait_for_worker_to_register(self, worker_id):
-        while not self.worker_info_collection[worker_id].is_registered():
-            self.handle_queue()
-            sleep(0.01)
+        self.wait_for(self.worker_info_collection[worker_id].is_registered)
 
     def pause_workers(self):
         self.broadcast(message.write_worker_failed(),
@@ -389,11 +549,31 @@ class Master(Server):
     def continue_workers(self):
         self.broadcast(message.write_continue(), allow_connection_refused=True)
 
+    def has_failed(self, worker_id) -> bool:
+        """
+        Probes the worker if it is suspected by its failure detector
+
+        :param worker_id: Id of worker
+        :return: Boolean whether the worker can not be reached
+        """
+
+        worker_info = self.worker_info_collection[worker_id]
+        if worker_info.is_alive():
+            return False
+
+        if sockets.is_alive(*worker_info.meta_data.get_connection_info()):
+            # Slow, but reachable
+            self.handle_alive(worker_id)
+            return False
+
+        return True
+
     def get_failed_workers(self):
-        if len([worker_id for worker_id in self.worker_info_collection.keys() if not self.worker_info_collection[worker_id].is_alive()]) == 0:
-            return []
+        """
+        :return: Ids of the workers that can not be reached
+        """
 
-        return [worker_id for worker_id, worker_info in self.worker_info_collection.items() if not sockets.is_alive(*worker_info.meta_data.get_connection_info())]
+        return [worker_id for worker_id in self.worker_info_collection.keys() if self.has_failed(worker_id)]
 
     def control_workers(self):
         started_at = time()
@@ -408,6 +588,8 @@ class Master(Server):
         # Update connection info
         for worker_id in failed_workers:
             self.debug(f"Worker {worker_id} died")
+            sockets.close_connection(
+                *self.worker_info_collection[worker_id].meta_data.get_connection_info())
             self.worker_info_collection[worker_id].meta_data.set_connection_info(
                 None, None)
             self.worker_info_collection[worker_id].file_senders[message.GRAPH] = None
@@ -427,6 +609,7 @@ class Master(Server):
         random_walkers_to_restart = len(
             self.worker_info_collection) * self.random_walkers_per_worker - self.worker_info_collection.random_walker_count()
 
+        numbers_of_random_walkers = {}
         for worker_id in failed_workers:
             self.debug(f"Restarting worker {worker_id}")
 
@@ -435,21 +618,27 @@ class Master(Server):
             if number_of_random_walkers < 0:
                 number_of_random_walkers = 0
 
-            self.worker_info_collection[worker_id].start_worker(
-                worker_script=self.worker_script,
-                hostname_master=self.hostname,
-                port_master=self.port,
-                scale=self.scale,
-                method=self.method,
-
-                number_of_random_walkers=number_of_random_walkers,
-                load_backup=1,
-                backup_size=self.backup_size,
-                walking_iterations=self.walking_iterations
-            )
-
+            numbers_of_random_walkers[worker_id] = number_of_random_walkers
             random_walkers_to_restart -= number_of_random_walkers
 
+        # Starting a worker over ssh takes a while, so the workers are started concurrently
+        errors = self.fan_out(lambda worker_id: self.worker_info_collection[worker_id].start_worker(
+            worker_script=self.worker_script,
+            hostname_master=self.hostname,
+            port_master=self.port,
+            scale=self.scale,
+            method=self.method,
+
+            number_of_random_walkers=numbers_of_random_walkers[worker_id],
+            load_backup=1,
+            backup_size=self.backup_size,
+            walking_iterations=self.walking_iterations,
+            start_policy=self.start_policy
+        ), failed_workers)
+
+        for error in errors.values():
+            raise error
+
         for worker_id in failed_workers:
             self.debug(f"Waiting for worker {worker_id} to register")
             self.wait_for_worker_to_register(worker_id)
@@ -457,13 +646,14 @@ class Master(Server):
         self.debug(f"Sending updated meta-data to workers")
         self.send_meta_data_to_workers(allow_connection_refused=True)
 
-        for worker_id in failed_workers:
-            self.send_graph_to_worker(worker_id)
+        self.send_graphs_to_workers(failed_workers)
 
-        for worker_id in failed_workers:
-            if len(self.worker_info_collection[worker_id].backup) > 0:
-                self.send_data_to_worker(
-                    worker_id, self.worker_info_collection[worker_id].backup[:], message.BACKUP)
+        backups = {
+            worker_id: self.worker_info_collection[worker_id].backup[:] for worker_id in failed_workers
+            if len(self.worker_info_collection[worker_id].backup) > 0
+        }
+        for worker_id, received in self.send_data_to_workers(backups, message.BACKUP).items():
+            if received:
                 self.debug(f'Worker {worker_id} received backup')
 
         self.continue_workers()
@@ -479,8 +669,8 @@ class Master(Server):
 
         if self.method == "random_walk":
             while self.total_progress() < self.goal_size:
-                sleep(0.01)
-                self.handle_queue()
+                # Failed workers do not send messages, so they are checked at least once per interval
+                self.wait_for_message(CONTROL_INTERVAL)
 
                 if self.show_debug_messages:
                     self.print_progress()
@@ -1,11 +1,14 @@
-from multiprocessing import Process
-from time import sleep
+import atexit
+import shutil
+import tempfile
+from threading import Thread, Event
+from time import sleep, time
 
 from lab.util import sockets, message
 from lab.util.meta_data import MetaData, CombinedMetaData
 from lab.util.server import Server
 from lab.util import message, file_io, validation
-from lab.util.file_transfer import FileReceiver, UnexpectedChunkIndex, FileSender
+from lab.util.file_transfer import FileReceiver, FileSender, StreamReceiver, RETRANSMISSION_TIMEOUT
 from lab.util.meta_data import CombinedMetaData, MetaData
 from typing import Dict
 
@@ -19,6 +22,7 @@ class Client:
         self.worker_id = worker_id
         self.master_host = master_host
         self.master_port = master_port
+        self.last_message_to_master_at = time()
 
     def send_message_to_master(self, message_to_send: bytes):
         """
@@ -28,6 +32,7 @@ class Client:
             try:
                 sockets.send_message(
                     self.master_host, self.master_port, message_to_send)
+                self.last_message_to_master_at = time()
                 return
             except ConnectionResetError:
                 # Try again until success
@@ -46,23 +51,31 @@ class Client:
         sockets.send_message(host, port, message_to_send)
 
 
-class HeartbeatDaemon(Client):
-    """ Daemon process that periodically pings Master to indicate the
-    corresponding worker is alive.
+class HeartbeatDaemon(Thread):
+    """ Daemon thread that pings Master to indicate the corresponding worker
+    is alive, whenever the worker did not send any other message to Master
+    for `wait_time` seconds.
     """
 
-    def __init__(self, worker_id: int, master_host: str, master_port: int,
-                 wait_time: float):
-        super().__init__(worker_id, master_host, master_port)
+    def __init__(self, client: Client, wait_time: float):
+        super().__init__(daemon=True)
+        self.client = client
+        self.wait_time = wait_time
+        self.stopped = Event()
+
+    def run(self):
+        while not self.stopped.wait(max(self.client.last_message_to_master_at + self.wait_time - time(), 0)):
+            if time() - self.client.last_message_to_master_at < self.wait_time:
+                continue
 
-        while True:
             try:
-                self.send_message_to_master(
-                    message.write_alive(self.worker_id))
+                self.client.send_message_to_master(
+                    message.write_alive(self.client.worker_id))
             except ConnectionRefusedError:
                 return
 
-            sleep(wait_time)
+    def terminate(self):
+        self.stopped.set()
 
 
 class WorkerInterface(Client, Server):
@@ -87,6 +100,12 @@ class WorkerInterface(Client, Server):
         }
 
         self.backup_sender = None
+        # Lines of the next backup, collected while the previous backup is being send
+        self.pending_backup = []
+
+        # Streamed files are removed once they are read, the directory when the worker exits
+        self.stream_directory = tempfile.mkdtemp(prefix=f'worker-{self.worker_id}-')
+        atexit.register(self.remove_stream_directory)
 
         self.init_heartbeat_daemon(wait_time=0.5)
 
@@ -103,6 +122,10 @@ class WorkerInterface(Client, Server):
     def handle_terminate(self):
         self.heartbeat_daemon.terminate()
         self.server.terminate()
+        self.remove_stream_directory()
+
+    def remove_stream_directory(self):
+        shutil.rmtree(self.stream_directory, ignore_errors=True)
 
     def handle_meta_data(self, all_meta_data):
         self.combined_meta_data = CombinedMetaData([
@@ -132,53 +155,91 @@ class WorkerInterface(Client, Server):
             for meta_data in all_meta_data
         ])
 
-    def handle_start_send_file(self, worker_id, file_type, number_of_chunks):
-        self.file_receivers[file_type] = FileReceiver(number_of_chunks)
+    def handle_start_send_file(self, worker_id, file_type, number_of_chunks, encoding):
+        self.file_receivers[file_type] = FileReceiver(number_of_chunks, encoding)
 
     def handle_file_chunk(self, worker_id, file_type, index, chunk):
-        try:
-            self.file_receivers[file_type].receive_chunk(index, chunk)
-        except UnexpectedChunkIndex as e:
-            self.send_message_to_master(message.write_missing_chunk(
-                self.worker_id, file_type, e.expected_index))
+        if self.file_receivers[file_type].receive_chunk(index, chunk):
+            self.send_message_to_master(message.write_acknowledge_chunks(
+                self.worker_id, file_type, self.file_receivers[file_type].get_received_ranges()))
 
     def handle_end_send_file(self, worker_id, file_type):
-        try:
-            self.file_receivers[file_type].handle_end_send_file()
+        if self.file_receivers[file_type].received_complete_file:
             self.send_message_to_master(
                 message.write_received_file(self.worker_id, file_type))
-        except UnexpectedChunkIndex as e:
-            self.send_message_to_master(message.write_missing_chunk(
-                self.worker_id, file_type, e.expected_index))
+        else:
+            self.send_message_to_master(message.write_acknowledge_chunks(
+                self.worker_id, file_type, self.file_receivers[file_type].get_received_ranges()))
+
+    def handle_stream_file(self, worker_id, file_type, host, port, size, checksum):
+        if isinstance(self.file_receivers[file_type], StreamReceiver):
+            # The file is streamed again, e.g. after the master restarted the transfer
+            self.file_receivers[file_type].remove()
 
-    def handle_missing_chunk(self, worker_id, file_type, index):
-        self.backup_sender.index = index
+        f = tempfile.NamedTemporaryFile(dir=self.stream_directory, prefix=f'{file_type}-', suffix='.txt', delete=False)
+        f.close()
+
+        self.file_receivers[file_type] = StreamReceiver(host, port, size, checksum, f.name)
+        self.file_receivers[file_type].receive()
+        self.send_message_to_master(
+            message.write_received_file(self.worker_id, file_type))
+
+    def handle_acknowledge_chunks(self, worker_id, file_type, ranges):
+        if self.backup_sender is not None:
+            self.backup_sender.handle_acknowledgement(ranges)
 
     def handle_received_file(self, worker_id, file_type):
-        self.backup_sender.target_received_file = True
+        if self.backup_sender is not None:
+            self.backup_sender.target_received_file = True
 
     def send_backup_to_master(self, data: list):
+        """
+        Starts sending a backup without waiting for the master. The lines are added to the next backup if a backup is
+        still being send
+
+        :param data: Lines of the backup
+        """
+
+        if self.backup_sender is not None:
+            self.pending_backup += data
+            return
+
         self.backup_sender = FileSender(
             self.worker_id, message.BACKUP, data=data)
 
         self.send_message_to_master(message.write_start_send_file(
-            self.worker_id, message.BACKUP, len(self.backup_sender.messages)))
-        while not self.backup_sender.target_received_file or not self.backup_sender.complete_file_send:
-            if self.backup_sender.complete_file_send:
-                self.send_message_to_master(
-                    message.write_end_send_file(self.worker_id, message.BACKUP))
-                sleep(0.1)
-            else:
-                self.send_message_to_master(
-                    self.backup_sender.get_next_message())
-
-            self.handle_queue()
+            self.worker_id, message.BACKUP, len(self.backup_sender.messages), self.backup_sender.encoding))
+        self.send_backup_messages()
 
-        self.backup_sender = None
+    def send_backup_messages(self):
+        """
+        Sends the chunks of the current backup that fit in the window, and starts sending the pending backup once the
+        master received the current one
+        """
+
+        if self.backup_sender is None:
+            return
+
+        for message_to_send in self.backup_sender.get_messages_to_send():
+            self.send_message_to_master(message_to_send)
+
+        if self.backup_sender.target_received_file:
+            self.backup_sender = None
+
+            if len(self.pending_backup) > 0:
+                pending_backup, self.pending_backup = self.pending_backup, []
+                self.send_backup_to_master(pending_backup)
+
+    def wait_for_backups(self):
+        while self.backup_sender is not None:
+            self.send_backup_messages()
+            if self.backup_sender is not None:
+                # Wait for an acknowledgement, or until unacknowledged chunks are send again
+                self.wait_for_message(RETRANSMISSION_TIMEOUT)
 
     def receive_graph(self):
-        while self.file_receivers[message.GRAPH] is None or not self.file_receivers[message.GRAPH].received_complete_file:
-            self.handle_queue()
+        self.wait_for(lambda: self.file_receivers[message.GRAPH] is not None
+                      and self.file_receivers[message.GRAPH].received_complete_file)
 
     def register(self):
         """
@@ -192,11 +253,11 @@ class WorkerInterface(Client, Server):
         ))
 
     def send_job_complete(self):
-        """ Sends a JOB_COMPLETE to master
+        """ Sends a JOB_COMPLETE with the traffic statistics of the worker to master
         """
 
         self.send_message_to_master(
-            message.write_job(message.JOB_COMPLETE, self.worker_id))
+            message.write_job(message.JOB_COMPLETE, self.worker_id, self.get_traffic_statistics()))
 
     def send_debug_message(self, debug_message: str):
         self.send_message_to_master(message.write_debug(
@@ -205,6 +266,5 @@ class WorkerInterface(Client, Server):
         ))
 
     def init_heartbeat_daemon(self, wait_time: float = 1.0):
-        self.heartbeat_daemon = Process(target=HeartbeatDaemon, args=(
-            self.worker_id, self.master_host, self.master_port, wait_time))
+        self.heartbeat_daemon = HeartbeatDaemon(self, wait_time)
         self.heartbeat_daemon.start()
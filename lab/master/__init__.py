@@ -1,6 +1,6 @@
 from lab.util.argument_parser import get_arg
 from lab.util.output import print_error
-from lab.util.validation import assert_bool,  assert_path, assert_file, assert_pos_float, assert_master_type, assert_method, assert_list, assert_positive_int
+from lab.util.validation import assert_bool,  assert_path, assert_file, assert_pos_float, assert_master_type, assert_method, assert_list, assert_positive_int, assert_start_policy
 
 
 def main():
@@ -23,6 +23,8 @@ def main():
             "--backup-size", assert_positive_int, default=100)
         walking_iterations = get_arg(
             "--walking-iterations", assert_positive_int, default=1)
+        start_policy = get_arg(
+            "--start-policy", assert_start_policy, default='uniform')
         random_walkers_per_worker = get_arg(
             "--random-walkers-per-worker", assert_positive_int, default=1)
         debug = get_arg("--debug", assert_bool, default=True)
@@ -40,6 +42,7 @@ def main():
             "\t--random-walkers-per-worker: The number of random walker to start per worker\n"
             "\t--backup-size: Minimum size of the backup before it will be send to the master during a run\n"
             "\t--walking-iterations: The number of steps a random walker sets before the queue will be handled\n"
+            "\t--start-policy: Choose the start vertices of the random walkers `uniform` or proportional to their `degree`\n"
             "\t--debug: Show debug messages"
         )
         return
@@ -48,7 +51,7 @@ def main():
     master_func(worker_hostnames, graph_path, worker_script,
                 split_graph, output_file, scale, method,
                 random_walkers_per_worker, backup_size,
-                walking_iterations, debug)
+                walking_iterations, start_policy, debug)
 
 
 if __name__ == '__main__':
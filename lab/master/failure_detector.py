@@ -0,0 +1,95 @@
+from collections import deque
+from math import exp, log, log1p, sqrt
+from time import time
+
+# Suspicion level above which a worker is suspected to have failed, phi = 8 means a 1e-8 chance of a wrong suspicion
+PHI_THRESHOLD = 8.0
+# Number of recent inter-arrival times from which the distribution is estimated
+WINDOW_SIZE = 100
+# Lower bound of the standard deviation, such that regular heartbeats do not make the detector oversensitive
+MIN_STD_DEVIATION = 0.1
+# Seconds of silence that are tolerated on top of the estimated distribution, e.g. for garbage collection
+ACCEPTABLE_PAUSE = 0.5
+# Estimate of the inter-arrival time before the first interval is known
+FIRST_HEARTBEAT_INTERVAL = 0.5
+
+
+class AccrualFailureDetector:
+    """ Phi accrual failure detector (Hayashibara et al., 2004).
+
+    Instead of a fixed timeout, the time since the last heartbeat is compared with the normal distribution of the
+    recent inter-arrival times, which makes the detector adapt to the load of the worker and the network.
+    """
+
+    def __init__(self, threshold: float = PHI_THRESHOLD, window_size: int = WINDOW_SIZE,
+                 min_std_deviation: float = MIN_STD_DEVIATION, acceptable_pause: float = ACCEPTABLE_PAUSE,
+                 first_heartbeat_interval: float = FIRST_HEARTBEAT_INTERVAL):
+        self.threshold = threshold
+        self.min_std_deviation = min_std_deviation
+        self.acceptable_pause = acceptable_pause
+        self.first_heartbeat_interval = first_heartbeat_interval
+
+        self.intervals = deque(maxlen=window_size)
+        self.sum_of_intervals = 0.0
+        self.sum_of_squared_intervals = 0.0
+        self.last_heartbeat_at = None
+
+    def add_interval(self, interval: float):
+        if len(self.intervals) == self.intervals.maxlen:
+            oldest_interval = self.intervals.popleft()
+            self.sum_of_intervals -= oldest_interval
+            self.sum_of_squared_intervals -= oldest_interval ** 2
+
+        self.intervals.append(interval)
+        self.sum_of_intervals += interval
+        self.sum_of_squared_intervals += interval ** 2
+
+    def heartbeat(self, now: float = None):
+        """
+        Records that a message of the worker was received
+
+        :param now: Time of arrival, defaults to the current time
+        """
+
+        now = time() if now is None else now
+
+        if self.last_heartbeat_at is None:
+            # Start with a guess of mean and standard deviation, as in Akka
+            self.add_interval(self.first_heartbeat_interval - self.first_heartbeat_interval / 4)
+            self.add_interval(self.first_heartbeat_interval + self.first_heartbeat_interval / 4)
+        else:
+            self.add_interval(now - self.last_heartbeat_at)
+
+        self.last_heartbeat_at = now
+
+    def phi(self, now: float = None) -> float:
+        """
+        :param now: Time at which the suspicion is evaluated, defaults to the current time
+        :return: Suspicion level, -log10 of the probability that a heartbeat arrives even later than now
+        """
+
+        if self.last_heartbeat_at is None:
+            return 0.0
+
+        now = time() if now is None else now
+        mean = self.sum_of_intervals / len(self.intervals)
+        variance = max(self.sum_of_squared_intervals / len(self.intervals) - mean ** 2, 0.0)
+        std_deviation = max(sqrt(variance), self.min_std_deviation)
+
+        # Logistic approximation of the cumulative distribution function of the normal distribution, 1 / (1 + e^-z),
+        # rearranged such that exp never overflows
+        y = (now - self.last_heartbeat_at - mean - self.acceptable_pause) / std_deviation
+        z = y * (1.5976 + 0.070566 * y * y)
+
+        if z > 0:
+            return (z + log1p(exp(-z))) / log(10)
+
+        return log1p(exp(z)) / log(10)
+
+    def is_available(self, now: float = None) -> bool:
+        """
+        :param now: Time at which the availability is evaluated, defaults to the current time
+        :return: Boolean whether a heartbeat was received and the worker is not suspected
+        """
+
+        return self.last_heartbeat_at is not None and self.phi(now) < self.threshold
@@ -1,14 +1,12 @@
 from typing import Dict
 
+from lab.master.failure_detector import AccrualFailureDetector
 from lab.util.file_transfer import FileSender, FileReceiver
 from lab.util.meta_data import MetaData, CombinedMetaData
-from time import time
 from lab.util.file_io import get_number_of_lines, get_first_line, get_last_line, get_start_vertex, sort_file
 from lab.util.command_line import setup_worker
 from lab.util import message
 
-MAX_HEARTBEAT_DELAY = 1.0
-
 
 class WorkerInfo:
     def __init__(self, worker_id: int, input_sub_graph_path: str, meta_data: MetaData, hostname: str):
@@ -16,12 +14,14 @@ class WorkerInfo:
         self.input_sub_graph_path = input_sub_graph_path
         self.meta_data = meta_data
         self.process = None
-        self.last_alive = None
+        self.failure_detector = AccrualFailureDetector()
         self.job_complete = False
         self.random_walker_count = 0
         self.backup = []
         self.hostname = hostname
         self.progress = 0
+        # Traffic and latencies of the messages of the worker, reported with JOB_COMPLETE
+        self.traffic_statistics = {}
 
         self.file_senders: Dict[int, FileSender] = {
             message.GRAPH: None,
@@ -33,7 +33,7 @@ class WorkerInfo:
         }
 
     def is_alive(self):
-        return self.last_alive is not None and time() - self.last_alive < MAX_HEARTBEAT_DELAY
+        return self.failure_detector.is_available()
 
     def update_meta_data(self):
         self.meta_data.number_of_edges = get_number_of_lines(
@@ -53,9 +53,11 @@ class WorkerInfo:
     def is_registered(self):
         return self.meta_data.is_registered()
 
-    def start_worker(self, worker_script, hostname_master, port_master, scale, method, number_of_random_walkers=1, load_backup=0, backup_size=100, walking_iterations=1):
+    def start_worker(self, worker_script, hostname_master, port_master, scale, method, number_of_random_walkers=1, load_backup=0, backup_size=100, walking_iterations=1, start_policy='uniform'):
         self.meta_data.host = None
         self.meta_data.port = None
+        # The arrival times of the previous process say nothing about the new one
+        self.failure_detector = AccrualFailureDetector()
 
         self.process = setup_worker(
             self.hostname,
@@ -68,7 +70,8 @@ class WorkerInfo:
             load_backup,
             number_of_random_walkers,
             backup_size,
-            walking_iterations
+            walking_iterations,
+            start_policy
         )
 
 
@@ -131,12 +134,12 @@ class WorkerInfoCollection:
     def start_workers(self, worker_script: str, hostname_master: str,
                       port_master: int, scale: float, method: str,
                       number_of_random_walkers: int = 1, backup_size: int = 100,
-                      walking_iterations: int = 1):
+                      walking_iterations: int = 1, start_policy: str = 'uniform'):
         for worker_info in self.worker_info_collection.values():
             worker_info.start_worker(
                 worker_script, hostname_master, port_master, scale, method,
                 number_of_random_walkers, backup_size=backup_size,
-                walking_iterations=walking_iterations)
+                walking_iterations=walking_iterations, start_policy=start_policy)
 
     def random_walker_count(self):
         return sum([worker_info.random_walker_count for worker_info in self.worker_info_collection.values()])
@@ -5,7 +5,7 @@ import numpy as np
 from lab.util.graph import Graph
 
 from lab.util import metrics
-from lab.util.graph import Graph
+from lab.util.graph import Graph, CSRGraph
 
 
 class Algorithm:
@@ -314,6 +314,25 @@ class GScalerAlgorithmTest(unittest.TestCase):
         self.assertEqual(f_bi, f_bi_test)
         self.assertEqual(f_corr, f_corr_test)
 
+    def test_decompose_csr_graph(self):
+        g = Graph()
+        for i in range(5):
+            g.addVertex(i)
+        edges = [[0, 1], [1, 2], [2, 3], [0, 2]]
+        g.addEdgeSet(edges)
+
+        S_in, S_out, f_bi, f_corr = GScalerAlgorithm(g, 2).decompose()
+        S_in_csr, S_out_csr, f_bi_csr, f_corr_csr = GScalerAlgorithm(CSRGraph.from_graph(g), 2).decompose()
+
+        # The neighbours of a CSRGraph are sorted, those of a Graph are in the order in which they were added
+        def to_tuples(S):
+            return sorted((int(vertex_1), (int(vertex_2), int(vertex_3))) for vertex_1, (vertex_2, vertex_3) in S)
+
+        self.assertEqual(to_tuples(S_in_csr), to_tuples(S_in))
+        self.assertEqual(to_tuples(S_out_csr), to_tuples(S_out))
+        self.assertEqual(f_bi_csr, f_bi)
+        self.assertEqual(f_corr_csr, f_corr)
+
     def test_scaling(self):
         g = Graph()
         for i in range(5):
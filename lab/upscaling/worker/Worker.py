@@ -1,5 +1,3 @@
-from time import sleep
-
 from lab.util.graph import Graph
 from lab.util import message
 from lab.master.WorkerInterface import WorkerInterface
@@ -26,9 +24,10 @@ class Worker(WorkerInterface):
             # message.WORKER_FAILED: self.handle_worker_failed,
             message.CONTINUE: self.handle_continue,
             message.START_SEND_FILE: self.handle_start_send_file,
+            message.STREAM_FILE: self.handle_stream_file,
             message.FILE_CHUNK: self.handle_file_chunk,
             message.END_SEND_FILE: self.handle_end_send_file,
-            message.MISSING_CHUNK: self.handle_missing_chunk,
+            message.ACKNOWLEDGE_CHUNKS: self.handle_acknowledge_chunks,
             message.RECEIVED_FILE: self.handle_received_file,
             message.TERMINATE: self.handle_terminate
         }
@@ -79,7 +78,6 @@ class Worker(WorkerInterface):
         self.send_job_complete()
 
         while True:
-            sleep(0.1)
-            self.handle_queue()
+            self.wait_for_message()
 
         # self.terminate()
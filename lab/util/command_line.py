@@ -22,7 +22,7 @@ def run_ssh_script(hostname, *arguments):
 
 def setup_worker(hostname_worker, script, worker_id, hostname_master,
                  port_master, scale, method, load_backup,
-                 number_of_random_walkers, backup_size, walking_iterations):
+                 number_of_random_walkers, backup_size, walking_iterations, start_policy):
     # Debug locally, without ssh
     if local:
         return run_python_script(
@@ -35,7 +35,8 @@ def setup_worker(hostname_worker, script, worker_id, hostname_master,
             '--load-backup', str(load_backup),
             '--n-random-walkers', str(number_of_random_walkers),
             '--backup-size', str(backup_size),
-            '--walking-iterations', str(walking_iterations)
+            '--walking-iterations', str(walking_iterations),
+            '--start-policy', start_policy
         )
 
     return run_ssh_script(
@@ -49,5 +50,6 @@ def setup_worker(hostname_worker, script, worker_id, hostname_master,
         '--load-backup', str(load_backup),
         '--n-random-walkers', str(number_of_random_walkers),
         '--backup-size', str(backup_size),
-        '--walking-iterations', str(walking_iterations)
+        '--walking-iterations', str(walking_iterations),
+        '--start-policy', start_policy
     )
@@ -0,0 +1,93 @@
+import zlib
+import numpy as np
+
+COMPRESSION_LEVEL = 6
+
+
+def zigzag_encode(values: np.ndarray) -> np.ndarray:
+    """
+    Maps signed integers to unsigned integers such that small magnitudes stay small, e.g. 0, -1, 1, -2 -> 0, 1, 2, 3
+
+    :param values: Array of int64
+    :return: Array of uint64
+    """
+
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def zigzag_decode(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.uint64)
+    return ((values >> np.uint64(1)).astype(np.int64)) ^ -((values & np.uint64(1)).astype(np.int64))
+
+
+def encode_varints(values: np.ndarray) -> bytes:
+    """
+    Encodes unsigned integers in 7 bit groups, least significant group first. The high bit of each byte is set if more
+    bytes of the same integer follow
+
+    :param values: Array of uint64
+    :return: Encoded integers
+    """
+
+    values = values.astype(np.uint64)
+    if len(values) == 0:
+        return b''
+
+    number_of_bytes = np.ones(len(values), dtype=np.int64)
+    remainder = values >> np.uint64(7)
+    while remainder.any():
+        number_of_bytes += remainder > 0
+        remainder >>= np.uint64(7)
+
+    positions = np.arange(number_of_bytes.max())
+    groups = ((values[:, None] >> (positions * 7).astype(np.uint64)) & np.uint64(0x7f)).astype(np.uint8)
+    groups[positions < number_of_bytes[:, None] - 1] |= 0x80
+
+    return groups[positions < number_of_bytes[:, None]].tobytes()
+
+
+def decode_varints(data: bytes) -> np.ndarray:
+    """
+    :param data: Integers encoded by `encode_varints`
+    :return: Array of uint64
+    """
+
+    encoded = np.frombuffer(data, dtype=np.uint8)
+    if len(encoded) == 0:
+        return np.empty(0, dtype=np.uint64)
+
+    ends = np.flatnonzero(encoded < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    positions = np.arange(len(encoded)) - np.repeat(starts, ends - starts + 1)
+
+    groups = (encoded & 0x7f).astype(np.uint64) << (positions * 7).astype(np.uint64)
+
+    # The groups of an integer do not overlap, so adding them equals or-ing them
+    return np.add.reduceat(groups, starts)
+
+
+def compress_edges(edges: np.ndarray) -> bytes:
+    """
+    Compresses an edge list by storing the zigzag encoded difference with the previous edge as varints, which is
+    compressed by zlib. Sorted edge lists compress best.
+
+    :param edges: Array of shape (n, 2)
+    :return: Compressed edges
+    """
+
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    differences = np.diff(edges, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+
+    return zlib.compress(encode_varints(zigzag_encode(differences.ravel())), COMPRESSION_LEVEL)
+
+
+def decompress_edges(data: bytes) -> np.ndarray:
+    """
+    :param data: Edges compressed by `compress_edges`
+    :return: Array of shape (n, 2)
+    """
+
+    differences = zigzag_decode(decode_varints(zlib.decompress(data))).reshape(-1, 2)
+
+    return np.cumsum(differences, axis=0)
@@ -0,0 +1,50 @@
+from time import time
+
+from lab.util.argument_parser import get_arg
+from lab.util.graph import CSRGraph
+from lab.util.output import print_error
+from lab.util.validation import assert_file, assert_bool, no_assertion
+
+
+def convert(graph_path: str, output_path: str, bidirectional: bool = True) -> CSRGraph:
+    """
+    Converts an edge file to the binary format
+
+    :param graph_path: Path to the edge file
+    :param output_path: Path to the directory of the binary graph, e.g. graph.csr
+    :param bidirectional: Add the reverse of each edge as well
+    :return: The converted graph
+    """
+
+    graph = CSRGraph.load_from_file(graph_path, bidirectional=bidirectional)
+    graph.save_binary(output_path)
+
+    return graph
+
+
+def main():
+    """
+    Parses arguments to be used for the conversion
+    """
+
+    try:
+        graph_path = get_arg("--graph", assert_file)
+        output_path = get_arg("--output", no_assertion)
+        bidirectional = get_arg("--bidirectional", assert_bool, default='1')
+    except AssertionError as e:
+        print_error(e)
+        print_error(
+            "The converter expects the following arguments:\n"
+            "\t--graph: The path to the edge file to convert\n"
+            "\t--output: The directory to write the binary graph to, e.g. data/graph.csr\n"
+            "\t--bidirectional: Flag to indicate whether the reverse of each edge is added as well"
+        )
+        return
+
+    started_at = time()
+    graph = convert(graph_path, output_path, bidirectional)
+    print(f"Converted {graph} in {time() - started_at:0.5f} seconds")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+import numpy as np
+
+
+class DisjointSet:
+    """ Union-find of integer labels. The labels are mapped to dense indices, their positions among the sorted labels,
+    such that the arrays are sized by the number of labels instead of by the largest label. Edges can be added one at a
+    time, with union by rank and path halving, or as an array, with a vectorized union of all edges at once.
+    """
+
+    def __init__(self, labels=None):
+        self.keys = np.zeros(0, dtype=np.int64)  # Sorted labels, the index of a label is its position
+        self.parent = np.zeros(0, dtype=np.int64)  # Index of the parent of each index
+        self.rank = np.zeros(0, dtype=np.int8)
+
+        if labels is not None:
+            self.add(labels)
+
+    def contains(self, labels) -> np.ndarray:
+        """
+        :param labels: Array of integers
+        :return: Boolean array whether each label is present
+        """
+
+        labels = np.asarray(labels, dtype=np.int64)
+        if len(self.keys) == 0:
+            return np.zeros(labels.shape, dtype=bool)
+
+        positions = np.minimum(np.searchsorted(self.keys, labels), len(self.keys) - 1)
+        return self.keys[positions] == labels
+
+    def index_of(self, labels):
+        """
+        :param labels: Integer or array of integers that are present
+        :return: Index of each label
+        """
+
+        return np.searchsorted(self.keys, labels)
+
+    def add(self, labels):
+        """
+        Adds labels that are not present yet as components of their own. The present labels are re-indexed, so adding
+        many labels at once is much faster than adding them one at a time
+
+        :param labels: Integer or array of integers
+        """
+
+        labels = np.unique(np.asarray(labels, dtype=np.int64))
+        labels = labels[~self.contains(labels)]
+        if len(labels) == 0:
+            return
+
+        keys = np.union1d(self.keys, labels)
+        old_indices = np.searchsorted(keys, self.keys)
+
+        parent = np.arange(len(keys), dtype=np.int64)
+        parent[old_indices] = old_indices[self.parent]
+        rank = np.zeros(len(keys), dtype=np.int8)
+        rank[old_indices] = self.rank
+
+        self.keys, self.parent, self.rank = keys, parent, rank
+
+    def find_index(self, index: int) -> int:
+        """
+        :param index: Index of a label
+        :return: Index of the root of the component of the label
+        """
+
+        parent = self.parent
+        while parent[index] != index:
+            # Path halving
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+
+        return int(index)
+
+    def find(self, label: int) -> int:
+        """
+        :param label: Label that is present
+        :return: Label of the root of the component of the label
+        """
+
+        return int(self.keys[self.find_index(self.index_of(label))])
+
+    def union(self, label_1: int, label_2: int) -> bool:
+        """
+        Adds an edge, the labels are added if they are not present yet
+
+        :return: Boolean whether two components were merged
+        """
+
+        self.add((label_1, label_2))
+        root_1, root_2 = self.find_index(self.index_of(label_1)), self.find_index(self.index_of(label_2))
+        if root_1 == root_2:
+            return False
+
+        if self.rank[root_1] < self.rank[root_2]:
+            root_1, root_2 = root_2, root_1
+
+        self.parent[root_2] = root_1
+        if self.rank[root_1] == self.rank[root_2]:
+            self.rank[root_1] += 1
+
+        return True
+
+    def compress(self):
+        """
+        Points every index directly to its root
+        """
+
+        while True:
+            grandparent = self.parent[self.parent]
+            if np.array_equal(grandparent, self.parent):
+                return
+
+            self.parent = grandparent
+
+    def union_edges(self, edges):
+        """
+        Adds all edges at once. The roots of both ends of each edge are hooked onto the smallest root they are
+        connected to, until the ends of every edge have the same root. Labels are added if they are not present yet
+
+        :param edges: Integer array or list of (label_1, label_2) pairs
+        """
+
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        self.add(edges)
+
+        indices_1, indices_2 = self.index_of(edges[:, 0]), self.index_of(edges[:, 1])
+        while len(indices_1) > 0:
+            self.compress()
+            roots_1, roots_2 = self.parent[indices_1], self.parent[indices_2]
+
+            # Only the edges between different components are left
+            is_between = roots_1 != roots_2
+            indices_1, indices_2 = indices_1[is_between], indices_2[is_between]
+            roots_1, roots_2 = roots_1[is_between], roots_2[is_between]
+
+            # Roots are only hooked onto smaller roots, so no cycles are created
+            np.minimum.at(self.parent, np.maximum(roots_1, roots_2), np.minimum(roots_1, roots_2))
+
+    @property
+    def labels(self) -> np.ndarray:
+        """
+        :return: Sorted labels
+        """
+
+        return self.keys
+
+    def roots(self) -> np.ndarray:
+        """
+        :return: Label of the root of the component of each label, in the order of `labels`
+        """
+
+        self.compress()
+        return self.keys[self.parent]
+
+    @property
+    def n_components(self) -> int:
+        return int(np.count_nonzero(self.parent == np.arange(len(self.parent))))
+
+    def component_sizes(self) -> np.ndarray:
+        """
+        :return: Number of labels per component, in the order of the roots
+        """
+
+        _, sizes = np.unique(self.roots(), return_counts=True)
+        return sizes
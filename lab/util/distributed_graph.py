@@ -1,10 +1,17 @@
-from typing import List, Dict
+from collections.abc import Mapping
+
+import numpy as np
 
 from lab.util import file_io
 from lab.util.meta_data import CombinedMetaData
 
+# Neighbour index of a vertex that belongs to another worker
+FOREIGN = -1
+
 
 class ForeignVertex:
+    __slots__ = ('label',)
+
     def __init__(self, label: int):
         self.label = label
 
@@ -12,36 +19,56 @@ class ForeignVertex:
         return str(self.label)
 
     def __hash__(self):
-        return hash(str(self))
+        return hash(self.label)
 
     def __repr__(self):
         return str(self)
 
 
 class Vertex:
-    def __init__(self, label: int):
+    """ View of a vertex in the arrays of a DistributedGraph, a vertex without graph has no edges
+    """
+
+    __slots__ = ('label', 'graph', 'index')
+
+    def __init__(self, label: int, graph=None, index: int = None):
         self.label = label
-        self.edges: List[Edge] = []
+        self.graph = graph
+        self.index = index
 
     @property
     def degree(self):
-        return len(self.edges)
+        if self.graph is None:
+            return 0
+
+        return int(self.graph.offsets[self.index + 1] - self.graph.offsets[self.index])
+
+    def get_edge(self, i: int):
+        """
+        :param i: Index of the edge, smaller than the degree
+        :return: The i-th edge of the vertex
+        """
+
+        position = int(self.graph.offsets[self.index]) + i
+        return Edge(self, self.graph.get_neighbour(position))
 
-    def add_edge(self, edge):
-        assert isinstance(edge, Edge)
-        self.edges.append(edge)
+    @property
+    def edges(self):
+        return [self.get_edge(i) for i in range(self.degree)]
 
     def __str__(self):
         return str(self.label)
 
     def __hash__(self):
-        return hash(str(self))
+        return hash(self.label)
 
     def __repr__(self):
         return str(self)
 
 
 class Edge:
+    __slots__ = ('from_vertex', 'to_vertex')
+
     def __init__(self, from_vertex: Vertex, to_vertex: Vertex or ForeignVertex):
         self.from_vertex = from_vertex
         self.to_vertex = to_vertex
@@ -53,83 +80,176 @@ class Edge:
         return str(self)
 
 
+class LocalVertices(Mapping):
+    """ Read-only mapping from the label of each vertex of the worker to a view of the vertex
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, vertex_label) -> Vertex:
+        index = self.graph.index_of(vertex_label)
+        if index is None:
+            raise KeyError(vertex_label)
+
+        return Vertex(int(self.graph.labels[index]), self.graph, index)
+
+    def __iter__(self):
+        return iter(self.graph.labels.tolist())
+
+    def __len__(self):
+        return len(self.graph.labels)
+
+
 class DistributedGraph:
+    """ The edges of the vertices of a worker in compressed sparse row form: the neighbours of the vertex with index i
+    are `neighbours[offsets[i]:offsets[i + 1]]`, in the order in which the edges were added. `neighbour_indices` holds
+    the index of each neighbour of the worker, or FOREIGN for a neighbour of another worker. Vertex, ForeignVertex and
+    Edge objects are only created when they are asked for, views of vertices are invalidated by adding edges.
+    """
+
     def __init__(self, worker_id: int = None, combined_meta_data: CombinedMetaData = None, data: str = None, distributed: bool = True):
-        self.vertices: Dict[int, Vertex] = {}
-        self.foreign_vertices: Dict[int, ForeignVertex] = {}
         self.worker_id = worker_id
         self.combined_meta_data = combined_meta_data
         self.distributed = distributed
 
+        self.labels = np.zeros(0, dtype=np.int64)  # Sorted labels of the vertices of the worker
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.neighbours = np.zeros(0, dtype=np.int64)
+        self.neighbour_indices = np.zeros(0, dtype=np.int64)
+        # Edges that were added since the arrays were built
+        self.edge_blocks = []
+
         if data:
             self.load_from_list(data)
 
+    @property
+    def vertices(self) -> LocalVertices:
+        self.build()
+        return LocalVertices(self)
+
     @property
     def number_of_vertices(self):
-        return len(self.vertices.keys())
+        self.build()
+        return len(self.labels)
 
     @property
     def number_of_edges(self):
-        return sum([vertex.degree for vertex in self.vertices.values()])
+        self.build()
+        return len(self.neighbours)
 
     def has_vertex(self, vertex_label):
-        return self.combined_meta_data[self.worker_id].has_vertex(vertex_label)
+        return not self.distributed or self.combined_meta_data[self.worker_id].has_vertex(vertex_label)
+
+    def has_vertices(self, vertex_labels: np.ndarray) -> np.ndarray:
+        if not self.distributed:
+            return np.ones(len(vertex_labels), dtype=bool)
 
-    def add_vertex(self, vertex_label) -> Vertex:
-        vertex = Vertex(vertex_label)
-        self.vertices[vertex_label] = vertex
+        meta_data = self.combined_meta_data[self.worker_id]
+        return (meta_data.min_vertex <= vertex_labels) & (vertex_labels <= meta_data.max_vertex)
 
-        return vertex
+    def index_of(self, vertex_label) -> int or None:
+        self.build()
 
-    def add_foreign_vertex(self, vertex_label) -> ForeignVertex:
-        vertex = ForeignVertex(vertex_label)
-        self.foreign_vertices[vertex_label] = vertex
+        index = int(np.searchsorted(self.labels, vertex_label))
+        if index < len(self.labels) and self.labels[index] == vertex_label:
+            return index
 
-        return vertex
+        return None
 
     def get_vertex(self, vertex_label: int):
-        if not self.distributed or self.has_vertex(vertex_label):
-            try:
-                return self.vertices[vertex_label]
-            except KeyError:
-                return self.add_vertex(vertex_label)
-        else:
-            try:
-                return self.foreign_vertices[vertex_label]
-            except KeyError:
-                return self.add_foreign_vertex(vertex_label)
+        if not self.has_vertex(vertex_label):
+            return ForeignVertex(vertex_label)
 
-    def load_from_list(self, data):
-        for line in data:
-            vertex1_label, vertex2_label = file_io.parse_to_edge(line)
+        index = self.index_of(vertex_label)
+        if index is None:
+            # A vertex of the worker without edges
+            return Vertex(vertex_label)
 
-            vertex1 = self.get_vertex(vertex1_label)
-            vertex2 = self.get_vertex(vertex2_label)
+        return Vertex(vertex_label, self, index)
 
-            vertex1.add_edge(Edge(vertex1, vertex2))
+    def get_neighbour(self, position: int):
+        """
+        :param position: Position in the neighbours
+        :return: View of the neighbour
+        """
 
-    def load_from_file(self, filename='graph.txt'):
-        with open(filename) as file:
-            for line in file:
-                vertex1_label, vertex2_label = file_io.parse_to_edge(line)
+        index = int(self.neighbour_indices[position])
+        if index == FOREIGN:
+            return ForeignVertex(int(self.neighbours[position]))
+
+        return Vertex(int(self.labels[index]), self, index)
+
+    def get_edge_array(self) -> np.ndarray:
+        """
+        :return: Array of shape (number of edges, 2) with the edges, grouped by their start vertex
+        """
 
-                vertex1 = self.get_vertex(vertex1_label)
-                vertex2 = self.get_vertex(vertex2_label)
+        self.build()
+        return np.column_stack((np.repeat(self.labels, np.diff(self.offsets)), self.neighbours))
 
-                vertex1.add_edge(Edge(vertex1, vertex2))
-        file.close()
+    def add_edges(self, edges):
+        self.edge_blocks.append(np.asarray(edges, dtype=np.int64).reshape(-1, 2))
 
-    def write_to_file(self, path):
-        edges = []
-        for vertex in self.vertices.values():
-            for edge in vertex.edges:
-                edges.append(str(edge) + "\n")
+    def build(self):
+        """
+        Builds the arrays from the edges that were added since they were built last
+        """
 
-        file_io.write_to_file(path, edges)
-        file_io.sort_file(path)
+        if len(self.edge_blocks) == 0:
+            return
+
+        edge_blocks, self.edge_blocks = self.edge_blocks, []
+        edges = np.concatenate([self.get_edge_array()] + edge_blocks)
+        start_vertices, end_vertices = edges[:, 0], edges[:, 1]
+        is_local = self.has_vertices(end_vertices)
+
+        self.labels = np.unique(np.concatenate((start_vertices, end_vertices[is_local])))
+        start_indices = np.searchsorted(self.labels, start_vertices)
+
+        # A stable sort keeps the edges of each vertex in the order in which they were added
+        order = np.argsort(start_indices, kind='stable')
+        self.offsets = np.zeros(len(self.labels) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(start_indices, minlength=len(self.labels)), out=self.offsets[1:])
+
+        self.neighbours = end_vertices[order]
+        self.neighbour_indices = np.where(is_local[order], np.searchsorted(self.labels, self.neighbours), FOREIGN)
+
+    def load_from_list(self, data):
+        self.add_edges(file_io.parse_edges(data))
+
+    def load_from_file(self, filename='graph.txt'):
+        for edges in file_io.read_edges(filename):
+            self.add_edges(edges)
+
+    def get_edge_blocks(self, block_size: int = file_io.SORT_RUN_SIZE):
+        """
+        Generator of the edges in blocks of at most `block_size` edges, grouped by their start vertex
+        """
+
+        self.build()
+        start_vertices = np.repeat(np.arange(len(self.labels)), np.diff(self.offsets))
+        for start in range(0, len(self.neighbours), block_size):
+            yield np.column_stack((self.labels[start_vertices[start:start + block_size]],
+                                   self.neighbours[start:start + block_size]))
+
+    def write_to_file(self, path, sort: bool = True):
+        """
+        :param path: Path to the edge file
+        :param sort: Whether the edges are sorted by their start and then end vertex, otherwise they are only grouped
+        by their start vertex
+        """
+
+        if sort:
+            file_io.write_sorted_edges(path, self.get_edge_blocks())
+            return
+
+        with open(path, 'w') as f:
+            for edges in self.get_edge_blocks():
+                file_io.write_edges(f, edges)
 
     def __str__(self):
-        return f"Graph |V|={len(self.vertices.keys())}, |E|={self.number_of_edges}"
+        return f"Graph |V|={self.number_of_vertices}, |E|={self.number_of_edges}"
 
     def __repr__(self):
         return str(self)
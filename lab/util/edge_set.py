@@ -0,0 +1,157 @@
+import numpy as np
+
+# Number of bits of the end vertex in a packed key, edges are packed while their labels are between 0 and 2 ** KEY_BITS
+KEY_BITS = 32
+
+# Key of an edge with a label that does not fit in a packed key, it sorts by the start and then end vertex as well
+WIDE_KEY_DTYPE = np.dtype([('start', np.int64), ('end', np.int64)])
+
+
+def fits_in_keys(edges: np.ndarray) -> bool:
+    """
+    :param edges: Integer array of shape (number of edges, 2)
+    :return: Boolean whether every edge can be packed into a key
+    """
+
+    return len(edges) == 0 or (edges.min() >= 0 and edges.max() < 2 ** KEY_BITS)
+
+
+def to_keys(edges) -> np.ndarray:
+    """
+    :param edges: Integer array or list of (vertex1, vertex2) pairs
+    :return: Key of each edge, with the start vertex in the high and the end vertex in the low bits
+    """
+
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    if not fits_in_keys(edges):
+        raise ValueError(f'Vertex labels have to be between 0 and {2 ** KEY_BITS}')
+
+    return (edges[:, 0].astype(np.uint64) << np.uint64(KEY_BITS)) | edges[:, 1].astype(np.uint64)
+
+
+def to_wide_keys(edges) -> np.ndarray:
+    """
+    :param edges: Integer array or list of (vertex1, vertex2) pairs, with any 64-bit labels
+    :return: Key of each edge, of type `WIDE_KEY_DTYPE`
+    """
+
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    keys = np.empty(len(edges), dtype=WIDE_KEY_DTYPE)
+    keys['start'], keys['end'] = edges[:, 0], edges[:, 1]
+
+    return keys
+
+
+def to_edges(keys: np.ndarray) -> np.ndarray:
+    """
+    :param keys: Packed or wide keys of edges
+    :return: Array of shape (number of edges, 2)
+    """
+
+    if keys.dtype == WIDE_KEY_DTYPE:
+        return np.column_stack((keys['start'], keys['end'])).reshape(-1, 2)
+
+    return np.column_stack((keys >> np.uint64(KEY_BITS), keys & np.uint64(2 ** KEY_BITS - 1))).astype(np.int64)
+
+
+class EdgeSet:
+    """ Set of edges, stored as packed 64-bit keys in sorted runs. A run is merged with the previous run once that run
+    is not larger, so there are at most logarithmically many runs and adding a key takes amortized logarithmic time.
+    Once an edge with a label that does not fit in a packed key is added, all keys are converted to wide keys.
+    """
+
+    def __init__(self, edges=None):
+        self.runs = []
+        self.size = 0
+        self.is_wide = False
+
+        if edges is not None:
+            self.add_edges(edges)
+
+    def contains_keys(self, keys: np.ndarray) -> np.ndarray:
+        is_present = np.zeros(len(keys), dtype=bool)
+        for run in self.runs:
+            indices = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+            is_present |= run[indices] == keys
+
+        return is_present
+
+    def contains(self, edges) -> np.ndarray:
+        """
+        :param edges: Integer array or list of (vertex1, vertex2) pairs
+        :return: Boolean per edge whether it is in the set
+        """
+
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        if self.is_wide:
+            return self.contains_keys(to_wide_keys(edges))
+
+        # Edges that do not fit in a packed key cannot be in a set of packed keys
+        fits = (edges >= 0).all(axis=1) & (edges < 2 ** KEY_BITS).all(axis=1)
+        is_present = np.zeros(len(edges), dtype=bool)
+        is_present[fits] = self.contains_keys(to_keys(edges[fits]))
+
+        return is_present
+
+    def add_edges(self, edges) -> np.ndarray:
+        """
+        :param edges: Integer array or list of (vertex1, vertex2) pairs
+        :return: Boolean per edge whether it was added, i.e. it was not in the set nor earlier in the edges
+        """
+
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        if not self.is_wide and not fits_in_keys(edges):
+            self.widen()
+
+        keys = to_wide_keys(edges) if self.is_wide else to_keys(edges)
+        is_new = np.zeros(len(keys), dtype=bool)
+
+        unique_keys, first_indices = np.unique(keys, return_index=True)
+        is_unique_new = ~self.contains_keys(unique_keys)
+        is_new[first_indices[is_unique_new]] = True
+
+        self.add_run(unique_keys[is_unique_new])
+
+        return is_new
+
+    def widen(self):
+        """
+        Converts the packed keys to wide keys, which keeps the runs sorted
+        """
+
+        self.runs = [to_wide_keys(to_edges(run)) for run in self.runs]
+        self.is_wide = True
+
+    def add_run(self, run: np.ndarray):
+        if len(run) == 0:
+            return
+
+        self.size += len(run)
+        self.runs.append(run)
+
+        while len(self.runs) > 1 and len(self.runs[-2]) <= len(self.runs[-1]):
+            last = self.runs.pop()
+            self.runs[-1] = np.sort(np.concatenate((self.runs[-1], last)))
+
+    def keys(self) -> np.ndarray:
+        """
+        :return: Sorted keys of all edges
+        """
+
+        if len(self.runs) == 0:
+            return np.zeros(0, dtype=WIDE_KEY_DTYPE if self.is_wide else np.uint64)
+
+        return np.sort(np.concatenate(self.runs))
+
+    def edges(self) -> np.ndarray:
+        """
+        :return: Array of shape (number of edges, 2) with all edges, sorted by their start and then end vertex
+        """
+
+        return to_edges(self.keys())
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, edge):
+        return bool(self.contains([edge])[0])
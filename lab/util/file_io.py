@@ -1,7 +1,24 @@
+import io
+import os
 import subprocess
-from typing import TextIO
+import tempfile
+import warnings
+from typing import TextIO, Iterable
 from math import floor
-import pandas as pd
+import numpy as np
+
+# Number of characters of an edge file that are parsed at once, such that large files are parsed in bounded memory
+PARSE_BLOCK_SIZE = 2 ** 24
+# Lines that start with this character are comments, e.g. the header of SNAP files
+COMMENT = '#'
+# Number of edges that are sorted in memory at once, larger edge files are sorted in runs that are merged
+SORT_RUN_SIZE = 2 ** 22
+# Number of edges of each run that are read at once while merging
+MERGE_BLOCK_SIZE = 2 ** 16
+# Number of bytes that are read at once while searching the last edge of a file from its end
+LAST_LINE_BLOCK_SIZE = 2 ** 12
+# An edge as a single value that is ordered by the start and then end vertex, to search edges in sorted runs
+EDGE_DTYPE = np.dtype([('start', np.int64), ('end', np.int64)])
 
 
 def get_number_of_lines(path: str) -> int:
@@ -31,30 +48,73 @@ def read_n_lines(f: TextIO, n: int) -> [str]:
     return [next(f) for _ in range(n)]
 
 
-def get_first_line(path: str):
-    return subprocess.check_output(['head', '-1', path]).decode()
+def is_edge(line: str) -> bool:
+    """
+    :param line: Line of an edge file
+    :return: Boolean whether the line contains an edge, instead of being empty or a comment
+    """
+
+    fields = line.split()
+
+    return len(fields) > 0 and not fields[0].startswith(COMMENT)
 
 
-def get_last_line(path: str):
-    return subprocess.check_output(['tail', '-1', path]).decode()
+def get_first_line(path: str) -> str:
+    """
+    :param path: Path to the edge file
+    :return: First line that contains an edge, empty if there is none
+    """
+
+    with open(path, 'r') as f:
+        for line in f:
+            if is_edge(line):
+                return line
+
+    return ''
+
+
+def get_last_line(path: str) -> str:
+    """
+    Reads the edge file backwards from its end, such that only the last lines are read
+
+    :param path: Path to the edge file
+    :return: Last line that contains an edge, empty if there is none
+    """
+
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        rest = b''
+
+        while end > 0:
+            start = max(end - LAST_LINE_BLOCK_SIZE, 0)
+            f.seek(start)
+            lines = (f.read(end - start) + rest).split(b'\n')
+
+            if start > 0:
+                # The first line continues in the previous block
+                rest = lines.pop(0)
+
+            for line in reversed(lines):
+                if is_edge(line.decode()):
+                    return line.decode() + '\n'
+
+            end = start
+
+    return ''
 
 
 def get_start_vertex(edge: str) -> int or None:
     """
     Retrieves the start vertex of an edge
 
-    :param edge: Edge to get the start vertex from. Has the form "start_vertex end_vertex"
-    :return: Start vertex
+    :param edge: Edge to get the start vertex from. Has the form "start_vertex end_vertex", separated by any whitespace
+    :return: Start vertex, None if the line is empty or a comment
     """
 
-    try:
-        return int(edge.split(" ")[0])
-    except IndexError:
+    if not is_edge(edge):
         return None
 
-
-def reverse_edge(edge: str):
-    return " ".join(reversed(edge.rstrip().split(" "))) + "\n"
+    return int(edge.split()[0])
 
 
 def read_rest_of_edges(f: TextIO, start_vertex: str):
@@ -81,38 +141,40 @@ def read_rest_of_edges(f: TextIO, start_vertex: str):
 
 
 def count_vertices(path: str):
-    counts = {}
+    """
+    :param path: Path to an edge file
+    :return: Number of edges per vertex label
+    """
 
-    f = open(path, "r")
-    for line in f:
-        vertex1, vertex2 = parse_to_edge(line)
-
-        try:
-            counts[vertex1] += 1
-        except KeyError:
-            counts[vertex1] = 1
-
-        try:
-            counts[vertex2] += 1
-        except KeyError:
-            counts[vertex2] = 1
-    f.close()
+    labels, counts = [], []
+    for edges in read_edges(path):
+        block_labels, block_counts = np.unique(edges, return_counts=True)
+        labels.append(block_labels)
+        counts.append(block_counts)
+
+    if len(labels) == 0:
+        return {}
 
-    return counts
+    # Vertices that occur in multiple blocks are summed
+    labels, indices = np.unique(np.concatenate(labels), return_inverse=True)
+    counts = np.bincount(indices, weights=np.concatenate(counts)).astype(np.int64)
+
+    return dict(zip(labels.tolist(), counts.tolist()))
 
 
 def read_in_chunks(f: TextIO, n_workers: int) -> [str]:
     """
-    Generator that divides a file into n_workers parts, where each part contains all the edges from each start vertex
+    Generator that divides a file into n_workers parts, where each part contains all the edges from each start vertex.
+    Empty lines and comments are skipped
 
     :param f: File to read from
     :param n_workers: Number of parts to divide the files in
     :return: List of lines
     """
     vertex_counts = count_vertices(f.name)
-    number_of_lines = get_number_of_lines(f.name)
 
-    chunk_size = int(floor(number_of_lines * 2 / n_workers))
+    # Each edge is counted for both of its vertices
+    chunk_size = int(floor(sum(vertex_counts.values()) / n_workers))
 
     edges = []
     lines_read = 0
@@ -131,12 +193,13 @@ def read_in_chunks(f: TextIO, n_workers: int) -> [str]:
                 yield edges
                 return
 
-            edges.append(edge)
-
             start_vertex = get_start_vertex(edge)
+            if start_vertex is None:
+                continue
 
             if start_vertex != last_start_vertex:
                 if i < n_workers - 1 and number_of_vertices + vertex_counts[start_vertex] >= chunk_size:
+                    # The edge starts the next part
                     yield edges
                     edges = [edge]
                     break
@@ -144,18 +207,9 @@ def read_in_chunks(f: TextIO, n_workers: int) -> [str]:
                 number_of_vertices += vertex_counts[start_vertex]
                 last_start_vertex = start_vertex
 
-            lines_read += 1
-
-
-def read_as_reversed_edges(f: TextIO):
-    for edge in f:
-        yield reverse_edge(edge)
-
+            edges.append(edge)
 
-def append_edge(path: str, edge: str):
-    f = open(path, "a")
-    f.write(edge)
-    f.close()
+            lines_read += 1
 
 
 def read_file(path):
@@ -167,18 +221,73 @@ def read_file(path):
 
 
 def parse_to_edge(line):
-    edge = line.rstrip().split(" ")
+    edge = line.split()
 
     return [int(edge[0]), int(edge[1])]
 
 
-def to_int_edge_list(data) -> [[int, int]]:
-    edges = []
+def parse_edges(lines: str or [str]) -> np.ndarray:
+    """
+    Parses edges, one per line, of which the two vertices are separated by spaces or tabs. Empty lines, comments and
+    further columns, e.g. weights, are skipped
+
+    :param lines: Text or list of lines
+    :return: Array of shape (number of edges, 2)
+    """
+
+    text = lines if isinstance(lines, str) else '\n'.join(lines)
+
+    with warnings.catch_warnings():
+        # Text without edges is not an error
+        warnings.simplefilter('ignore', UserWarning)
+        edges = np.loadtxt(io.StringIO(text), dtype=np.int64, comments=COMMENT, usecols=(0, 1), ndmin=2)
+
+    return edges.reshape(-1, 2)
+
+
+def read_edges(path: str, block_size: int = PARSE_BLOCK_SIZE):
+    """
+    Generator that parses an edge file in blocks of complete lines
+
+    :param path: Path to the edge file
+    :param block_size: Number of characters per block
+    :return: Arrays of shape (number of edges, 2)
+    """
+
+    rest = ''
+    with open(path, 'r') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+
+            # The last line of the block continues in the next block
+            block = rest + block
+            end = block.rfind('\n') + 1
+            block, rest = block[:end], block[end:]
+
+            if block:
+                yield parse_edges(block)
+
+    if rest:
+        yield parse_edges(rest)
 
-    for line in data:
-        edges.append(parse_to_edge(line))
 
-    return edges
+def load_edges(path: str) -> np.ndarray:
+    """
+    :param path: Path to the edge file
+    :return: Array of shape (number of edges, 2)
+    """
+
+    blocks = list(read_edges(path))
+    if len(blocks) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    return np.concatenate(blocks)
+
+
+def to_int_edge_list(data) -> np.ndarray:
+    return parse_edges(data)
 
 
 def write_to_file(path, data):
@@ -193,8 +302,114 @@ def append_to_file(path, data):
     f.close()
 
 
-def sort_file(path):
-    edges = pd.DataFrame(to_int_edge_list(read_file(path)), columns=['start', 'end'])
-    edges = edges.sort_values(['start', 'end'])
-    edges.to_csv(path, sep=" ", header=False, index=False)
+def write_edges(f: TextIO, edges: np.ndarray):
+    f.writelines([f'{vertex1} {vertex2}\n' for vertex1, vertex2 in edges.tolist()])
+
+
+def sort_edges(edges: np.ndarray) -> np.ndarray:
+    """
+    :param edges: Integer array of shape (number of edges, 2)
+    :return: The edges sorted by their start and then end vertex
+    """
+
+    return edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+
+
+def as_edge_values(edges: np.ndarray) -> np.ndarray:
+    """
+    :param edges: Integer array of shape (number of edges, 2)
+    :return: Array of type `EDGE_DTYPE` with an element per edge
+    """
+
+    return np.ascontiguousarray(edges, dtype=np.int64).view(EDGE_DTYPE).reshape(-1)
+
+
+def merge_runs(f: TextIO, run_paths: [str]):
+    """
+    Merges sorted runs of edges into an edge file, reading a block of each run at a time
+
+    :param f: Edge file
+    :param run_paths: Paths of the runs
+    """
+
+    runs = [np.load(run_path, mmap_mode='r') for run_path in run_paths]
+    positions = [0] * len(runs)
+    blocks = [np.asarray(run[:MERGE_BLOCK_SIZE]) for run in runs]
+
+    while True:
+        # Every edge up to the smallest last edge of the blocks is read, as the runs are sorted
+        is_exhausted = [positions[i] + len(blocks[i]) >= len(runs[i]) for i in range(len(runs))]
+        bounds = [tuple(block[-1]) for block, exhausted in zip(blocks, is_exhausted)
+                  if not exhausted and len(block) > 0]
+        if len(bounds) == 0:
+            write_edges(f, sort_edges(np.concatenate(blocks)))
+            return
+
+        bound = as_edge_values(np.array(min(bounds)))
+        merged = []
+        for i, block in enumerate(blocks):
+            end = int(np.searchsorted(as_edge_values(block), bound, side='right')[0])
+            merged.append(block[:end])
+
+            positions[i] += end
+            blocks[i] = np.concatenate((block[end:], runs[i][positions[i] + len(block) - end:
+                                                             positions[i] + MERGE_BLOCK_SIZE]))
+
+        write_edges(f, sort_edges(np.concatenate(merged)))
+
+
+def write_sorted_edges(path: str, edge_blocks: Iterable[np.ndarray], run_size: int = SORT_RUN_SIZE):
+    """
+    Writes edges sorted by their start and then end vertex in bounded memory. At most `run_size` edges are sorted at
+    once, larger inputs are sorted in runs that are stored next to the edge file and merged afterwards
+
+    :param path: Path to the edge file
+    :param edge_blocks: Arrays of shape (number of edges, 2)
+    :param run_size: Number of edges per run
+    """
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as run_directory:
+        run_paths = []
+        blocks, size = [], 0
+
+        def write_run():
+            run_path = os.path.join(run_directory, f'{len(run_paths)}.npy')
+            np.save(run_path, sort_edges(np.concatenate(blocks)))
+            run_paths.append(run_path)
+
+        for edges in edge_blocks:
+            edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+            for start in range(0, len(edges), run_size):
+                blocks.append(edges[start:start + run_size])
+                size += len(blocks[-1])
+
+                if size >= run_size:
+                    write_run()
+                    blocks, size = [], 0
+
+        if len(run_paths) == 0:
+            # Everything fits in one run, which does not have to be merged
+            with open(path, 'w') as f:
+                write_edges(f, sort_edges(np.concatenate(blocks)) if blocks else np.zeros((0, 2), dtype=np.int64))
+            return
+
+        if size > 0:
+            write_run()
+
+        with open(path, 'w') as f:
+            merge_runs(f, run_paths)
+
+
+def sort_file(path: str, run_size: int = SORT_RUN_SIZE):
+    """
+    Sorts an edge file by the start and then end vertex of the edges, in bounded memory
+
+    :param path: Path to the edge file
+    :param run_size: Number of edges that are sorted in memory at once
+    """
+
+    # The edges are read completely before the file is replaced
+    sorted_path = path + '.sorted'
+    write_sorted_edges(sorted_path, read_edges(path), run_size)
+    os.replace(sorted_path, path)
 
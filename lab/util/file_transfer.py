@@ -1,75 +1,409 @@
-from lab.util import message
-from time import time
+import os
+import struct
+import zlib
+import numpy as np
+from threading import Thread
+from lab.util import message, sockets, file_io
+from lab.util.compression import COMPRESSION_LEVEL, compress_edges, decompress_edges
+from time import time, sleep
 
+# Number of bytes that are read at once when streaming a file
+STREAM_BUFFER_SIZE = 2 ** 20
+# The receiver requests the offset from which the file should be streamed
+STREAM_REQUEST = struct.Struct('!Q')
+# Number of times a receiver reconnects before giving up on a stream
+STREAM_RETRIES = 10
 
-class UnexpectedChunkIndex(Exception):
-    def __init__(self, message, expected_index):
+# Maximum number of unacknowledged chunks
+WINDOW_SIZE = 16
+# Number of received chunks after which the receiver acknowledges
+ACKNOWLEDGE_INTERVAL = WINDOW_SIZE // 2
+# Seconds after which unacknowledged chunks are send again
+RETRANSMISSION_TIMEOUT = 1.0
 
-        # Call the base class constructor with the parameters it needs
-        super(UnexpectedChunkIndex, self).__init__(message)
+# Encodings of the chunks, the sender chooses one per transfer in START_SEND_FILE
+RAW = 0
+ZLIB = 1
+EDGE_LIST = 2  # Delta and varint encoded edges, compressed by zlib
 
-        self.expected_index = expected_index
+
+class StreamFailed(Exception):
+    pass
+
+
+def get_checksum(path: str) -> int:
+    """
+    :param path: Path to the file
+    :return: CRC32 checksum of the content of the file
+    """
+
+    checksum = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(STREAM_BUFFER_SIZE), b''):
+            checksum = zlib.crc32(block, checksum)
+
+    return checksum
+
+
+def receive_exactly(s, size: int) -> bytes:
+    data = b''
+    while len(data) < size:
+        block = s.recv(size - len(data))
+        if not block:
+            raise ConnectionResetError('Connection closed before the request was complete')
+
+        data += block
+
+    return data
+
+
+def encode_chunk(lines: [str], encoding: int) -> bytes:
+    """
+    :param lines: Lines of the chunk, an EDGE_LIST chunk should only contain edges
+    :param encoding: Encoding of the chunk
+    :return: Encoded chunk
+    """
+
+    if encoding == EDGE_LIST:
+        edges = file_io.to_int_edge_list(lines)
+
+        # Only lines that are decoded to the exact same text can be send as edges
+        if len(edges) != len(lines):
+            raise ValueError('Not every line is an edge')
+        for line, (vertex1, vertex2) in zip(lines, edges.tolist()):
+            if line != f'{vertex1} {vertex2}\n':
+                raise ValueError(f'Line is not an edge: {line!r}')
+
+        return compress_edges(edges)
+
+    chunk = ''.join(lines).encode()
+    if encoding == ZLIB:
+        return zlib.compress(chunk, COMPRESSION_LEVEL)
+
+    return chunk
+
+
+def decode_chunk(chunk: bytes, encoding: int) -> [str]:
+    """
+    :param chunk: Encoded chunk
+    :param encoding: Encoding of the chunk
+    :return: Lines of the chunk
+    """
+
+    if encoding == EDGE_LIST:
+        return [f'{vertex1} {vertex2}\n' for vertex1, vertex2 in decompress_edges(chunk).tolist()]
+
+    if encoding == ZLIB:
+        chunk = zlib.decompress(chunk)
+
+    return [line + '\n' for line in chunk.decode().rstrip().split('\n')]
 
 
 class FileReceiver:
-    def __init__(self, expected_number_of_chunks: int):
-        self.file = []
+    def __init__(self, expected_number_of_chunks: int, encoding: int = RAW):
+        self.encoding = encoding
+        self.chunks = {}  # {index: [str]}
+        self.last_index = -1
         self.expected_number_of_chunks = expected_number_of_chunks
-        self.expected_chunk_index = 0
         self.started_at = time()
+        self._file = None
 
     @property
     def received_complete_file(self):
-        return self.expected_chunk_index >= self.expected_number_of_chunks
+        return len(self.chunks) >= self.expected_number_of_chunks
 
-    def receive_chunk(self, index: int, chunk: str):
-        if index != self.expected_chunk_index:
-            raise UnexpectedChunkIndex(f'Unexpected chunk index: {index}, expected {self.expected_chunk_index}', self.expected_chunk_index)
+    @property
+    def file(self) -> [str]:
+        """
+        :return: Lines of the received chunks, in order
+        """
 
-        self.file += [line + '\n' for line in chunk.rstrip().split('\n')]
-        self.expected_chunk_index += 1
+        if self._file is None or len(self.chunks) < self.expected_number_of_chunks:
+            self._file = [line for index in sorted(self.chunks.keys()) for line in self.chunks[index]]
 
-    def handle_end_send_file(self):
-        if not self.received_complete_file:
-            raise UnexpectedChunkIndex('Missing chunk(s) at end send file', self.expected_chunk_index)
+        return self._file
+
+    def receive_chunk(self, index: int, chunk: bytes) -> bool:
+        """
+        Buffers a chunk, chunks may arrive in any order and more than once
+
+        :param index: Index of the chunk
+        :param chunk: Content of the chunk
+        :return: Boolean whether the sender should be acknowledged
+        """
+
+        if index in self.chunks:
+            # The sender retransmitted, so it missed an acknowledgement
+            return True
+
+        fills_gap = index < self.last_index
+        self.last_index = max(self.last_index, index)
+        self.chunks[index] = decode_chunk(chunk, self.encoding)
+
+        return fills_gap or len(self.chunks) % ACKNOWLEDGE_INTERVAL == 0 or self.received_complete_file
+
+    def get_received_ranges(self) -> [(int, int)]:
+        """
+        :return: List of [start, end) ranges of the indices of the received chunks
+        """
+
+        ranges = []
+        for index in sorted(self.chunks.keys()):
+            if len(ranges) > 0 and ranges[-1][1] == index:
+                ranges[-1][1] = index + 1
+            else:
+                ranges.append([index, index + 1])
+
+        return [(start, end) for start, end in ranges]
 
 
 class FileSender:
-    def __init__(self, worker_id: int, file_type: int, data: list):
-        self.messages = self.create_messages(worker_id, data, file_type)
-        self.target_received_file = False
+    """ Sends chunks within a sliding window. Chunks are only retransmitted
+    when the receiver acknowledged later chunks, or when no acknowledgement
+    arrived within RETRANSMISSION_TIMEOUT.
+    """
+
+    def __init__(self, worker_id: int, file_type: int, data: list, chunk_size: int = message.CHUNK_SIZE,
+                 window_size: int = WINDOW_SIZE, encoding: int = EDGE_LIST):
+        self.worker_id = worker_id
+        self.file_type = file_type
+        self.chunk_size = chunk_size
+        self.window_size = window_size
+        self.encoding = encoding
+
+        try:
+            self.messages = self.create_messages(worker_id, data, file_type)
+        except (ValueError, IndexError):
+            # Not an edge list
+            self.encoding = ZLIB
+            self.messages = self.create_messages(worker_id, data, file_type)
+
+        self.acknowledged = [False] * len(self.messages)
+        self.first_unacknowledged_index = 0
         self.index = 0
+        self.retransmissions = set()
+        self.end_send_file_at = None
+        self.target_received_file = False
         self.started_at = time()
+        self.acknowledged_at = time()
 
     @property
     def complete_file_send(self):
-        return self.index >= len(self.messages)
+        return self.index >= len(self.messages) and len(self.retransmissions) == 0
 
-    @staticmethod
-    def get_file_chunk(worker_id, file_type, index, data: list):
-        chunk = ''
-        lines = 0
+    def get_file_chunk(self, data: list, start: int):
+        """
+        Collects lines until the chunk would exceed `self.chunk_size` characters, a chunk contains at least one line
 
-        for line in data:
-            if len(message.write_file_chunk(worker_id, file_type, index, chunk + line)) >= message.MAX_MESSAGE_SIZE:
-                break
+        :param data: Lines to send
+        :param start: Index of the first line of the chunk
+        :return: Lines of the chunk
+        """
 
-            chunk += line
-            lines += 1
+        size = 0
+        end = start
 
-        return chunk, lines
+        while end < len(data) and (end == start or size + len(data[end]) <= self.chunk_size):
+            size += len(data[end])
+            end += 1
+
+        return data[start:end]
 
     def create_messages(self, worker_id: int, data: list, file_type: int):
         messages = []
-        while len(data) > 0:
-            chunk, lines_in_chunk = self.get_file_chunk(worker_id, file_type, len(messages), data)
-            del data[:lines_in_chunk]
-            messages.append(message.write_file_chunk(worker_id, file_type, len(messages), chunk))
+        start = 0
+        while start < len(data):
+            lines = self.get_file_chunk(data, start)
+            start += len(lines)
+            messages.append(message.write_file_chunk(
+                worker_id, file_type, len(messages), encode_chunk(lines, self.encoding)))
+
+        return messages
+
+    def handle_acknowledgement(self, ranges: [(int, int)]):
+        """
+        Marks the acknowledged chunks, unacknowledged chunks before the last acknowledged chunk are retransmitted
+
+        :param ranges: List of [start, end) ranges of the indices of the received chunks
+        """
+
+        for start, end in ranges:
+            for index in range(start, end):
+                self.acknowledged[index] = True
+
+        while self.first_unacknowledged_index < len(self.messages) and \
+                self.acknowledged[self.first_unacknowledged_index]:
+            self.first_unacknowledged_index += 1
+
+        if self.end_send_file_at is not None:
+            # Every chunk has been send before END_SEND_FILE, so the receiver misses all unacknowledged chunks
+            last_acknowledged_index = self.index
+        elif len(ranges) > 0:
+            last_acknowledged_index = ranges[-1][1]
+        else:
+            last_acknowledged_index = 0
+
+        self.retransmissions = set([
+            index for index in range(self.first_unacknowledged_index, last_acknowledged_index)
+            if not self.acknowledged[index]
+        ])
+
+        self.acknowledged_at = time()
+        self.end_send_file_at = None
+
+    def get_messages_to_send(self) -> [bytes]:
+        """
+        :return: Retransmissions, followed by the new chunks that fit in the window and END_SEND_FILE once every chunk
+                 has been send
+        """
+
+        if time() - self.acknowledged_at > RETRANSMISSION_TIMEOUT:
+            self.retransmissions = set([
+                index for index in range(self.first_unacknowledged_index, self.index) if not self.acknowledged[index]
+            ])
+            self.acknowledged_at = time()
+
+        messages = [self.messages[index] for index in sorted(self.retransmissions)]
+        self.retransmissions = set()
+
+        while self.index < len(self.messages) and self.index < self.first_unacknowledged_index + self.window_size:
+            messages.append(self.messages[self.index])
+            self.index += 1
+
+        if self.index >= len(self.messages) and not self.target_received_file and \
+                (self.end_send_file_at is None or time() - self.end_send_file_at > RETRANSMISSION_TIMEOUT):
+            messages.append(message.write_end_send_file(self.worker_id, self.file_type))
+            self.end_send_file_at = time()
 
         return messages
 
-    def get_next_message(self):
-        next_message = self.messages[self.index]
-        self.index += 1
 
-        return next_message
+class FileStreamServer(Thread):
+    """ Serves a single file over dedicated TCP connections. Each connection
+    requests an offset, after which the rest of the file is send using
+    socket.sendfile, such that an interrupted transfer can be resumed.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(daemon=True)
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.checksum = get_checksum(path)
+        self.target_received_file = False
+        self.started_at = time()
+        self.stopped = False
+
+        self.socket = sockets.bind("", 0)
+        self.hostname = sockets.get_hostname()
+        self.port = sockets.get_port(self.socket)
+
+    def run(self):
+        while True:
+            connection, addr = self.socket.accept()
+
+            if self.stopped:
+                connection.close()
+                break
+
+            try:
+                self.serve(connection)
+            except OSError:
+                # The receiver reconnects to resume the transfer
+                pass
+            finally:
+                connection.close()
+
+        self.socket.close()
+
+    def serve(self, connection):
+        offset, = STREAM_REQUEST.unpack(receive_exactly(connection, STREAM_REQUEST.size))
+
+        with open(self.path, 'rb') as f:
+            connection.sendfile(f, offset)
+
+    def terminate(self):
+        self.stopped = True
+
+        # Wake up the accepting thread
+        sockets.connect("localhost", self.port).close()
+        self.join()
+
+
+class StreamReceiver:
+    def __init__(self, host: str, port: int, size: int, checksum: int, path: str):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.checksum = checksum
+        self.path = path
+        self.offset = 0
+        self.received_checksum = 0
+        self.started_at = time()
+        self._file = None
+
+    @property
+    def received_complete_file(self):
+        return self.offset >= self.size and self.received_checksum == self.checksum
+
+    @property
+    def file(self) -> [str]:
+        """
+        :return: Lines of the received file, which is removed once it is read
+        """
+
+        if self._file is None:
+            with open(self.path, 'r') as f:
+                self._file = f.readlines()
+
+            self.remove()
+
+        return self._file
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def receive(self):
+        """
+        Streams the file to `self.path`, a broken connection is resumed from the last received byte and a corrupt file
+        is received once more from the start
+        """
+
+        for attempt in range(2):
+            self.receive_from_offset()
+
+            if self.received_complete_file:
+                return
+
+            self.offset = 0
+            self.received_checksum = 0
+
+        raise StreamFailed(f'Checksum mismatch for {self.path}')
+
+    def receive_from_offset(self):
+        with open(self.path, 'wb') as f:
+            for attempt in range(STREAM_RETRIES):
+                try:
+                    s = sockets.connect(self.host, self.port)
+                    try:
+                        s.sendall(STREAM_REQUEST.pack(self.offset))
+
+                        while self.offset < self.size:
+                            block = s.recv(STREAM_BUFFER_SIZE)
+                            if not block:
+                                break
+
+                            f.write(block)
+                            self.received_checksum = zlib.crc32(block, self.received_checksum)
+                            self.offset += len(block)
+                    finally:
+                        s.close()
+                except OSError:
+                    sleep(0.01 * attempt)
+
+                if self.offset >= self.size:
+                    return
+
+        raise StreamFailed(f'Failed to receive {self.path} after {STREAM_RETRIES} attempts')
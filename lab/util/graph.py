@@ -1,4 +1,16 @@
-import pickle
+import json
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+from lab.util import file_io
+from lab.util.disjoint_set import DisjointSet
+
+# A graph in the binary format is a directory with a header and an .npy file per array, which can be memory mapped
+BINARY_HEADER_FILE = 'header.json'
+BINARY_FORMAT_VERSION = 1
+BINARY_ARRAYS = ('labels', 'offsets', 'neighbours')
 
 
 class Vertex(int):
@@ -76,17 +88,18 @@ class Graph:
         print("loading {} edges...".format(number_of_edges))
         for edge in edgeSet:
             v_1, v_2 = edge
-            if not v_1 in self.vertices:
-                vertex_1 = self.addVertex(v_1)
-            if not v_2 in self.vertices:
-                vertex_2 = self.addVertex(v_2)
+            if v_1 not in self.vertices_dict:
+                self.addVertex(v_1)
+            if v_2 not in self.vertices_dict:
+                self.addVertex(v_2)
             vertex_1 = self.vertices_dict[v_1]
             vertex_2 = self.vertices_dict[v_2]
             if ignore_duplicates:
                 try:
                     self.addEdge(vertex_1, vertex_2, bidirectional)
                 except ValueError:
-                    return
+                    # Skip the duplicate, the other edges are still added
+                    continue
 
             else:
                 self.addEdge(vertex_1, vertex_2,
@@ -94,9 +107,9 @@ class Graph:
 
     def addEdge(self, vertex_1: Vertex, vertex_2: Vertex, bidirectional=True,
                 ignore_duplicates=False):
-        if not vertex_1 in self.vertices:
+        if int(vertex_1) not in self.vertices_dict:
             raise ValueError("Vertex %s not known in this graph" % vertex_1)
-        if not vertex_2 in self.vertices:
+        if int(vertex_2) not in self.vertices_dict:
             raise ValueError("Vertex %s not known in this graph" % vertex_2)
         if vertex_2 in self.edges[vertex_1]:
             if not ignore_duplicates:
@@ -112,6 +125,77 @@ class Graph:
             self.edges[vertex_2].append(vertex_1)
         return e
 
+    def add_edge_array(self, edges, bidirectional=True) -> int:
+        """
+        Adds all edges at once, which is much faster than `addEdgeSet` for large graphs. Vertices are added in the
+        order in which they first appear and duplicate edges are skipped, also if they are already in the graph
+
+        :param edges: Integer array or list of (vertex_1, vertex_2) pairs
+        :param bidirectional: Add the reverse of each edge as well, (a, b) and (b, a) are then duplicates
+        :return: Number of edges that were added
+        """
+
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+
+        # Keep the first occurrence of each edge
+        _, first_occurrences = np.unique(np.sort(edges, axis=1) if bidirectional else edges, axis=0,
+                                         return_index=True)
+        edges = edges[np.sort(first_occurrences)]
+
+        if self.n_edges > 0:
+            edges = edges[~self.has_edges(edges)]
+
+        if len(edges) == 0:
+            return 0
+
+        labels, first_occurrences = np.unique(edges, return_index=True)
+        for label in labels[np.argsort(first_occurrences)].tolist():
+            if label not in self.vertices_dict:
+                self.addVertex(label)
+
+        # Directed edges in the order in which addEdge would add them, grouped by their source
+        if bidirectional:
+            directed_edges = np.stack((edges, edges[:, ::-1]), axis=1).reshape(-1, 2)
+            is_added = np.ones(len(directed_edges), dtype=bool)
+            is_added[1::2] = edges[:, 0] != edges[:, 1]
+            directed_edges = directed_edges[is_added]
+        else:
+            directed_edges = edges
+        directed_edges = directed_edges[np.argsort(directed_edges[:, 0], kind='stable')]
+
+        ends = np.flatnonzero(np.diff(directed_edges[:, 0])) + 1
+        starts = np.concatenate(([0], ends))
+        ends = np.append(ends, len(directed_edges))
+
+        neighbours = [self.vertices_dict[label] for label in directed_edges[:, 1].tolist()]
+        for source, start, end in zip(directed_edges[starts, 0].tolist(), starts.tolist(), ends.tolist()):
+            self.edges[self.vertices_dict[source]] += neighbours[start:end]
+
+        return len(edges)
+
+    def has_edge(self, v_1, v_2) -> bool:
+        vertex_1 = self.vertices_dict.get(v_1)
+        return vertex_1 is not None and v_2 in self.edges[vertex_1]
+
+    def has_edges(self, edges: np.ndarray) -> np.ndarray:
+        """
+        :param edges: Integer array of (vertex_1, vertex_2) pairs
+        :return: Boolean array whether each edge is in the graph, as `has_edge`
+        """
+
+        # Only the edges of the sources of the given edges can be equal to them
+        sources = [self.vertices_dict[label] for label in np.unique(edges[:, 0]).tolist() if label in self.vertices_dict]
+        existing_edges = np.column_stack((
+            np.fromiter((source for source in sources for _ in self.edges[source]), dtype=np.int64),
+            np.fromiter((target for source in sources for target in self.edges[source]), dtype=np.int64)
+        ))
+
+        # Equal edges have the same index among the unique edges
+        _, indices = np.unique(np.concatenate((existing_edges, edges)), axis=0, return_inverse=True)
+        indices = indices.reshape(-1)
+
+        return np.isin(indices[len(existing_edges):], indices[:len(existing_edges)])
+
     def addVertex(self, label) -> Vertex:
         v = Vertex(label)
         self.vertices.append(v)
@@ -143,6 +227,7 @@ class Graph:
     def copy(self):
         H = Graph()
         H.vertices = list(self.vertices)
+        H.vertices_dict = dict(self.vertices_dict)
         H.edges = dict((v, list(self.edges[v])) for v in self.edges)
         H.id = int(self.id) + 1
         return H
@@ -168,53 +253,32 @@ class Graph:
         return max([self.degree(vertex) for vertex in self.vertices])
 
     def cleanup(self):
-        for v in self.vertices:
-            if self.degree(v) == 0:
-                self.vertices.remove(v)
-                del self.edges[v]
+        """ Removes the vertices without outgoing edges
+        """
+        isolated_vertices = [v for v in self.vertices if self.degree(v) == 0]
+        self.vertices = [v for v in self.vertices if self.degree(v) > 0]
+        for v in isolated_vertices:
+            del self.edges[v]
+            del self.vertices_dict[v.label]
 
     def componentsWithEdges(self, edgeSet):
-        components = []
-        to_check = list(self.vertices)
-        while len(to_check) > 0:
-            v = to_check.pop()
-            component = [v]
-            added = [v]
-            while len(added) > 0:
-                vertex = added.pop()
-                for edge in edgeSet:
-                    if edge[0] == vertex:
-                        if edge[1] in to_check:
-                            component.append(edge[1])
-                            to_check.remove(edge[1])
-                            added.append(edge[1])
-                    if edge[1] == vertex:
-                        if edge[0] in to_check:
-                            component.append(edge[0])
-                            to_check.remove(edge[0])
-                            added.append(edge[0])
-            components.append(component)
-        return len(components)
+        """ Returns the number of connected components of the vertices of
+        this graph, connected by the edges of edgeSet between them
+        """
+        vertices = np.array(self.vertices, dtype=np.int64)
+        edges = np.asarray(edgeSet, dtype=np.int64).reshape(-1, 2)
+        edges = edges[np.isin(edges, vertices).all(axis=1)]
+
+        components = DisjointSet(vertices)
+        components.union_edges(edges)
+        return components.n_components
 
     def load_from_file(self, filename='graph.txt'):
-        edge_set = []
-        with open(filename) as file:
-            for line in file:
-                v_1, v_2 = line[:-1].split(" ")
-                edge_set.append([int(v_1), int(v_2)])
-        self.addEdgeSet(edge_set)
+        self.add_edge_array(file_io.load_edges(filename))
 
     def load_from_list(self, data):
-        edge_set = []
-        for lines in data:
-            for line in lines.split('\n'):
-                if not line:
-                    continue
-
-                v_1, v_2 = line.split(" ")
-                edge_set.append([int(v_1), int(v_2)])
-
-        self.addEdgeSet(edge_set, ignore_duplicates=True)
+        # An element of data can contain multiple lines
+        self.add_edge_array(file_io.parse_edges(data))
 
     def save_to_file(self, filename="graph.txt", mode='adjacency_list', bidirectional=True):
         if mode == 'adjacency_list':
@@ -229,13 +293,14 @@ class Graph:
             raise NotImplementedError()
         print('done')
 
-    def save_as_pickle(self, filename="graph"):
-        with open('{}.pkl'.format(filename), 'wb') as file:
-            pickle.dump(self, file)
+    def save_as_binary(self, filename="graph"):
+        """ Writes the graph in the binary format of CSRGraph, including its id and parallel edges. The
+        neighbours of each vertex are loaded in sorted order, instead of in the order in which they were added
+        """
+        CSRGraph.from_graph(self).save_binary('{}.csr'.format(filename))
 
-    def load_pickle(self, filename="graph"):
-        with open('{}.pkl'.format(filename), 'rb') as file:
-            return pickle.load(file)
+    def load_binary(self, filename="graph"):
+        return CSRGraph.load_binary('{}.csr'.format(filename)).to_graph()
 
     def __str__(self):
         return "Graph |V|=" + str(len(self.vertices)) + ", |E|=" + str(self.n_edges)
@@ -247,13 +312,309 @@ class Graph:
         return hash(str(self.edges))
 
 
+class CSRAdjacency(Mapping):
+    """ Read-only view of the adjacency of a CSRGraph, such that `edges[vertex]` works as for Graph
+    """
+
+    def __init__(self, graph, offsets: np.ndarray, neighbours: np.ndarray):
+        self.graph = graph
+        self.offsets = offsets
+        self.neighbours = neighbours
+
+    def __getitem__(self, vertex) -> np.ndarray:
+        index = self.graph.index_of(vertex)
+        return self.neighbours[self.offsets[index]:self.offsets[index + 1]]
+
+    def __iter__(self):
+        return iter(self.graph.vertices)
+
+    def __len__(self):
+        return self.graph.n_vertices
+
+
+class CSRGraph:
+    """ Immutable graph in compressed sparse row form: the neighbours of the vertex with index i are
+    `neighbours[offsets[i]:offsets[i + 1]]`, the vertex labels are sorted. Takes two integers per directed edge, instead
+    of the Python objects of Graph, and answers degree queries with NumPy. Parallel edges of edge lists are merged,
+    those of a Graph are kept.
+    """
+
+    def __init__(self, labels: np.ndarray, offsets: np.ndarray, neighbours: np.ndarray):
+        self.labels = labels
+        self.offsets = offsets
+        self.neighbours = neighbours
+        self.inverse_offsets = None
+        self.inverse_neighbours = None
+        self.id = 0
+
+        # Labels without gaps are their own index, after subtracting the first label
+        self.first_label = int(labels[0]) if len(labels) > 0 else 0
+        self.is_contiguous = len(labels) == 0 or int(labels[-1]) - self.first_label + 1 == len(labels)
+
+    @classmethod
+    def from_edges(cls, edges, vertices=None, bidirectional=True):
+        """
+        :param edges: Integer array or list of (vertex_1, vertex_2) pairs
+        :param vertices: Optional labels of vertices, which are added even if they have no edges
+        :param bidirectional: Add the reverse of each edge as well, as Graph.addEdge does
+        :return: CSRGraph
+        """
+
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        sources, targets = edges[:, 0], edges[:, 1]
+
+        if bidirectional:
+            is_loop = sources == targets
+            sources, targets = np.concatenate((sources, targets[~is_loop])), np.concatenate((targets, sources[~is_loop]))
+
+        labels = [sources, targets]
+        if vertices is not None:
+            labels.append(np.asarray(vertices, dtype=np.int64))
+        labels = np.unique(np.concatenate(labels))
+
+        return cls(labels, *cls.compress(labels, np.searchsorted(labels, sources), targets))
+
+    @classmethod
+    def from_graph(cls, graph: Graph):
+        sources = np.fromiter((vertex for vertex, neighbours in graph.edges.items() for _ in neighbours), dtype=np.int64)
+        targets = np.fromiter((neighbour for neighbours in graph.edges.values() for neighbour in neighbours),
+                              dtype=np.int64)
+        labels = np.unique(np.concatenate((sources, targets, np.asarray(graph.vertices, dtype=np.int64))))
+
+        csr_graph = cls(labels, *cls.compress(labels, np.searchsorted(labels, sources), targets,
+                                              merge_parallel_edges=False))
+        csr_graph.id = graph.id
+
+        return csr_graph
+
+    @classmethod
+    def load_from_file(cls, filename='graph.txt', bidirectional=True):
+        return cls.from_edges(file_io.load_edges(filename), bidirectional=bidirectional)
+
+    def save_binary(self, path: str):
+        """
+        Writes the graph in the binary format
+
+        :param path: Path to the directory of the graph, e.g. graph.csr
+        """
+
+        os.makedirs(path, exist_ok=True)
+        for name in BINARY_ARRAYS:
+            np.save(os.path.join(path, f'{name}.npy'), np.ascontiguousarray(getattr(self, name), dtype=np.int64))
+
+        # The header is written last, such that a graph that was not written completely can not be loaded
+        with open(os.path.join(path, BINARY_HEADER_FILE), 'w') as file:
+            json.dump({
+                'version': BINARY_FORMAT_VERSION,
+                'n_vertices': self.n_vertices,
+                'n_edges': self.n_edges,
+                'id': self.id
+            }, file)
+
+    @classmethod
+    def load_binary(cls, path: str, mmap: bool = True):
+        """
+        Opens a graph in the binary format. Memory mapped arrays are only read when they are used, and processes on
+        the same host share their pages
+
+        :param path: Path to the directory of the graph
+        :param mmap: Memory map the arrays instead of reading them
+        :return: CSRGraph
+        """
+
+        with open(os.path.join(path, BINARY_HEADER_FILE)) as file:
+            header = json.load(file)
+
+        if header['version'] != BINARY_FORMAT_VERSION:
+            raise ValueError(f"Unsupported version {header['version']} of binary graph {path}")
+
+        labels, offsets, neighbours = [
+            np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r' if mmap else None) for name in BINARY_ARRAYS
+        ]
+        if len(labels) != header['n_vertices'] or len(offsets) != len(labels) + 1 or \
+                len(neighbours) != header['n_edges']:
+            raise ValueError(f'Binary graph {path} is corrupt')
+
+        graph = cls(labels, offsets, neighbours)
+        graph.id = header.get('id', 0)
+
+        return graph
+
+    def to_graph(self) -> Graph:
+        """
+        :return: Mutable copy of the graph
+        """
+
+        graph = Graph()
+        graph.id = self.id
+        for label in self.labels.tolist():
+            graph.addVertex(label)
+
+        neighbours = [graph.vertices_dict[label] for label in self.neighbours.tolist()]
+        for vertex, start, end in zip(graph.vertices, self.offsets[:-1].tolist(), self.offsets[1:].tolist()):
+            graph.edges[vertex] = neighbours[start:end]
+
+        return graph
+
+    @staticmethod
+    def compress(labels: np.ndarray, source_indices: np.ndarray, targets: np.ndarray,
+                 merge_parallel_edges: bool = True) -> (np.ndarray, np.ndarray):
+        """
+        :param labels: Sorted labels of all vertices
+        :param source_indices: Index of the source of each directed edge
+        :param targets: Label of the target of each directed edge
+        :param merge_parallel_edges: Keep only one of the edges with the same source and target
+        :return: Offsets and neighbours, sorted
+        """
+
+        order = np.lexsort((targets, source_indices))
+        source_indices, targets = source_indices[order], targets[order]
+
+        if merge_parallel_edges:
+            is_first = np.ones(len(targets), dtype=bool)
+            is_first[1:] = (source_indices[1:] != source_indices[:-1]) | (targets[1:] != targets[:-1])
+            source_indices, targets = source_indices[is_first], targets[is_first]
+
+        offsets = np.zeros(len(labels) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source_indices, minlength=len(labels)), out=offsets[1:])
+
+        return offsets, targets
+
+    def index_of(self, vertex) -> int:
+        """
+        :param vertex: Label of a vertex
+        :return: Index of the vertex in the offsets
+        """
+
+        if self.is_contiguous:
+            index = int(vertex) - self.first_label
+            if 0 <= index < len(self.labels):
+                return index
+        else:
+            index = int(np.searchsorted(self.labels, vertex))
+            if index < len(self.labels) and self.labels[index] == vertex:
+                return index
+
+        raise KeyError(vertex)
+
+    @property
+    def vertices(self) -> np.ndarray:
+        return self.labels
+
+    @property
+    def edges(self) -> CSRAdjacency:
+        return CSRAdjacency(self, self.offsets, self.neighbours)
+
+    @property
+    def raw_edges(self):
+        sources = np.repeat(self.labels, np.diff(self.offsets))
+        is_raw = self.neighbours > sources
+        for vertex_1, vertex_2 in zip(sources[is_raw].tolist(), self.neighbours[is_raw].tolist()):
+            yield Edge(vertex_1, vertex_2)
+
+    @property
+    def n_vertices(self):
+        return len(self.labels)
+
+    @property
+    def n_edges(self):
+        return len(self.neighbours)
+
+    @property
+    def inverse_edges(self) -> CSRAdjacency:
+        if self.inverse_offsets is None:
+            self.init_inverse_edges()
+
+        return CSRAdjacency(self, self.inverse_offsets, self.inverse_neighbours)
+
+    def init_inverse_edges(self):
+        sources = np.repeat(self.labels, np.diff(self.offsets))
+        # The inverse of the edges has parallel edges only if the edges have them
+        self.inverse_offsets, self.inverse_neighbours = self.compress(
+            self.labels, np.searchsorted(self.labels, self.neighbours), sources, merge_parallel_edges=False)
+
+    def degree(self, vertex):
+        index = self.index_of(vertex)
+        return int(self.offsets[index + 1] - self.offsets[index])
+
+    def indegree(self, vertex):
+        return len(self.inverse_edges[vertex])
+
+    def outdegree(self, vertex):
+        return self.degree(vertex)
+
+    def bidegree(self, vertex):
+        return self.indegree(vertex) + self.outdegree(vertex)
+
+    def rel_degree(self, vertex):
+        """ Returns the ratio: indegree / outdegree
+        """
+        return self.indegree(vertex) / self.outdegree(vertex)
+
+    def degrees(self) -> np.ndarray:
+        """
+        :return: Degree of each vertex, in the order of `vertices`
+        """
+
+        return np.diff(self.offsets)
+
+    def indegrees(self) -> np.ndarray:
+        if self.inverse_offsets is None:
+            self.init_inverse_edges()
+
+        return np.diff(self.inverse_offsets)
+
+    def outdegrees(self) -> np.ndarray:
+        return self.degrees()
+
+    def bidegrees(self) -> np.ndarray:
+        return self.indegrees() + self.outdegrees()
+
+    def rel_degrees(self) -> np.ndarray:
+        return self.indegrees() / self.outdegrees()
+
+    def max_degree(self):
+        return int(self.degrees().max(initial=0))
+
+    def components(self) -> DisjointSet:
+        """
+        :return: Connected components, ignoring the direction of the edges
+        """
+
+        components = DisjointSet(self.labels)
+        components.union_edges(np.column_stack((np.repeat(self.labels, self.degrees()), self.neighbours)))
+
+        return components
+
+    @property
+    def n_components(self):
+        return self.components().n_components
+
+    def __str__(self):
+        return "Graph |V|=" + str(self.n_vertices) + ", |E|=" + str(self.n_edges)
+
+    def __repr__(self):
+        return str(self)
+
+
+def is_binary_graph(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, BINARY_HEADER_FILE))
+
+
+def load_graph(path: str) -> CSRGraph:
+    """
+    :param path: Path to a graph in the binary format or to an edge file
+    :return: CSRGraph
+    """
+
+    if is_binary_graph(path):
+        return CSRGraph.load_binary(path)
+
+    return CSRGraph.load_from_file(path)
+
+
 def graph_from_file(filename='graph.txt'):
-    edge_set = []
-    with open(filename) as file:
-        for line in file:
-            v_1, v_2 = line[:-1].split(" ")
-            edge_set.append([int(v_1), int(v_2)])
     graph = Graph()
-    graph.addEdgeSet(edge_set)
+    graph.add_edge_array(file_io.load_edges(filename))
 
     return graph
@@ -0,0 +1,144 @@
+import os
+from bisect import bisect_left
+from threading import Lock
+
+# Upper bounds in seconds of the buckets of the latency histograms, from a microsecond to about 17 seconds
+LATENCY_BUCKETS = [1e-6 * 2 ** exponent for exponent in range(25)]
+
+# Stages of handling a received message of which the latency is measured
+DECODE = 'decode'
+DISPATCH = 'dispatch'
+
+
+class Histogram:
+    """ Latency histogram with exponentially growing buckets, such that recording a value takes constant time
+    """
+
+    def __init__(self):
+        # The last bucket counts the values above the largest bound
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def quantile(self, q: float) -> float:
+        """
+        :param q: Quantile between 0 and 1
+        :return: Upper bound of the bucket that contains the quantile
+        """
+
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+
+        return self.maximum
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'total_seconds': self.total,
+            'max_seconds': self.maximum,
+            'p50_seconds': self.quantile(0.5),
+            'p99_seconds': self.quantile(0.99),
+            # Only the buckets that are used, keyed by their upper bound
+            'histogram': {
+                f'{bound:.6g}': count
+                for bound, count in zip(LATENCY_BUCKETS + [float('inf')], self.counts) if count > 0
+            }
+        }
+
+
+class TrafficStatistics:
+    """ Number of messages and bytes, and the latencies of handling messages, per status and peer. A peer is the
+    listen address of the other process, such that its sent and received traffic have the same key. Safe to update
+    from multiple threads
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.sent = {}  # {(status, peer): [messages, bytes]}
+        self.received = {}  # {(status, peer): [messages, bytes]}
+        self.latencies = {}  # {(stage, status, peer): Histogram}
+
+    @staticmethod
+    def add_traffic(traffic: dict, status: int, peer: str, size: int):
+        counters = traffic.get((status, peer))
+        if counters is None:
+            counters = traffic[(status, peer)] = [0, 0]
+
+        counters[0] += 1
+        counters[1] += size
+
+    def record_sent(self, status: int, peer: str, size: int):
+        with self.lock:
+            self.add_traffic(self.sent, status, peer, size)
+
+    def record_received(self, status: int, peer: str, size: int):
+        with self.lock:
+            self.add_traffic(self.received, status, peer, size)
+
+    def record_latency(self, stage: str, status: int, peer: str, seconds: float):
+        with self.lock:
+            histogram = self.latencies.get((stage, status, peer))
+            if histogram is None:
+                histogram = self.latencies[(stage, status, peer)] = Histogram()
+
+            histogram.add(seconds)
+
+    @staticmethod
+    def traffic_to_dict(traffic: dict, status_names: dict) -> dict:
+        traffic_per_status = {}
+        for (status, peer), (messages, size) in sorted(traffic.items(), key=lambda item: str(item[0])):
+            traffic_per_status.setdefault(status_names.get(status, str(status)), {})[peer] = {
+                'messages': messages,
+                'bytes': size
+            }
+
+        return traffic_per_status
+
+    def to_dict(self, status_names: dict = None) -> dict:
+        """
+        :param status_names: Optional names of the status codes, the codes themselves are used otherwise
+        :return: Statistics that can be encoded in JSON
+        """
+
+        status_names = status_names or {}
+
+        with self.lock:
+            latencies = {}
+            for (stage, status, peer), histogram in sorted(self.latencies.items(), key=lambda item: str(item[0])):
+                latencies.setdefault(stage, {}).setdefault(status_names.get(status, str(status)), {})[peer] = \
+                    histogram.to_dict()
+
+            return {
+                'sent': self.traffic_to_dict(self.sent, status_names),
+                'received': self.traffic_to_dict(self.received, status_names),
+                'latencies': latencies
+            }
+
+
+statistics = TrafficStatistics()
+statistics_pid = os.getpid()
+
+
+def get_statistics() -> TrafficStatistics:
+    """
+    :return: Statistics of this process, a forked process starts with empty statistics
+    """
+
+    global statistics, statistics_pid
+
+    if statistics_pid != os.getpid():
+        statistics = TrafficStatistics()
+        statistics_pid = os.getpid()
+
+    return statistics
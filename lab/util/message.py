@@ -1,6 +1,22 @@
+import base64
 import json
-
-MAX_MESSAGE_SIZE = 1024
+import re
+import struct
+import sys
+from array import array
+
+try:
+    # You can select the codec per deployment in lab.util.ssh_connection_info
+    from lab.util.ssh_connection_info import message_codec
+except ImportError:
+    message_codec = 'json'
+
+# Codecs
+JSON = 'json'
+BINARY = 'binary'
+
+# Number of bytes of file content per FILE_CHUNK message
+CHUNK_SIZE = 2 ** 20
 GRAPH = 100
 BACKUP = 101
 
@@ -19,17 +35,188 @@ CONTINUE = 211
 IGNORE = 212
 START_SEND_FILE = 213
 FILE_CHUNK = 214
-MISSING_CHUNK = 215
 RECEIVED_FILE = 216
 END_SEND_FILE = 217
 PROGRESS = 218
+STREAM_FILE = 219
+ACKNOWLEDGE_CHUNKS = 220
+
+# Names of the status codes, e.g. in statistics
+STATUS_NAMES = {
+    ALIVE: 'ALIVE',
+    REGISTER: 'REGISTER',
+    META_DATA: 'META_DATA',
+    DEBUG: 'DEBUG',
+    RANDOM_WALKER: 'RANDOM_WALKER',
+    FINISH_JOB: 'FINISH_JOB',
+    JOB_COMPLETE: 'JOB_COMPLETE',
+    TERMINATE: 'TERMINATE',
+    WORKER_FAILED: 'WORKER_FAILED',
+    RANDOM_WALKER_COUNT: 'RANDOM_WALKER_COUNT',
+    CONTINUE: 'CONTINUE',
+    IGNORE: 'IGNORE',
+    START_SEND_FILE: 'START_SEND_FILE',
+    FILE_CHUNK: 'FILE_CHUNK',
+    RECEIVED_FILE: 'RECEIVED_FILE',
+    END_SEND_FILE: 'END_SEND_FILE',
+    PROGRESS: 'PROGRESS',
+    STREAM_FILE: 'STREAM_FILE',
+    ACKNOWLEDGE_CHUNKS: 'ACKNOWLEDGE_CHUNKS'
+}
+
+# Binary messages start with a byte that can never start a JSON message, followed by the status
+BINARY_MARKER = 0xff
+BINARY_HEADER = struct.Struct('!BH')
+# JSON messages are encoded with the status first
+JSON_STATUS = re.compile(rb'{"status": (\d+)')
+
+# Payload types of binary messages
+TEXT = 'text'
+BYTES = 'bytes'
+INTEGERS = 'integers'
+JSON_BODY = 'json'
+
+# Binary layout of the body per status: the struct format of the fixed size fields, their names and an optional
+# (name, type) of the variable size payload that follows them. A JSON_BODY payload contains the entire body.
+BINARY_BODIES = {
+    ALIVE: ('i', ('worker_id',), None),
+    REGISTER: ('iH', ('worker_id', 'port'), ('host', TEXT)),
+    META_DATA: ('', (), (None, JSON_BODY)),
+    DEBUG: ('i', ('worker_id',), ('debug_message', TEXT)),
+    RANDOM_WALKER: ('', (), ('vertex_labels', INTEGERS)),
+    FINISH_JOB: ('', (), None),
+    JOB_COMPLETE: ('', (), (None, JSON_BODY)),
+    TERMINATE: ('', (), None),
+    WORKER_FAILED: ('', (), None),
+    RANDOM_WALKER_COUNT: ('iq', ('worker_id', 'count'), None),
+    CONTINUE: ('', (), None),
+    START_SEND_FILE: ('iBIB', ('worker_id', 'file_type', 'number_of_chunks', 'encoding'), None),
+    FILE_CHUNK: ('iBI', ('worker_id', 'file_type', 'index'), ('chunk', BYTES)),
+    RECEIVED_FILE: ('iB', ('worker_id', 'file_type'), None),
+    END_SEND_FILE: ('iB', ('worker_id', 'file_type'), None),
+    PROGRESS: ('iq', ('worker_id', 'count'), None),
+    STREAM_FILE: ('iBHQI', ('worker_id', 'file_type', 'port', 'size', 'checksum'), ('host', TEXT)),
+    ACKNOWLEDGE_CHUNKS: ('iB', ('worker_id', 'file_type'), ('ranges', INTEGERS))
+}
+
+BINARY_STRUCTS = {status: struct.Struct('!' + layout[0]) for status, layout in BINARY_BODIES.items()}
+
+
+def pack_integers(values: list) -> bytes:
+    packed = array('q', values)
+    if sys.byteorder == 'little':
+        # Network byte order
+        packed.byteswap()
+
+    return packed.tobytes()
+
+
+def unpack_integers(data: bytes) -> list:
+    unpacked = array('q')
+    unpacked.frombytes(data)
+    if sys.byteorder == 'little':
+        unpacked.byteswap()
+
+    return unpacked.tolist()
+
+
+def write_binary(status: int, body: dict or list) -> bytes:
+    """
+    Encodes a message as a binary header, the fixed size fields of the body and its payload
+
+    :param status: Status code
+    :param body: Body as it would be encoded in JSON
+    :return: Encoded message
+    """
+
+    _, fields, payload = BINARY_BODIES[status]
+    encoded = BINARY_HEADER.pack(BINARY_MARKER, status) + \
+        BINARY_STRUCTS[status].pack(*[body[field] for field in fields])
+
+    if payload is None:
+        return encoded
+
+    name, payload_type = payload
+    if payload_type == JSON_BODY:
+        return encoded + json.dumps(body).encode()
+    if payload_type == INTEGERS:
+        return encoded + pack_integers(body[name])
+    if payload_type == BYTES:
+        return encoded + body[name]
+
+    return encoded + body[name].encode()
+
+
+def read_binary(message: bytes) -> (int, dict or list):
+    """
+    Decodes a binary message
+
+    :param message: Encoded message
+    :return: Status code, body as it would be decoded from JSON
+    """
+
+    _, status = BINARY_HEADER.unpack_from(message)
+    _, fields, payload = BINARY_BODIES[status]
+    offset = BINARY_HEADER.size + BINARY_STRUCTS[status].size
+
+    body = dict(zip(fields, BINARY_STRUCTS[status].unpack_from(message, BINARY_HEADER.size)))
+
+    if payload is not None:
+        name, payload_type = payload
+        if payload_type == JSON_BODY:
+            return status, json.loads(message[offset:].decode())
+        if payload_type == INTEGERS:
+            body[name] = unpack_integers(message[offset:])
+        elif payload_type == BYTES:
+            body[name] = message[offset:]
+        else:
+            body[name] = message[offset:].decode()
+
+    return status, body
+
+
+def encode_bytes(value: bytes) -> str:
+    # JSON has no binary type
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def decode_bytes(value: str or bytes) -> bytes:
+    if isinstance(value, str):
+        return base64.b64decode(value)
+
+    return value
+
+
+def peek_status(message: bytes) -> int or None:
+    """
+    Reads the status of an encoded message without decoding its body
+
+    :param message: Encoded message
+    :return: Status code, None if the message has no status
+    """
+
+    if message[:1] == bytes((BINARY_MARKER,)):
+        return BINARY_HEADER.unpack_from(message)[1]
+
+    match = JSON_STATUS.match(message)
+    if match is None:
+        return None
+
+    return int(match.group(1))
 
 
 def write(status: int, body: dict or list = None):
     if body is None:
         # no content
         body = ''
-    return json.dumps({'status': status, 'body': body}).encode()
+
+    if message_codec == BINARY:
+        return write_binary(status, body)
+
+    return json.dumps({'status': status, 'body': body}, default=encode_bytes).encode()
 
 
 def write_alive(worker_id: int):
@@ -66,20 +253,21 @@ def write_debug(worker_id: int, debug_message: str):
     )
 
 
-def write_random_walker(vertex_label: int):
+def write_random_walker(vertex_labels: list):
     return write(
         status=RANDOM_WALKER,
         body={
-            'vertex_label': vertex_label
+            'vertex_labels': vertex_labels
         }
     )
 
 
-def write_job(status=JOB_COMPLETE, worker_id=None):
+def write_job(status=JOB_COMPLETE, worker_id=None, statistics: dict = None):
     return write(
         status=status,
         body={
-            'worker_id': worker_id
+            'worker_id': worker_id,
+            'statistics': statistics or {}
         }
     )
 
@@ -106,15 +294,16 @@ def write_continue():
     )
 
 
-def write_start_send_file(worker_id: int, file_type: int, number_of_chunks: int):
+def write_start_send_file(worker_id: int, file_type: int, number_of_chunks: int, encoding: int):
     return write(status=START_SEND_FILE, body={
         'worker_id': worker_id,
         'file_type': file_type,
-        'number_of_chunks': number_of_chunks
+        'number_of_chunks': number_of_chunks,
+        'encoding': encoding
     })
 
 
-def write_file_chunk(worker_id: int, file_type: int, index: int, chunk: str):
+def write_file_chunk(worker_id: int, file_type: int, index: int, chunk: bytes):
     return write(status=FILE_CHUNK, body={
         'worker_id': worker_id,
         'file_type': file_type,
@@ -123,11 +312,12 @@ def write_file_chunk(worker_id: int, file_type: int, index: int, chunk: str):
     })
 
 
-def write_missing_chunk(worker_id: int, file_type: int, index: int):
-    return write(status=MISSING_CHUNK, body={
+def write_acknowledge_chunks(worker_id: int, file_type: int, ranges: [(int, int)]):
+    return write(status=ACKNOWLEDGE_CHUNKS, body={
         'worker_id': worker_id,
         'file_type': file_type,
-        'index': index
+        # Flattened [start, end) ranges
+        'ranges': [index for index_range in ranges for index in index_range]
     })
 
 
@@ -160,6 +350,20 @@ def write_progress(worker_id: int, count: int):
     )
 
 
+def write_stream_file(worker_id: int, file_type: int, host: str, port: int, size: int, checksum: int):
+    return write(
+        status=STREAM_FILE,
+        body={
+            'worker_id': worker_id,
+            'file_type': file_type,
+            'host': host,
+            'port': port,
+            'size': size,
+            'checksum': checksum
+        }
+    )
+
+
 def read_status(status):
     # Returns a constant function
     return lambda body: (status,)
@@ -182,11 +386,11 @@ def read_debug(body: dict):
 
 
 def read_random_walker(body: dict):
-    return RANDOM_WALKER, body['vertex_label']
+    return RANDOM_WALKER, body['vertex_labels']
 
 
 def read_job_complete(body: dict):
-    return JOB_COMPLETE, body['worker_id']
+    return JOB_COMPLETE, body['worker_id'], body.get('statistics', {})
 
 
 def read_random_walker_count(body: dict):
@@ -194,15 +398,16 @@ def read_random_walker_count(body: dict):
 
 
 def read_start_send_file(body: dict):
-    return START_SEND_FILE, body['worker_id'], body['file_type'], body['number_of_chunks']
+    return START_SEND_FILE, body['worker_id'], body['file_type'], body['number_of_chunks'], body['encoding']
 
 
 def read_file_chunk(body: dict):
-    return FILE_CHUNK, body['worker_id'], body['file_type'], body['index'], body['chunk']
+    return FILE_CHUNK, body['worker_id'], body['file_type'], body['index'], decode_bytes(body['chunk'])
 
 
-def read_missing_chunk(body: dict):
-    return MISSING_CHUNK, body['worker_id'], body['file_type'], body['index']
+def read_acknowledge_chunks(body: dict):
+    ranges = body['ranges']
+    return ACKNOWLEDGE_CHUNKS, body['worker_id'], body['file_type'], list(zip(ranges[::2], ranges[1::2]))
 
 
 def read_received_file(body: dict):
@@ -217,7 +422,17 @@ def read_progress(body: dict):
     return PROGRESS, body['worker_id'], body['count']
 
 
+def read_stream_file(body: dict):
+    return STREAM_FILE, body['worker_id'], body['file_type'], body['host'], body['port'], body['size'], \
+        body['checksum']
+
+
 def read(message: bytes):
+    # Messages of both codecs can be read, regardless of the selected codec
+    if message[0] == BINARY_MARKER:
+        status, body = read_binary(message)
+        return MESSAGE_INTERFACE[status](body)
+
     content = json.loads(message.decode())
 
     return MESSAGE_INTERFACE[content['status']](content['body'])
@@ -238,7 +453,8 @@ MESSAGE_INTERFACE = {
     START_SEND_FILE: read_start_send_file,
     RECEIVED_FILE: read_received_file,
     FILE_CHUNK: read_file_chunk,
-    MISSING_CHUNK: read_missing_chunk,
     END_SEND_FILE: read_end_send_file,
-    PROGRESS: read_progress
+    PROGRESS: read_progress,
+    STREAM_FILE: read_stream_file,
+    ACKNOWLEDGE_CHUNKS: read_acknowledge_chunks
 }
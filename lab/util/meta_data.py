@@ -1,5 +1,11 @@
+from bisect import bisect_right
 from typing import List
 
+import numpy as np
+
+# Owner in the range index of vertices that belong to no worker
+NO_WORKER = -1
+
 
 class MetaData:
     def __init__(self, worker_id: int, number_of_edges: int, min_vertex: int, max_vertex: int, host: str = None, port: str = None):
@@ -40,6 +46,8 @@ class CombinedMetaData:
         self.top_layer = self.find_top_layer
         self.bottom_layer = self.find_bottom_layer
         self.combined_number_of_edges = self.get_combined_number_of_edges
+        self.boundaries, self.owners = self.create_range_index()
+        self.boundary_array, self.owner_array = np.array(self.boundaries), np.array(self.owners, dtype=np.int64)
 
     @staticmethod
     def create_combined_meta_data(all_meta_data: List[MetaData]) -> dict:
@@ -50,6 +58,34 @@ class CombinedMetaData:
 
         return combined_meta_data
 
+    def create_range_index(self) -> (list, list):
+        """
+        Splits the vertex labels at the bounds of the ranges of the workers. The vertices from `boundaries[i]` up to
+        `boundaries[i + 1]` belong to worker `owners[i]`, or to no worker if it is NO_WORKER. The last boundary lies
+        above all ranges. If ranges overlap, the vertices belong to the first worker, like a scan over the workers would
+        find
+
+        :return: Sorted boundaries and the id of the worker that owns the vertices from each boundary on
+        """
+
+        if len(self.combined_meta_data) == 0:
+            return [0], [NO_WORKER]
+
+        boundaries = sorted({meta_data.min_vertex for meta_data in self.combined_meta_data.values()} |
+                            {meta_data.max_vertex + 1 for meta_data in self.combined_meta_data.values()})
+
+        owners = []
+        for boundary in boundaries:
+            owner = NO_WORKER
+            for worker_id, meta_data in self.combined_meta_data.items():
+                if meta_data.has_vertex(boundary):
+                    owner = worker_id
+                    break
+
+            owners.append(owner)
+
+        return boundaries, owners
+
     @property
     def find_top_layer(self) -> MetaData:
         top_layer = None
@@ -82,15 +118,24 @@ class CombinedMetaData:
         return self.combined_meta_data[worker_id]
 
     def get_worker_id_that_has_vertex(self, vertex: int):
-        for worker_id, meta_data in self.combined_meta_data.items():
-            if meta_data.has_vertex(vertex):
-                return worker_id
+        # Vertices below the first boundary get the owner of the last boundary, which is no worker
+        worker_id = self.owners[bisect_right(self.boundaries, vertex) - 1]
+        if worker_id == NO_WORKER:
+            raise Exception("Vertex could not be matched to any of the workers")
 
-        raise Exception("Vertex could not be matched to any of the workers")
+        return worker_id
 
-    def get_connection_that_has_vertex(self, vertex: int):
-        for meta_data in self.combined_meta_data.values():
-            if meta_data.has_vertex(vertex):
-                return meta_data.get_connection_info()
+    def get_worker_ids_that_have_vertices(self, vertices: np.ndarray) -> np.ndarray:
+        """
+        :param vertices: Array of vertex labels
+        :return: Array with the id of the worker that has each vertex
+        """
 
-        raise Exception("Vertex could not be matched to any of the workers")
+        worker_ids = self.owner_array[np.searchsorted(self.boundary_array, vertices, side='right') - 1]
+        if np.any(worker_ids == NO_WORKER):
+            raise Exception("Vertex could not be matched to any of the workers")
+
+        return worker_ids
+
+    def get_connection_that_has_vertex(self, vertex: int):
+        return self.combined_meta_data[self.get_worker_id_that_has_vertex(vertex)].get_connection_info()
@@ -4,8 +4,8 @@ from networkx.algorithms import approximation,  distance_measures, cluster, shor
 from networkx.exception import NetworkXError
 
 from lab.util.argument_parser import get_arg
-from lab.util.validation import assert_file
-from lab.util.graph import Graph
+from lab.util.validation import assert_graph
+from lab.util.graph import Graph, CSRGraph, load_graph
 
 
 def degree_distribution(graph: Graph, degree_attr='degree', bins='auto'):
@@ -17,8 +17,12 @@ def degree_distribution(graph: Graph, degree_attr='degree', bins='auto'):
 
     :param bins: int or str     arg used in np.histogram
     """
-    degrees = np.array([getattr(graph, degree_attr)(vertex)
-                        for vertex in graph.vertices])
+    if isinstance(graph, CSRGraph):
+        # e.g. graph.degrees()
+        degrees = getattr(graph, degree_attr + 's')()
+    else:
+        degrees = np.array([getattr(graph, degree_attr)(vertex)
+                            for vertex in graph.vertices])
     # TODO check if log-bins yield better "performance"
     # if so, determine whethere sampling within bins should be done with log scale as well (in Algorithm.DegreeDistribution)
     hist, bins = np.histogram(degrees, bins=bins, density=False)
@@ -61,10 +65,19 @@ def aspl(graph: nx.Graph):
         return np.inf
 
 
+def to_networkx(graph: CSRGraph) -> nx.Graph:
+    """ Undirected networkx graph with the edges of the graph
+    """
+    sources = np.repeat(graph.vertices, graph.degrees())
+    nx_graph = nx.Graph()
+    nx_graph.add_edges_from(zip(sources.tolist(), graph.neighbours.tolist()))
+    return nx_graph
+
+
 def summarize(graph_path, save_pmf=True, extra_metrics=True, decimals=3):
-    graph = Graph()
-    graph.load_from_file(graph_path)
+    graph = load_graph(graph_path)
     result = degree_distribution(graph, 'degree')
+    result['components'] = graph.n_components
 
     # rename keys
     result['degree mean'] = np.round(result.pop('mean'), decimals)
@@ -73,8 +86,7 @@ def summarize(graph_path, save_pmf=True, extra_metrics=True, decimals=3):
         result.pop('pmf')
         result.pop('bins')
 
-    graph = nx.readwrite.edgelist.read_edgelist(
-        graph_path, nodetype=int, create_using=nx.Graph)
+    graph = to_networkx(graph)
     result['|V|'] = np.round(graph.number_of_nodes())
     result['|E|'] = np.round(graph.number_of_edges())
     if extra_metrics:
@@ -86,11 +98,10 @@ def summarize(graph_path, save_pmf=True, extra_metrics=True, decimals=3):
 
 
 if __name__ == '__main__':
-    filename = get_arg("--graph", assert_file,
+    filename = get_arg("--graph", assert_graph,
                        default='data/facebook_head.txt')
 
-    graph = Graph()
-    graph.load_from_file(filename)
+    graph = load_graph(filename)
     result = degree_distribution(graph, 'outdegree')
     print(f'mean degree {result["mean"]}')
 
@@ -99,8 +110,7 @@ if __name__ == '__main__':
     print(f'mean degree {result["mean"]}')
 
     # only for undirected graphs
-    graph = nx.readwrite.edgelist.read_edgelist(
-        filename, nodetype=int, create_using=nx.Graph)
+    graph = to_networkx(graph)
 
     k = average_clustering(graph)
     print(f'avg clustering coef: {k}')
@@ -0,0 +1,121 @@
+try:
+    from multiprocessing import resource_tracker
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:
+    SharedMemory = None
+
+# Number of bytes of data in a ring buffer, one ring buffer is used per sender and receiver
+RING_SIZE = 2 ** 24
+
+# Positions in the header, the header is followed by the data
+WRITE_POSITION = 0
+READ_POSITION = 1
+ATTACHED = 2
+HEADER_SIZE = 8 * 8
+
+
+def is_available() -> bool:
+    return SharedMemory is not None
+
+
+class RingBuffer:
+    """ Single producer, single consumer byte pipe in shared memory.
+
+    The positions are the total number of bytes that were written and read. The writer tells the reader over another
+    channel how many bytes it wrote, so the reader never reads data that is still being written.
+    """
+
+    def __init__(self, name: str = None):
+        # The writer creates the ring buffer, the reader attaches to it by name
+        self.is_writer = name is None
+
+        if self.is_writer:
+            shared_memory = SharedMemory(create=True, size=HEADER_SIZE + RING_SIZE)
+        else:
+            shared_memory = SharedMemory(name=name)
+
+        # The shared memory is removed by `unlink`, not by the resource tracker. Forked processes share their resource
+        # tracker, so the registrations of both sides would otherwise collide
+        resource_tracker.unregister(shared_memory._name, 'shared_memory')
+
+        # The views are assigned first, such that they are released before the shared memory is garbage collected
+        self.header = shared_memory.buf[:HEADER_SIZE].cast('Q')
+        self.data = shared_memory.buf[HEADER_SIZE:HEADER_SIZE + RING_SIZE]
+        self.shared_memory = shared_memory
+
+        self.name = shared_memory.name
+        self.is_linked = True
+        self.size = RING_SIZE
+
+        if not self.is_writer:
+            # Both sides are attached, so the name is no longer needed. Once it is removed, the shared memory is
+            # released by the operating system when both sides exit, even if they are killed
+            self.header[ATTACHED] = 1
+            self.unlink()
+
+    @property
+    def free(self) -> int:
+        """
+        :return: Number of bytes that can be written
+        """
+
+        return self.size - (self.header[WRITE_POSITION] - self.header[READ_POSITION])
+
+    def write(self, data: bytes):
+        """
+        :param data: Bytes to write, at most `self.free` bytes
+        """
+
+        write_position = self.header[WRITE_POSITION]
+        start = write_position % self.size
+        first = min(len(data), self.size - start)
+
+        self.data[start:start + first] = data[:first]
+        if first < len(data):
+            self.data[:len(data) - first] = data[first:]
+
+        self.header[WRITE_POSITION] = write_position + len(data)
+
+    def read(self, n: int) -> bytes:
+        """
+        :param n: Number of bytes to read, which have to be written already
+        :return: The next n bytes
+        """
+
+        read_position = self.header[READ_POSITION]
+        start = read_position % self.size
+        first = min(n, self.size - start)
+
+        data = self.data[start:start + first].tobytes()
+        if first < n:
+            data += self.data[:n - first].tobytes()
+
+        self.header[READ_POSITION] = read_position + n
+
+        return data
+
+    def unlink(self):
+        if not self.is_linked:
+            return
+
+        self.is_linked = False
+
+        # Unlinking unregisters the shared memory from the resource tracker
+        resource_tracker.register(self.shared_memory._name, 'shared_memory')
+        try:
+            self.shared_memory.unlink()
+        except FileNotFoundError:
+            # Unlinked by the reader
+            resource_tracker.unregister(self.shared_memory._name, 'shared_memory')
+
+    def close(self):
+        if self.is_writer and self.header[ATTACHED]:
+            # Unlinked by the reader
+            self.is_linked = False
+
+        self.unlink()
+
+        # The views on the shared memory have to be released first
+        self.header.release()
+        self.data.release()
+        self.shared_memory.close()
@@ -1,22 +1,112 @@
-from multiprocessing import Process, Queue
+import socket
+import sys
+from collections import deque
+from queue import Empty
+from threading import Thread, Condition
+from time import time, perf_counter
 from lab.util import message
 from lab.util import sockets
-from json.decoder import JSONDecodeError
+from lab.util.instrumentation import get_statistics, DECODE, DISPATCH
 
+# Messages that carry bulk data, waiting control messages are handled before them
+BULK_STATUSES = {message.RANDOM_WALKER, message.START_SEND_FILE, message.FILE_CHUNK, message.END_SEND_FILE}
+# Maximum number of bulk messages that are handled per call of `handle_queue`, such that a control message that
+# arrives during a large transfer is not queued behind all of it
+BULK_MESSAGES_PER_CALL = 32
 
-class ServerProcess:
-    def __init__(self, queue: Queue):
+
+class MessageQueue:
+    """ Queue of decoded messages with a lane for control messages and a lane for bulk messages. Control messages
+    are taken first, within a lane the messages are taken in the order in which they arrived. Each item is a tuple
+    of the sender and the decoded message.
+    """
+
+    def __init__(self):
+        self.control = deque()
+        self.bulk = deque()
+        self.condition = Condition()
+
+    def put_nowait(self, item):
+        lane = self.bulk if item[1][0] in BULK_STATUSES else self.control
+
+        with self.condition:
+            lane.append(item)
+            self.condition.notify()
+
+    def has_item(self, include_bulk: bool = True) -> bool:
+        return len(self.control) > 0 or (include_bulk and len(self.bulk) > 0)
+
+    def get(self, timeout: float = None, include_bulk: bool = True):
+        """
+        :param timeout: Maximum number of seconds to wait, None to wait until a message arrives
+        :param include_bulk: Whether bulk messages can be taken, otherwise only control messages are
+        :return: The next sender and message
+        :raises Empty: If no message arrived in time
+        """
+
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.has_item(include_bulk), timeout):
+                raise Empty
+
+            if len(self.control) > 0:
+                return self.control.popleft()
+
+            return self.bulk.popleft()
+
+    def get_nowait(self, include_bulk: bool = True):
+        return self.get(0, include_bulk)
+
+    def get_bulk_nowait(self):
+        with self.condition:
+            if len(self.bulk) == 0:
+                raise Empty
+
+            return self.bulk.popleft()
+
+    def empty(self) -> bool:
+        return not self.has_item()
+
+
+class ServerThread(Thread):
+    """ Accepts connections and decodes the received messages into a queue,
+    within the process of the node.
+    """
+
+    def __init__(self, queue: MessageQueue):
+        super().__init__(daemon=True)
         self.socket = sockets.bind("", 0)
+        self.hostname = sockets.get_hostname()
+        self.port = sockets.get_port(self.socket)
         self.queue = queue
-        queue.put([sockets.get_hostname(), sockets.get_port(self.socket)])
-        self.listen()
+
+        # Writing to one end of the pair stops the thread
+        self.stop_socket, self.stop_signal = socket.socketpair()
 
     def put_message_in_queue(self, message):
         self.queue.put_nowait(message)
 
-    def listen(self):
-        while True:
-            self.put_message_in_queue(sockets.get_message(self.socket))
+    def run(self):
+        for peer, raw_message in sockets.get_messages(self.socket, self.stop_socket):
+            started_at = perf_counter()
+            try:
+                decoded_message = message.read(raw_message)
+            except Exception as error:
+                # A message that can not be decoded is skipped, the thread has to keep receiving
+                print(f'Skipped a message that can not be decoded: {error!r}', file=sys.stderr)
+                continue
+
+            get_statistics().record_latency(DECODE, decoded_message[0], peer, perf_counter() - started_at)
+            self.put_message_in_queue((peer, decoded_message))
+
+        self.socket.close()
+        self.stop_socket.close()
+
+    def terminate(self):
+        if self.is_alive():
+            self.stop_signal.send(b'\0')
+            self.join()
+
+        self.stop_signal.close()
 
 
 class Server:
@@ -28,34 +118,115 @@ class Server:
         self.message_interface = {}
 
         # Create queue
-        self.server_queue = Queue()
+        self.server_queue = MessageQueue()
 
         # Start server with queue
-        self.server = Process(target=ServerProcess, args=(self.server_queue,))
+        self.server = ServerThread(self.server_queue)
         self.server.start()
 
-        # Wait for server to send its hostname and port
-        self.hostname, self.port = self.server_queue.get()
+        self.hostname, self.port = self.server.hostname, self.server.port
+        sockets.set_local_address(self.hostname, self.port)
         # if len(self.hostname) > 6 and self.hostname[-6:] == '.local':
         #     # Fix for MacOS
         #     self.hostname = self.hostname[:-6]
         #     print(self.hostname)
 
+    def handle_message(self, status, *args, peer: str = None):
+        """
+        :param status: Status of the message
+        :param args: Arguments of the message
+        :param peer: Listen address of the sender as 'host:port', or its host if it has no server
+        """
+
+        assert status in self.message_interface.keys(), \
+            f'Unknown status {status}'
+
+        started_at = perf_counter()
+        self.message_interface[status](*args)
+        get_statistics().record_latency(DISPATCH, status, peer, perf_counter() - started_at)
+
+    def get_traffic_statistics(self) -> dict:
+        """
+        :return: Traffic and latencies of the messages of this process, per status and peer
+        """
+
+        return get_statistics().to_dict(message.STATUS_NAMES)
+
     def handle_queue(self):
-        while self.message_in_queue():
+        """
+        Handles the queued control messages and at most `BULK_MESSAGES_PER_CALL` bulk messages
+        """
+
+        bulk_messages = 0
+
+        while True:
             try:
-                status, *args = self.get_message_from_queue()
-                assert status in self.message_interface.keys(), \
-                    f'Unknown status {status}'
-                self.message_interface[status](*args)
-            except JSONDecodeError:
-                continue
+                peer, received_message = self.server_queue.get_nowait(bulk_messages < BULK_MESSAGES_PER_CALL)
+            except Empty:
+                return
+
+            if received_message[0] in BULK_STATUSES:
+                bulk_messages += 1
+
+            self.handle_message(*received_message, peer=peer)
+
+    def handle_bulk_queue(self):
+        """
+        Handles all queued bulk messages, e.g. to account for the random walkers that were received before a control
+        message that jumped ahead of them
+        """
+
+        while True:
+            try:
+                peer, received_message = self.server_queue.get_bulk_nowait()
+            except Empty:
+                return
+
+            self.handle_message(*received_message, peer=peer)
+
+    def wait_for_message(self, timeout: float = None) -> bool:
+        """
+        Blocks until a message arrives, handles it and the other queued messages as `handle_queue` does
+
+        :param timeout: Maximum number of seconds to wait, None to wait until a message arrives
+        :return: Boolean whether a message was handled
+        """
+
+        try:
+            peer, received_message = self.server_queue.get(timeout=timeout)
+        except Empty:
+            return False
+
+        self.handle_message(*received_message, peer=peer)
+        self.handle_queue()
+
+        return True
+
+    def wait_for(self, condition, timeout: float = None) -> bool:
+        """
+        Handles messages until the condition holds, the condition is checked whenever messages were handled
+
+        :param condition: Function without arguments that returns a boolean
+        :param timeout: Maximum number of seconds to wait, None to wait until the condition holds
+        :return: Boolean whether the condition holds
+        """
+
+        deadline = None if timeout is None else time() + timeout
+
+        self.handle_queue()
+        while not condition():
+            if deadline is None:
+                self.wait_for_message()
+            elif not self.wait_for_message(max(deadline - time(), 0)):
+                return condition()
+
+        return True
 
     def get_message_from_queue(self) -> [str]:
         """
         :return: List of the elements of the data in the queue
         """
-        return message.read(self.server_queue.get())
+        return self.server_queue.get()[1]
 
     def message_in_queue(self) -> bool:
         """
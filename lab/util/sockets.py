@@ -1,12 +1,62 @@
+import atexit
+import os
+import selectors
 import socket
+import struct
+from threading import RLock
+from time import sleep
+from lab.util import ring_buffer
+from lab.util.instrumentation import get_statistics
+from lab.util.message import peek_status
+from lab.util.ring_buffer import RingBuffer
+
+try:
+    # Peers on the same host exchange messages through shared memory, unless disabled in lab.util.ssh_connection_info
+    from lab.util.ssh_connection_info import shared_memory_transport
+except ImportError:
+    shared_memory_transport = 1
+
+BACKLOG = 128
+BUFFER_SIZE = 65536
+PEEK_FLAGS = socket.MSG_PEEK | socket.MSG_DONTWAIT
+
+# Every message is preceded by its length in bytes
+HEADER = struct.Struct('!I')
+MAX_MESSAGE_SIZE = 2 ** 32 - 1
+
+# Messages of at least this size are written to the ring buffer of a peer on the same host
+RING_BUFFER_THRESHOLD = BUFFER_SIZE
+# A message that starts with this byte attaches the ring buffer that is named by the rest of the message
+RING_BUFFER_MARKER = b'\0'
+# Refers to the next message in the ring buffer, instead of containing it
+RING_BUFFER_REFERENCE = struct.Struct('!cQ')
+RING_BUFFER_REFERENCE_MARKER = b'\1'
+# Seconds that a sender waits before it checks again whether the full ring buffer was read
+RING_BUFFER_FULL_SLEEP = 0.0005
+# The first message of a connection announces the listen address of the sender as 'host:port', which identifies it
+PEER_MARKER = b'\2'
+
+# Long-lived outgoing connections, keyed by (host, port)
+connections = {}
+# Ring buffers of the outgoing connections to peers on the same host, {(host, port): (socket, RingBuffer)}
+ring_buffers = {}
+# Threads that send to the same peer take turns, such that their messages are not interleaved
+locks = {}
+connections_pid = os.getpid()
+# Listen address of the server of this process as 'host:port', None if it has no server
+local_address = None
 
 
 def get_hostname():
     return socket.gethostname()
 
 
+# Host names under which peers on this host register
+LOCAL_HOSTS = {get_hostname(), 'localhost', '127.0.0.1'}
+
+
 def get_port(s):
-    s.listen(1)
+    s.listen(BACKLOG)
     port = s.getsockname()[1]
 
     return port
@@ -21,23 +71,304 @@ def bind(host, port):
 
 def connect(host, port):
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.connect((host, port))
+    try:
+        s.connect((host, port))
+    except OSError:
+        # E.g. a refused connection, which the callers retry
+        s.close()
+        raise
+
+    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    return s
+
+
+def is_closed_by_peer(s) -> bool:
+    """
+    Peers never write to pooled connections, so any readable data means the peer closed or reset the connection
+
+    :param s: Connected socket
+    :return: Boolean whether the connection can no longer be used
+    """
+
+    try:
+        return s.recv(1, PEEK_FLAGS) == b''
+    except BlockingIOError:
+        return False
+    except OSError:
+        return True
+
+
+def reset_after_fork():
+    global connections, ring_buffers, locks, connections_pid, local_address
+
+    if connections_pid != os.getpid():
+        # The sockets, ring buffers, locks and server of a forked process belong to its parent
+        connections = {}
+        ring_buffers = {}
+        locks = {}
+        connections_pid = os.getpid()
+        local_address = None
+
+
+def set_local_address(host, port):
+    """
+    Sets the listen address that is announced to the peers over new connections
+
+    :param host: Host of the server of this process
+    :param port: Port of the server of this process
+    """
+
+    global local_address
+
+    reset_after_fork()
+    local_address = f'{host}:{port}'
+
+
+def get_lock(host, port) -> RLock:
+    reset_after_fork()
+
+    return locks.setdefault((host, port), RLock())
+
+
+def get_connection(host, port):
+    """
+    Returns the pooled connection to (host, port), a new connection is made if there is none or if the old one was
+    closed by the peer. A new connection first announces the listen address of this process
+
+    :param host: Host of the peer
+    :param port: Port of the peer
+    :return: Connected socket
+    """
+
+    reset_after_fork()
+
+    s = connections.get((host, port))
+    if s is not None and is_closed_by_peer(s):
+        close_connection(host, port)
+        s = None
+
+    if s is None:
+        s = connect(host, port)
+        if local_address is not None:
+            announcement = PEER_MARKER + local_address.encode()
+            s.sendall(HEADER.pack(len(announcement)) + announcement)
+        connections[(host, port)] = s
 
     return s
 
 
-def get_message(s):
-    client_socket, addr = s.accept()
-    message = client_socket.recv(1024)
-    client_socket.close()
+def is_local(host) -> bool:
+    return host in LOCAL_HOSTS
+
+
+def uses_ring_buffer(host) -> bool:
+    return shared_memory_transport and ring_buffer.is_available() and is_local(host)
+
+
+def get_ring_buffer(host, port):
+    """
+    Returns the ring buffer to (host, port), a new ring buffer is announced over the connection to the peer whenever
+    the connection is new
+
+    :param host: Host of the peer
+    :param port: Port of the peer
+    :return: Connected socket and ring buffer
+    """
+
+    s = get_connection(host, port)
+    connection, buffer = ring_buffers.get((host, port), (None, None))
 
-    return message
+    if connection is not s:
+        if buffer is not None:
+            buffer.close()
+
+        buffer = RingBuffer()
+        name = RING_BUFFER_MARKER + buffer.name.encode()
+        s.sendall(HEADER.pack(len(name)) + name)
+        ring_buffers[(host, port)] = (s, buffer)
+
+    return s, buffer
+
+
+def close_connection(host, port):
+    with get_lock(host, port):
+        s = connections.pop((host, port), None)
+        _, buffer = ring_buffers.pop((host, port), (None, None))
+
+        if buffer is not None:
+            buffer.close()
+        if s is not None:
+            s.close()
+
+
+def close_connections():
+    if connections_pid != os.getpid():
+        return
+
+    for host, port in list(connections.keys()):
+        close_connection(host, port)
+
+
+# Ring buffers have to be closed before the interpreter releases the shared memory
+atexit.register(close_connections)
+
+
+def read_messages(buffer: bytearray) -> [bytes]:
+    """
+    Removes all complete messages from the buffer
+
+    :param buffer: Received bytes, possibly ending with an incomplete message
+    :return: List of complete messages, without headers
+    """
+
+    messages = []
+    offset = 0
+
+    while len(buffer) - offset >= HEADER.size:
+        message_size, = HEADER.unpack_from(buffer, offset)
+        end = offset + HEADER.size + message_size
+
+        if len(buffer) < end:
+            break
+
+        messages.append(bytes(buffer[offset + HEADER.size:end]))
+        offset = end
+
+    del buffer[:offset]
+
+    return messages
+
+
+def get_messages(s, stop_socket=None):
+    """
+    Generator that accepts connections on the listening socket and yields each message that is received on any of
+    the connections. Messages that a connection refers to are read from the ring buffer that was announced over it.
+    The sender of a message is the listen address that was announced over the connection, or the host of the peer if
+    the peer has no server
+
+    :param s: Listening socket
+    :param stop_socket: Optional socket, the generator returns as soon as it becomes readable
+    :return: Tuples of the sender and the message without header
+    """
+
+    selector = selectors.DefaultSelector()
+    selector.register(s, selectors.EVENT_READ)
+    if stop_socket is not None:
+        selector.register(stop_socket, selectors.EVENT_READ)
+    buffers = {}
+    incoming_ring_buffers = {}  # {socket: RingBuffer}
+    peers = {}  # {socket: 'host:port'}, the listen address of the peer
+
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj is stop_socket:
+                for client_socket in buffers.keys():
+                    client_socket.close()
+                for buffer in incoming_ring_buffers.values():
+                    buffer.close()
+                selector.close()
+                return
+
+            if key.fileobj is s:
+                client_socket, addr = s.accept()
+                selector.register(client_socket, selectors.EVENT_READ)
+                buffers[client_socket] = bytearray()
+                peers[client_socket] = addr[0]
+                continue
+
+            client_socket = key.fileobj
+            try:
+                data = client_socket.recv(BUFFER_SIZE)
+            except OSError:
+                # E.g. a connection reset by the peer
+                data = b''
+
+            if not data:
+                # Connection closed by the peer
+                if client_socket in incoming_ring_buffers:
+                    incoming_ring_buffers.pop(client_socket).close()
+                selector.unregister(client_socket)
+                client_socket.close()
+                del buffers[client_socket]
+                del peers[client_socket]
+                continue
+
+            buffers[client_socket] += data
+            for message in read_messages(buffers[client_socket]):
+                if message[:1] == PEER_MARKER:
+                    peers[client_socket] = message[1:].decode()
+                elif message[:1] == RING_BUFFER_MARKER:
+                    try:
+                        incoming_ring_buffers[client_socket] = RingBuffer(message[1:].decode())
+                    except (OSError, ValueError):
+                        # The sender already closed the ring buffer, its references are skipped
+                        continue
+                elif message[:1] == RING_BUFFER_REFERENCE_MARKER:
+                    if client_socket in incoming_ring_buffers:
+                        _, message_size = RING_BUFFER_REFERENCE.unpack(message)
+                        message = incoming_ring_buffers[client_socket].read(message_size)
+                        get_statistics().record_received(peek_status(message), peers[client_socket], len(message))
+                        yield peers[client_socket], message
+                else:
+                    get_statistics().record_received(peek_status(message), peers[client_socket], len(message))
+                    yield peers[client_socket], message
+
+
+def send_to_connection(host, port, message: bytes):
+    get_connection(host, port).sendall(HEADER.pack(len(message)) + message)
+
+
+def send_to_ring_buffer(host, port, message: bytes):
+    """
+    Writes the message to the ring buffer to (host, port) and refers to it over the connection, which keeps the order
+    of all messages to the peer and wakes the peer up
+
+    :param host: Host of the peer
+    :param port: Port of the peer
+    :param message: Encoded message, without header
+    """
+
+    s, buffer = get_ring_buffer(host, port)
+
+    while buffer.free < len(message):
+        if is_closed_by_peer(s):
+            raise ConnectionResetError('Connection closed while the ring buffer is full')
+
+        sleep(RING_BUFFER_FULL_SLEEP)
+
+    buffer.write(message)
+    s.sendall(HEADER.pack(RING_BUFFER_REFERENCE.size) + RING_BUFFER_REFERENCE.pack(
+        RING_BUFFER_REFERENCE_MARKER, len(message)))
 
 
 def send_message(host, port, message: bytes):
-    s = connect(host, port)
-    s.send(message)
-    s.close()
+    """
+    Sends a message over the pooled connection to (host, port). Large messages to a peer on the same host are send
+    through shared memory. A broken connection is re-established once, such that a dead peer still raises a
+    ConnectionRefusedError. Safe to call from multiple threads
+
+    :param host: Host of the peer
+    :param port: Port of the peer
+    :param message: Encoded message, without header
+    """
+
+    if len(message) > MAX_MESSAGE_SIZE:
+        raise ValueError(f'Message of {len(message)} bytes exceeds the maximum of {MAX_MESSAGE_SIZE} bytes')
+
+    if RING_BUFFER_THRESHOLD <= len(message) <= ring_buffer.RING_SIZE and uses_ring_buffer(host):
+        send = send_to_ring_buffer
+    else:
+        send = send_to_connection
+
+    with get_lock(host, port):
+        try:
+            send(host, port, message)
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            close_connection(host, port)
+            send(host, port, message)
+
+    get_statistics().record_sent(peek_status(message), f'{host}:{port}', len(message))
 
 
 def is_alive(host, port):
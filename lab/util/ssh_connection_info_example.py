@@ -4,3 +4,9 @@ password = None
 local = 0
 shared_filesystem = 0
 graph_path = ''
+
+# Encoding of the messages between the nodes, 'json' or 'binary'
+message_codec = 'json'
+
+# Large messages between nodes on the same host are passed through shared memory, set to 0 to always use TCP
+shared_memory_transport = 1
@@ -1,5 +1,7 @@
 import os
 
+from lab.util.graph import BINARY_HEADER_FILE
+
 
 def assert_list(name: str, value: str) -> list:
     items = value.split(",")
@@ -97,6 +99,20 @@ def assert_file(name: str, value: str) -> str:
     return value
 
 
+def assert_graph(name: str, value: str) -> str:
+    """
+    Makes sure the value is a path to an edge file or to a graph in the binary format, otherwise raises AssertionError
+
+    :param name: Argument name
+    :param value: Value
+    :return: Value as string
+    """
+    if not (os.path.isfile(value) or os.path.isfile(os.path.join(value, BINARY_HEADER_FILE))):
+        raise AssertionError("Invalid graph for {}: `{}`".format(name, value))
+
+    return value
+
+
 def assert_path(name: str, value: str) -> str:
     """
     Makes sure the value is a path to an existing file, otherwise raises AssertionError
@@ -129,6 +145,14 @@ def assert_downscaling_method(name: str, value: str) -> str:
             "Invalid downscaling method for {}: `{}`".format(name, value))
 
 
+def assert_start_policy(name: str, value: str) -> str:
+    if value in ["uniform", "degree"]:
+        return value
+    else:
+        raise AssertionError(
+            "Invalid start policy for {}: `{}`".format(name, value))
+
+
 def assert_upscaling_method(name: str, value: str) -> str:
     if value in ["Gscaler", "DegreeDistribution"]:
         return value
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from lab.util.compression import zigzag_encode, zigzag_decode, encode_varints, decode_varints, compress_edges, \
+    decompress_edges
+from lab.util.file_transfer import encode_chunk, decode_chunk, RAW, ZLIB, EDGE_LIST
+
+
+class CompressionTest(unittest.TestCase):
+    def test_zigzag(self):
+        values = np.array([0, -1, 1, -2, 2, 2 ** 62, -2 ** 63], dtype=np.int64)
+
+        self.assertEqual(zigzag_encode(values[:5]).tolist(), [0, 1, 2, 3, 4])
+        np.testing.assert_array_equal(zigzag_decode(zigzag_encode(values)), values)
+
+    def test_varints(self):
+        values = np.array([0, 1, 127, 128, 300, 2 ** 35, 2 ** 64 - 1], dtype=np.uint64)
+        encoded = encode_varints(values)
+
+        self.assertEqual(encode_varints(values[:5]), bytes([0, 1, 127, 0x80, 1, 0xac, 2]))
+        np.testing.assert_array_equal(decode_varints(encoded), values)
+        self.assertEqual(len(decode_varints(b'')), 0)
+
+    def test_edges(self):
+        random_edges = np.random.RandomState(0).randint(0, 10 ** 9, (10000, 2))
+        sorted_edges = random_edges[np.lexsort((random_edges[:, 1], random_edges[:, 0]))]
+
+        for edges in [random_edges, sorted_edges, np.zeros((0, 2), dtype=np.int64), np.array([[5, 3]])]:
+            np.testing.assert_array_equal(decompress_edges(compress_edges(edges)).reshape(-1, 2), edges)
+
+        # Sorted edges have small differences
+        self.assertLess(len(compress_edges(sorted_edges)), len(compress_edges(random_edges)))
+
+    def test_chunks(self):
+        edges = [f'{i} {i * 3}\n' for i in range(1000)]
+        text = ['# comment\n', 'not an edge\n', '1\t2\n']
+
+        for encoding in [RAW, ZLIB, EDGE_LIST]:
+            self.assertEqual(decode_chunk(encode_chunk(edges, encoding), encoding), edges)
+
+        for encoding in [RAW, ZLIB]:
+            self.assertEqual(decode_chunk(encode_chunk(text, encoding), encoding), text)
+
+        # Only lines that are decoded to the exact same text can be send as edges
+        with self.assertRaises(ValueError):
+            encode_chunk(text, EDGE_LIST)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from lab.util.disjoint_set import DisjointSet
+from lab.util.graph import Graph, CSRGraph
+
+
+def to_components(disjoint_set: DisjointSet) -> set:
+    components = {}
+    for label, root in zip(disjoint_set.labels.tolist(), disjoint_set.roots().tolist()):
+        components.setdefault(root, set()).add(label)
+
+    return {frozenset(component) for component in components.values()}
+
+
+def to_networkx_components(labels, edges) -> set:
+    graph = nx.Graph()
+    graph.add_nodes_from(labels)
+    graph.add_edges_from(edges)
+
+    return {frozenset(component) for component in nx.connected_components(graph)}
+
+
+class DisjointSetTest(unittest.TestCase):
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        # Sparse labels, far apart and negative
+        self.labels = np.unique(random_state.randint(-2 ** 40, 2 ** 40, 300))
+        self.edges = random_state.choice(self.labels, (250, 2))
+
+    def test_union_edges(self):
+        disjoint_set = DisjointSet(self.labels)
+        disjoint_set.union_edges(self.edges)
+
+        expected = to_networkx_components(self.labels.tolist(), self.edges.tolist())
+        self.assertEqual(to_components(disjoint_set), expected)
+        self.assertEqual(disjoint_set.n_components, len(expected))
+        self.assertEqual(sorted(disjoint_set.component_sizes().tolist()), sorted(map(len, expected)))
+        # The arrays are sized by the number of labels
+        self.assertEqual(len(disjoint_set.parent), len(self.labels))
+
+    def test_union(self):
+        disjoint_set = DisjointSet()
+        merged = [disjoint_set.union(label_1, label_2) for label_1, label_2 in self.edges.tolist()]
+
+        expected = to_networkx_components(np.unique(self.edges).tolist(), self.edges.tolist())
+        self.assertEqual(to_components(disjoint_set), expected)
+        # Every merge removes a component
+        self.assertEqual(len(np.unique(self.edges)) - sum(merged), len(expected))
+
+        for label_1, label_2 in self.edges.tolist():
+            self.assertEqual(disjoint_set.find(label_1), disjoint_set.find(label_2))
+
+    def test_add_labels_later(self):
+        disjoint_set = DisjointSet([10, 20])
+        disjoint_set.union(10, 20)
+        # Labels that are smaller than the present labels change their indices
+        disjoint_set.union_edges([[5, 30], [1, 2]])
+        disjoint_set.add([1, 40])
+
+        self.assertEqual(disjoint_set.labels.tolist(), [1, 2, 5, 10, 20, 30, 40])
+        self.assertEqual(to_components(disjoint_set), {
+            frozenset({1, 2}), frozenset({5, 30}), frozenset({10, 20}), frozenset({40})
+        })
+        self.assertEqual(disjoint_set.contains([0, 1, 41]).tolist(), [False, True, False])
+
+    def test_empty(self):
+        disjoint_set = DisjointSet([])
+        disjoint_set.union_edges([])
+
+        self.assertEqual(disjoint_set.n_components, 0)
+        self.assertEqual(disjoint_set.contains([1]).tolist(), [False])
+
+
+class GraphComponentsTest(unittest.TestCase):
+    def test_components(self):
+        # Labels that are too large to index an array
+        vertices = np.arange(70) * 2 ** 40
+        edges = np.random.RandomState(1).randint(0, 70, (50, 2)) * 2 ** 40
+
+        expected = len(to_networkx_components(vertices.tolist(), edges.tolist()))
+        self.assertEqual(CSRGraph.from_edges(edges, vertices).n_components, expected)
+
+        graph = Graph()
+        for vertex in vertices.tolist():
+            graph.addVertex(vertex)
+        self.assertEqual(graph.componentsWithEdges(edges), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from lab.util import file_io
+from lab.util.distributed_graph import DistributedGraph, Vertex, ForeignVertex, FOREIGN
+from lab.util.meta_data import MetaData, CombinedMetaData
+
+# Edges of worker 0, which has the vertices 0 to 9, in the order in which they are added
+EDGES = [[3, 1], [1, 3], [3, 12], [1, 5], [3, 2], [7, 20]]
+
+
+def create_graph() -> DistributedGraph:
+    graph = DistributedGraph(0, CombinedMetaData([
+        MetaData(0, 0, 0, 9),
+        MetaData(1, 0, 10, 29)
+    ]))
+    graph.add_edges(EDGES[:3])
+    graph.add_edges(EDGES[3:])
+
+    return graph
+
+
+class DistributedGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = create_graph()
+
+    def test_arrays(self):
+        # The arrays are built when they are used
+        self.assertEqual(len(self.graph.edge_blocks), 2)
+        self.graph.build()
+        self.assertEqual(self.graph.edge_blocks, [])
+
+        self.assertEqual(self.graph.labels.tolist(), [1, 2, 3, 5, 7])
+        self.assertEqual(self.graph.offsets.tolist(), [0, 2, 2, 5, 5, 6])
+        # The edges of each vertex keep the order in which they were added
+        self.assertEqual(self.graph.neighbours.tolist(), [3, 5, 1, 12, 2, 20])
+        self.assertEqual(self.graph.neighbour_indices.tolist(), [2, 3, 0, FOREIGN, 1, FOREIGN])
+        self.assertEqual(self.graph.number_of_vertices, 5)
+        self.assertEqual(self.graph.number_of_edges, 6)
+
+    def test_add_edges_after_build(self):
+        self.graph.build()
+        self.graph.add_edges([[3, 0], [0, 3]])
+
+        self.assertEqual(self.graph.number_of_vertices, 6)
+        self.assertEqual(self.graph.labels.tolist(), [0, 1, 2, 3, 5, 7])
+        self.assertEqual([edge.to_vertex.label for edge in self.graph.vertices[3].edges], [1, 12, 2, 0])
+
+    def test_vertices(self):
+        vertex = self.graph.get_vertex(3)
+
+        self.assertIsInstance(vertex, Vertex)
+        self.assertEqual(vertex.degree, 3)
+        self.assertEqual([str(edge) for edge in vertex.edges], ['3 1', '3 12', '3 2'])
+        self.assertIsInstance(vertex.get_edge(1).to_vertex, ForeignVertex)
+        self.assertEqual(vertex.get_edge(0).to_vertex.degree, 2)
+
+        # A vertex of the worker without edges, and a vertex of another worker
+        self.assertEqual(self.graph.get_vertex(4).degree, 0)
+        self.assertIsInstance(self.graph.get_vertex(12), ForeignVertex)
+
+        self.assertEqual(list(self.graph.vertices), [1, 2, 3, 5, 7])
+        self.assertEqual(self.graph.vertices[7].degree, 1)
+        self.assertNotIn(4, self.graph.vertices)
+        with self.assertRaises(KeyError):
+            self.graph.vertices[12]
+
+    def test_has_vertices(self):
+        self.assertEqual(self.graph.has_vertices(np.array([0, 9, 10, -1])).tolist(), [True, True, False, False])
+        self.assertTrue(DistributedGraph(distributed=False).has_vertices(np.array([100])).all())
+
+    def test_edges(self):
+        expected = sorted(EDGES, key=lambda edge: edge[0])
+
+        self.assertEqual(self.graph.get_edge_array().tolist(), expected)
+        self.assertEqual(np.concatenate(list(self.graph.get_edge_blocks(4))).tolist(), expected)
+        self.assertEqual([len(block) for block in self.graph.get_edge_blocks(4)], [4, 2])
+
+    def test_write_to_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.txt')
+
+            self.graph.write_to_file(path, sort=False)
+            self.assertEqual(file_io.load_edges(path).tolist(), sorted(EDGES, key=lambda edge: edge[0]))
+
+            self.graph.write_to_file(path)
+            self.assertEqual(file_io.load_edges(path).tolist(), sorted(EDGES))
+
+            graph = DistributedGraph(distributed=False)
+            graph.load_from_file(path)
+            self.assertEqual(graph.get_edge_array().tolist(), sorted(EDGES))
+
+    def test_empty(self):
+        graph = DistributedGraph(distributed=False, data=['# no edges\n'])
+
+        self.assertEqual(graph.number_of_vertices, 0)
+        self.assertEqual(graph.get_edge_array().shape, (0, 2))
+        self.assertIsNone(graph.index_of(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
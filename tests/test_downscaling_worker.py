@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+
+from lab.downscaling.worker.Worker import Worker, RANDOM_WALKER_BATCH_SIZE
+from lab.util import message
+from lab.util.meta_data import MetaData, CombinedMetaData
+
+# Port of a worker that refuses connections
+REFUSED_PORT = 9999
+
+
+def create_worker(combined_meta_data: CombinedMetaData) -> Worker:
+    """
+    :return: Worker that records the messages it sends instead of sending them
+    """
+
+    worker = Worker.__new__(Worker)
+    worker.worker_id = 0
+    worker.combined_meta_data = combined_meta_data
+    worker.outgoing_random_walkers = {}
+    worker.sent_messages = []
+
+    def send_message_to_node(host, port, message_to_send):
+        if port == REFUSED_PORT:
+            raise ConnectionRefusedError
+        worker.sent_messages.append((port, message.read(message_to_send)))
+
+    worker.send_message_to_node = send_message_to_node
+
+    return worker
+
+
+class RandomWalkerHandOffTest(unittest.TestCase):
+    def setUp(self):
+        self.worker = create_worker(CombinedMetaData([
+            MetaData(0, 0, 0, 9, 'localhost', 8000),
+            MetaData(1, 0, 10, 19, 'localhost', 8001),
+            MetaData(2, 0, 20, 29, 'localhost', 8002)
+        ]))
+
+    def test_batch_per_worker(self):
+        self.worker.add_outgoing_random_walkers(np.array([10, 20, 11, 21, 12]))
+        self.assertEqual(self.worker.sent_messages, [])
+        self.assertEqual(self.worker.number_of_outgoing_random_walkers, 5)
+
+        self.worker.send_random_walker_messages()
+        self.assertEqual(sorted(self.worker.sent_messages), [
+            (8001, (message.RANDOM_WALKER, [10, 11, 12])),
+            (8002, (message.RANDOM_WALKER, [20, 21]))
+        ])
+        self.assertEqual(self.worker.outgoing_random_walkers, {})
+
+    def test_send_full_batch(self):
+        self.worker.add_outgoing_random_walkers(np.full(RANDOM_WALKER_BATCH_SIZE, 15))
+
+        self.assertEqual(self.worker.sent_messages, [(8001, (message.RANDOM_WALKER, [15] * RANDOM_WALKER_BATCH_SIZE))])
+        self.assertEqual(self.worker.number_of_outgoing_random_walkers, 0)
+
+    def test_keep_undelivered_random_walkers(self):
+        # The worker of the vertices can not be reached, or it is not registered yet
+        self.worker.combined_meta_data[1].port = REFUSED_PORT
+        self.worker.add_outgoing_random_walkers(np.array([10, 11]))
+        self.worker.send_random_walker_messages()
+        self.assertEqual(self.worker.outgoing_random_walkers, {1: [10, 11]})
+
+        self.worker.combined_meta_data[1].host = None
+        self.worker.send_random_walker_messages()
+        self.assertEqual(self.worker.outgoing_random_walkers, {1: [10, 11]})
+
+        self.worker.combined_meta_data[1].set_connection_info('localhost', 8001)
+        self.worker.send_random_walker_messages()
+        self.assertEqual(self.worker.sent_messages, [(8001, (message.RANDOM_WALKER, [10, 11]))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+
+from lab.util.edge_set import EdgeSet, KEY_BITS, WIDE_KEY_DTYPE, to_keys, to_edges
+
+
+class EdgeSetTest(unittest.TestCase):
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        self.edges = random_state.randint(0, 50, (1000, 2))
+        self.blocks = np.array_split(self.edges, 37)
+
+    def test_add_edges(self):
+        edge_set = EdgeSet()
+        seen = set()
+
+        for block in self.blocks:
+            is_new = edge_set.add_edges(block)
+
+            expected = []
+            for edge in map(tuple, block.tolist()):
+                expected.append(edge not in seen)
+                seen.add(edge)
+            self.assertEqual(is_new.tolist(), expected)
+
+        self.assertEqual(len(edge_set), len(seen))
+        self.assertEqual(edge_set.edges().tolist(), sorted(map(list, seen)))
+        # There are at most logarithmically many runs
+        self.assertLessEqual(len(edge_set.runs), int(np.log2(len(seen))) + 1)
+
+    def test_contains(self):
+        edge_set = EdgeSet(self.edges[:500])
+        expected = {tuple(edge) for edge in self.edges[:500].tolist()}
+
+        is_present = [tuple(edge) in expected for edge in self.edges.tolist()]
+        self.assertEqual(edge_set.contains(self.edges).tolist(), is_present)
+        self.assertIn(tuple(self.edges[0]), edge_set)
+        self.assertNotIn((50, 50), edge_set)
+        # Edges that cannot be packed are not in a set of packed keys
+        self.assertEqual(edge_set.contains([[-1, 0], [2 ** KEY_BITS, 0]]).tolist(), [False, False])
+        self.assertFalse(edge_set.is_wide)
+
+    def test_wide_labels(self):
+        edge_set = EdgeSet(self.edges)
+        wide_edges = [[5000000000, 1], [1, 2 ** 40], [-3, 4], [5000000000, 1]]
+
+        self.assertEqual(edge_set.add_edges(wide_edges).tolist(), [True, True, True, False])
+        self.assertTrue(edge_set.is_wide)
+        self.assertEqual(edge_set.keys().dtype, WIDE_KEY_DTYPE)
+
+        expected = sorted({tuple(edge) for edge in self.edges.tolist() + wide_edges})
+        self.assertEqual(len(edge_set), len(expected))
+        self.assertEqual(list(map(tuple, edge_set.edges().tolist())), expected)
+        self.assertEqual(edge_set.contains(self.edges).tolist(), [True] * len(self.edges))
+        self.assertIn((1, 2 ** 40), edge_set)
+        self.assertNotIn((2 ** 40, 1), edge_set)
+
+        # Packed edges are added to the wide keys
+        self.assertEqual(edge_set.add_edges([[50, 50], [-3, 4]]).tolist(), [True, False])
+        self.assertIn((50, 50), edge_set)
+
+    def test_empty(self):
+        edge_set = EdgeSet()
+
+        self.assertEqual(len(edge_set), 0)
+        self.assertEqual(edge_set.edges().shape, (0, 2))
+        self.assertEqual(edge_set.add_edges(np.zeros((0, 2))).tolist(), [])
+        self.assertNotIn((0, 0), edge_set)
+
+        # The first edges can already be wide
+        edge_set.add_edges([[2 ** 40, 0]])
+        self.assertEqual(edge_set.edges().tolist(), [[2 ** 40, 0]])
+
+    def test_keys(self):
+        edges = np.array([[0, 0], [1, 2], [2 ** KEY_BITS - 1, 7]])
+
+        self.assertEqual(to_edges(to_keys(edges)).tolist(), edges.tolist())
+        with self.assertRaises(ValueError):
+            to_keys([[2 ** KEY_BITS, 0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
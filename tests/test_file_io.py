@@ -0,0 +1,144 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from lab.util import file_io
+
+# Edge file in the format of SNAP, with a header, tabs and a trailing empty line
+SNAP_TEXT = '# Directed graph\n# FromNodeId\tToNodeId\n1\t2\n1\t3\n\n2 3 0.5\n3\t1\n# end\n\n'
+SNAP_EDGES = [[1, 2], [1, 3], [2, 3], [3, 1]]
+
+
+class FileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, text: str, name: str = 'graph.txt') -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as f:
+            f.write(text)
+
+        return path
+
+
+class ParseTest(FileTestCase):
+    def test_parse_edges(self):
+        self.assertEqual(file_io.parse_edges(SNAP_TEXT).tolist(), SNAP_EDGES)
+        self.assertEqual(file_io.parse_edges(SNAP_TEXT.splitlines()).tolist(), SNAP_EDGES)
+        self.assertEqual(file_io.parse_edges('# only a comment\n').shape, (0, 2))
+        self.assertEqual(file_io.parse_edges('5000000000 1').tolist(), [[5000000000, 1]])
+
+    def test_read_edges_in_blocks(self):
+        path = self.write(SNAP_TEXT)
+
+        for block_size in [1, 3, 7, 1000]:
+            blocks = list(file_io.read_edges(path, block_size))
+            self.assertEqual(np.concatenate(blocks).tolist(), SNAP_EDGES)
+
+        self.assertEqual(file_io.load_edges(self.write('', 'empty.txt')).shape, (0, 2))
+
+    def test_start_vertex(self):
+        self.assertEqual(file_io.get_start_vertex('12 3\n'), 12)
+        self.assertEqual(file_io.get_start_vertex('12\t3\n'), 12)
+        self.assertEqual(file_io.get_start_vertex('  12  3'), 12)
+        self.assertIsNone(file_io.get_start_vertex('# 12 3\n'))
+        self.assertIsNone(file_io.get_start_vertex('\n'))
+        self.assertIsNone(file_io.get_start_vertex(''))
+
+    def test_first_and_last_line(self):
+        path = self.write(SNAP_TEXT)
+
+        self.assertEqual(file_io.get_first_line(path), '1\t2\n')
+        self.assertEqual(file_io.get_last_line(path), '3\t1\n')
+        self.assertEqual(file_io.get_first_line(self.write('# header\n', 'comments.txt')), '')
+        self.assertEqual(file_io.get_last_line(self.write('# header\n', 'comments.txt')), '')
+        self.assertEqual(file_io.get_last_line(self.write('1 2', 'unterminated.txt')), '1 2\n')
+
+    def test_last_line_across_blocks(self):
+        lines = [f'{i} {i + 1}\n' for i in range(1000)]
+        path = self.write(''.join(lines) + '# ' + 'x' * 100 + '\n\n')
+
+        block_size = file_io.LAST_LINE_BLOCK_SIZE
+        try:
+            for file_io.LAST_LINE_BLOCK_SIZE in [1, 5, 64, 4096]:
+                self.assertEqual(file_io.get_last_line(path), lines[-1])
+        finally:
+            file_io.LAST_LINE_BLOCK_SIZE = block_size
+
+
+class ReadInChunksTest(FileTestCase):
+    def test_chunks(self):
+        edges = np.random.RandomState(0).randint(0, 100, (1000, 2))
+        edges = edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+        lines = [f'{vertex_1}\t{vertex_2}\n' for vertex_1, vertex_2 in edges.tolist()]
+        path = self.write('# header\n' + ''.join(lines[:500]) + '# comment\n\n' + ''.join(lines[500:]))
+
+        with open(path) as f:
+            chunks = list(file_io.read_in_chunks(f, 4))
+
+        self.assertEqual(len(chunks), 4)
+        # Every edge is in one chunk, comments and empty lines are skipped
+        self.assertEqual([line for chunk in chunks for line in chunk], lines)
+
+        # Each start vertex is in a single chunk
+        start_vertices = [{file_io.get_start_vertex(line) for line in chunk} for chunk in chunks]
+        for i, vertices in enumerate(start_vertices):
+            for other_vertices in start_vertices[i + 1:]:
+                self.assertEqual(vertices & other_vertices, set())
+
+
+class SortTest(FileTestCase):
+    def setUp(self):
+        super().setUp()
+        random_state = np.random.RandomState(0)
+        # Labels that do not fit in 32 bits, negative labels and many duplicates
+        self.edges = np.concatenate((
+            random_state.randint(0, 20, (2000, 2)),
+            random_state.randint(-2 ** 40, 2 ** 40, (500, 2)),
+            [[5000000000, 1], [1, 5000000000], [5000000000, 1]]
+        ))
+
+    def test_write_sorted_edges(self):
+        path = os.path.join(self.directory.name, 'graph.txt')
+        expected = sorted(self.edges.tolist())
+
+        for run_size in [1, 7, 1000, len(self.edges), file_io.SORT_RUN_SIZE]:
+            file_io.write_sorted_edges(path, np.array_split(self.edges, 13), run_size)
+            self.assertEqual(file_io.load_edges(path).tolist(), expected)
+
+        # The runs are removed
+        self.assertEqual(os.listdir(self.directory.name), ['graph.txt'])
+
+    def test_merge_runs(self):
+        run_paths = []
+        for i, run in enumerate(np.array_split(self.edges, 5)):
+            run_paths.append(os.path.join(self.directory.name, f'{i}.npy'))
+            np.save(run_paths[-1], file_io.sort_edges(run))
+        path = os.path.join(self.directory.name, 'graph.txt')
+
+        merge_block_size = file_io.MERGE_BLOCK_SIZE
+        try:
+            for file_io.MERGE_BLOCK_SIZE in [1, 3, 64, 2 ** 16]:
+                with open(path, 'w') as f:
+                    file_io.merge_runs(f, run_paths)
+                self.assertEqual(file_io.load_edges(path).tolist(), sorted(self.edges.tolist()))
+        finally:
+            file_io.MERGE_BLOCK_SIZE = merge_block_size
+
+    def test_sort_file(self):
+        path = self.write('5000000000 1\n3 2\n# comment\n3 1\n')
+
+        file_io.sort_file(path, run_size=2)
+        self.assertEqual(file_io.load_edges(path).tolist(), [[3, 1], [3, 2], [5000000000, 1]])
+
+        file_io.sort_file(self.write('', 'empty.txt'))
+        self.assertEqual(file_io.load_edges(os.path.join(self.directory.name, 'empty.txt')).shape, (0, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
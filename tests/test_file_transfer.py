@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+
+from lab.master.WorkerInterface import WorkerInterface
+from lab.util import message
+from lab.util.file_transfer import FileStreamServer, StreamReceiver, StreamFailed, get_checksum, FileSender, \
+    FileReceiver, WINDOW_SIZE
+
+
+class FileStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'graph.txt')
+        with open(self.path, 'w') as f:
+            f.writelines([f'{i} {i + 1}\n' for i in range(100000)])
+
+        self.server = FileStreamServer(self.path)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.terminate()
+        self.directory.cleanup()
+
+    def test_stream_and_remove(self):
+        path = os.path.join(self.directory.name, 'received.txt')
+        receiver = StreamReceiver('localhost', self.server.port, self.server.size, self.server.checksum, path)
+        receiver.receive()
+
+        self.assertTrue(receiver.received_complete_file)
+        self.assertEqual(get_checksum(path), self.server.checksum)
+
+        with open(self.path) as f:
+            self.assertEqual(receiver.file, f.readlines())
+
+        # The received file is removed once it is read
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(len(receiver.file), 100000)
+
+    def test_checksum_mismatch(self):
+        path = os.path.join(self.directory.name, 'received.txt')
+        receiver = StreamReceiver('localhost', self.server.port, self.server.size, self.server.checksum + 1, path)
+
+        with self.assertRaises(StreamFailed):
+            receiver.receive()
+
+    def test_worker_removes_streamed_files(self):
+        worker = WorkerInterface.__new__(WorkerInterface)
+        worker.worker_id = 0
+        worker.file_receivers = {message.GRAPH: None}
+        worker.stream_directory = tempfile.mkdtemp(dir=self.directory.name)
+        worker.send_message_to_master = lambda message_to_send: None
+
+        worker.handle_stream_file(0, message.GRAPH, 'localhost', self.server.port, self.server.size,
+                                  self.server.checksum)
+        self.assertEqual(len(os.listdir(worker.stream_directory)), 1)
+
+        # Streaming the file again replaces the previous file
+        worker.handle_stream_file(0, message.GRAPH, 'localhost', self.server.port, self.server.size,
+                                  self.server.checksum)
+        self.assertEqual(len(os.listdir(worker.stream_directory)), 1)
+
+        self.assertEqual(len(worker.file_receivers[message.GRAPH].file), 100000)
+        self.assertEqual(os.listdir(worker.stream_directory), [])
+
+        worker.remove_stream_directory()
+        self.assertFalse(os.path.exists(worker.stream_directory))
+
+
+def transfer(sender: FileSender, dropped_indices: set) -> (FileReceiver, int):
+    """
+    Transfers a file from the sender to a receiver, the first transmission of the chunks with the dropped indices is
+    lost
+
+    :return: Receiver and the maximum number of chunks that were send but not acknowledged
+    """
+
+    receiver = FileReceiver(len(sender.messages), sender.encoding)
+    dropped_indices = set(dropped_indices)
+    max_in_flight = 0
+
+    for _ in range(1000):
+        for encoded in sender.get_messages_to_send():
+            status, *arguments = message.read(encoded)
+
+            if status == message.FILE_CHUNK:
+                _, _, index, chunk = arguments
+                max_in_flight = max(max_in_flight, sender.index - sender.first_unacknowledged_index)
+
+                if index in dropped_indices:
+                    dropped_indices.remove(index)
+                elif receiver.receive_chunk(index, chunk):
+                    sender.handle_acknowledgement(receiver.get_received_ranges())
+            elif status == message.END_SEND_FILE:
+                if receiver.received_complete_file:
+                    sender.target_received_file = True
+                else:
+                    sender.handle_acknowledgement(receiver.get_received_ranges())
+
+        if sender.target_received_file:
+            return receiver, max_in_flight
+
+    raise AssertionError('The transfer did not complete')
+
+
+class SlidingWindowTest(unittest.TestCase):
+    def setUp(self):
+        self.lines = [f'{i} {i * 7 % 1000}\n' for i in range(20000)]
+
+    def test_transfer(self):
+        sender = FileSender(0, message.GRAPH, self.lines, chunk_size=1000)
+        receiver, max_in_flight = transfer(sender, set())
+
+        self.assertEqual(receiver.file, self.lines)
+        self.assertLessEqual(max_in_flight, WINDOW_SIZE)
+
+    def test_retransmit_lost_chunks(self):
+        sender = FileSender(0, message.GRAPH, self.lines, chunk_size=1000)
+        # Chunks in the middle of the window, at its end and the last chunk are lost
+        receiver, max_in_flight = transfer(sender, {3, WINDOW_SIZE - 1, 40, 41, len(sender.messages) - 1})
+
+        self.assertEqual(receiver.file, self.lines)
+        self.assertLessEqual(max_in_flight, WINDOW_SIZE)
+
+    def test_acknowledged_ranges(self):
+        receiver = FileReceiver(10)
+        for index in [0, 1, 2, 5, 7, 8]:
+            receiver.receive_chunk(index, f'{index}\n'.encode())
+
+        self.assertEqual(receiver.get_received_ranges(), [(0, 3), (5, 6), (7, 9)])
+        # A retransmitted chunk is acknowledged again
+        self.assertTrue(receiver.receive_chunk(5, b'5\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from lab.util import validation
+from lab.util.graph import Graph, CSRGraph, BINARY_HEADER_FILE, load_graph
+
+EDGES = [[0, 1], [1, 2], [2, 3], [0, 2], [2, 0], [5, 5]]
+
+
+def create_graph(edges, vertices=()) -> Graph:
+    graph = Graph()
+    for vertex in vertices:
+        graph.addVertex(vertex)
+    graph.addEdgeSet(edges)
+
+    return graph
+
+
+class GraphTest(unittest.TestCase):
+    def assert_same_edges(self, graph: Graph, other_graph: Graph):
+        self.assertEqual(graph.vertices, other_graph.vertices)
+        self.assertEqual(graph.edges, other_graph.edges)
+
+    def test_add_edge_array(self):
+        edges = np.random.RandomState(0).randint(0, 50, (500, 2)).tolist()
+
+        for bidirectional in [True, False]:
+            graph = Graph()
+            self.assertEqual(graph.add_edge_array(edges[:300], bidirectional), len(set(
+                tuple(sorted(edge)) if bidirectional else tuple(edge) for edge in edges[:300])))
+            # Edges that are already in the graph are skipped
+            graph.add_edge_array(edges[200:], bidirectional)
+
+            other_graph = Graph()
+            other_graph.addEdgeSet(edges, bidirectional)
+
+            self.assert_same_edges(graph, other_graph)
+
+    def test_skip_existing_edges(self):
+        graph = Graph()
+        graph.add_edge_array([[1, 2], [2, 3]])
+
+        self.assertEqual(graph.has_edges(np.array([[1, 2], [2, 1], [3, 2], [1, 3], [4, 1]])).tolist(),
+                        [True, True, True, False, False])
+        self.assertEqual(graph.add_edge_array([[2, 1], [3, 1], [2 ** 40, 1]]), 2)
+        self.assertEqual(sorted(graph.edges[graph.vertices_dict[1]]), [2, 3, 2 ** 40])
+
+    def test_cleanup(self):
+        graph = Graph()
+        for vertex in range(6):
+            graph.addVertex(vertex)
+        graph.add_edge_array([[1, 2], [4, 5]], bidirectional=False)
+
+        graph.cleanup()
+
+        self.assertEqual(graph.vertices, [1, 4])
+        self.assertEqual(sorted(graph.vertices_dict.keys()), [1, 4])
+        self.assertEqual(sorted(graph.edges.keys()), [1, 4])
+
+
+class CSRGraphTest(unittest.TestCase):
+    def assert_same_graph(self, csr_graph: CSRGraph, graph: Graph):
+        self.assertEqual(csr_graph.vertices.tolist(), sorted(graph.vertices))
+        self.assertEqual(csr_graph.n_vertices, graph.n_vertices)
+        self.assertEqual(csr_graph.n_edges, graph.n_edges)
+        self.assertEqual(csr_graph.max_degree(), graph.max_degree())
+
+        # Graph only has inverse edges of the vertices that are a target of an edge
+        graph.init_inverse_edges()
+        for vertex in graph.vertices:
+            self.assertEqual(csr_graph.edges[vertex].tolist(), sorted(graph.edges[vertex]))
+            self.assertEqual(csr_graph.degree(vertex), graph.degree(vertex))
+            self.assertEqual(csr_graph.indegree(vertex), len(graph.inverse_edges.get(vertex, [])))
+
+        self.assertEqual(sorted((edge.vertex_1, edge.vertex_2) for edge in csr_graph.raw_edges),
+                         sorted((edge.vertex_1, edge.vertex_2) for edge in graph.raw_edges))
+
+    def test_from_edges(self):
+        self.assert_same_graph(CSRGraph.from_edges(EDGES, vertices=[7]), create_graph(EDGES, vertices=[7]))
+
+    def test_from_graph(self):
+        graph = create_graph(EDGES, vertices=[7])
+        self.assert_same_graph(CSRGraph.from_graph(graph), graph)
+
+    def test_to_graph(self):
+        csr_graph = CSRGraph.from_edges(EDGES, vertices=[7])
+        self.assert_same_graph(csr_graph, csr_graph.to_graph())
+
+    def test_labels_with_gaps(self):
+        edges = [[10, 2 ** 40], [2 ** 40, 3], [3, 10]]
+        csr_graph = CSRGraph.from_edges(edges)
+
+        self.assertFalse(csr_graph.is_contiguous)
+        self.assert_same_graph(csr_graph, create_graph(edges))
+        with self.assertRaises(KeyError):
+            csr_graph.edges[11]
+
+    def test_degrees(self):
+        csr_graph = CSRGraph.from_edges([[0, 1], [0, 2], [1, 2]], bidirectional=False)
+
+        np.testing.assert_array_equal(csr_graph.degrees(), [2, 1, 0])
+        np.testing.assert_array_equal(csr_graph.indegrees(), [0, 1, 2])
+        np.testing.assert_array_equal(csr_graph.bidegrees(), [2, 2, 2])
+        self.assertEqual(csr_graph.inverse_edges[2].tolist(), [0, 1])
+
+    def test_empty(self):
+        csr_graph = CSRGraph.from_edges([])
+
+        self.assertEqual(csr_graph.n_vertices, 0)
+        self.assertEqual(csr_graph.n_edges, 0)
+        self.assertEqual(csr_graph.max_degree(), 0)
+
+
+class BinaryGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'graph')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_csr_graph_round_trip(self):
+        csr_graph = CSRGraph.from_edges([[10, 2 ** 40], [2 ** 40, 3], [3, 10]], vertices=[7])
+        csr_graph.save_binary(self.path)
+
+        for mmap in [True, False]:
+            loaded_graph = CSRGraph.load_binary(self.path, mmap)
+            for name in ['labels', 'offsets', 'neighbours']:
+                np.testing.assert_array_equal(getattr(loaded_graph, name), getattr(csr_graph, name))
+
+        self.assertEqual(load_graph(self.path).n_edges, csr_graph.n_edges)
+        self.assertEqual(validation.assert_graph('graph', self.path), self.path)
+
+    def test_graph_round_trip(self):
+        graph = create_graph(EDGES, vertices=[7]).copy()
+        # A parallel edge
+        graph.addEdge(graph.vertices_dict[0], graph.vertices_dict[1], ignore_duplicates=True)
+        graph.save_as_binary(self.path)
+
+        loaded_graph = Graph().load_binary(self.path)
+
+        self.assertEqual(loaded_graph.id, graph.id)
+        self.assertEqual(loaded_graph.n_edges, graph.n_edges)
+        self.assertEqual(sorted(loaded_graph.vertices), sorted(graph.vertices))
+        for vertex in graph.vertices:
+            self.assertEqual(loaded_graph.edges[loaded_graph.vertices_dict[vertex.label]], sorted(graph.edges[vertex]))
+        self.assertEqual(loaded_graph.edges[loaded_graph.vertices_dict[0]], [1, 1, 2])
+
+    def test_incomplete_graph(self):
+        CSRGraph.from_edges(EDGES).save_binary(self.path)
+
+        header_path = os.path.join(self.path, BINARY_HEADER_FILE)
+        with open(header_path) as f:
+            header = json.load(f)
+
+        header['n_edges'] += 1
+        with open(header_path, 'w') as f:
+            json.dump(header, f)
+        with self.assertRaises(ValueError):
+            CSRGraph.load_binary(self.path)
+
+        # A graph without header was not written completely
+        os.remove(header_path)
+        with self.assertRaises(AssertionError):
+            validation.assert_graph('graph', self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+from lab.util import instrumentation, message, sockets
+from lab.util.instrumentation import Histogram, TrafficStatistics, LATENCY_BUCKETS, DECODE, DISPATCH
+from lab.util.server import Server
+
+
+class HistogramTest(unittest.TestCase):
+    def test_quantiles(self):
+        histogram = Histogram()
+        for i in range(99):
+            histogram.add(1.5e-6)
+        histogram.add(100)
+
+        self.assertEqual(histogram.quantile(0.5), 2e-6)
+        self.assertEqual(histogram.quantile(0.99), 2e-6)
+        # Values above the largest bound are counted in the last bucket
+        self.assertEqual(histogram.quantile(1), 100)
+        self.assertEqual(histogram.to_dict()['histogram'], {'2e-06': 99, 'inf': 1})
+        self.assertGreater(100, LATENCY_BUCKETS[-1])
+
+
+class TrafficStatisticsTest(unittest.TestCase):
+    def test_to_dict(self):
+        statistics = TrafficStatistics()
+        statistics.record_sent(message.ALIVE, 'host:8000', 10)
+        statistics.record_sent(message.ALIVE, 'host:8000', 20)
+        statistics.record_received(message.DEBUG, 'host:8001', 5)
+        statistics.record_latency(DISPATCH, message.DEBUG, 'host:8001', 1e-3)
+        statistics.record_latency(DISPATCH, message.DEBUG, 'host:8002', 1e-3)
+
+        statistics_dict = statistics.to_dict(message.STATUS_NAMES)
+        alive, debug = message.STATUS_NAMES[message.ALIVE], message.STATUS_NAMES[message.DEBUG]
+
+        self.assertEqual(statistics_dict['sent'], {alive: {'host:8000': {'messages': 2, 'bytes': 30}}})
+        self.assertEqual(statistics_dict['received'], {debug: {'host:8001': {'messages': 1, 'bytes': 5}}})
+        self.assertEqual(set(statistics_dict['latencies'][DISPATCH][debug].keys()), {'host:8001', 'host:8002'})
+
+
+class PeerTest(unittest.TestCase):
+    def setUp(self):
+        self.statistics = instrumentation.statistics
+        instrumentation.statistics = TrafficStatistics()
+
+        self.server = Server()
+        self.received = []
+        self.server.message_interface = {
+            message.ALIVE: lambda worker_id: self.received.append(worker_id)
+        }
+
+    def tearDown(self):
+        sockets.close_connection(self.server.hostname, self.server.port)
+        self.server.server.terminate()
+        instrumentation.statistics = self.statistics
+
+    def test_same_peer_in_both_directions(self):
+        # The server sends to itself, so it is both the sender and the receiver
+        sockets.send_message(self.server.hostname, self.server.port, message.write_alive(1))
+        self.assertTrue(self.server.wait_for(lambda: len(self.received) == 1, timeout=5))
+
+        peer = f'{self.server.hostname}:{self.server.port}'
+        alive = message.STATUS_NAMES[message.ALIVE]
+        statistics = self.server.get_traffic_statistics()
+
+        self.assertEqual(list(statistics['sent'][alive].keys()), [peer])
+        self.assertEqual(list(statistics['received'][alive].keys()), [peer])
+        self.assertEqual(list(statistics['latencies'][DECODE][alive].keys()), [peer])
+        self.assertEqual(list(statistics['latencies'][DISPATCH][alive].keys()), [peer])
+
+
+if __name__ == '__main__':
+    unittest.main()
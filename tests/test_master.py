@@ -0,0 +1,164 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+from lab.master.Master import Master
+from lab.master.failure_detector import AccrualFailureDetector
+from lab.master.worker_info import WorkerInfoCollection, WorkerInfo
+from lab.util import message
+from lab.util.meta_data import MetaData
+
+# Port of a worker that refuses connections
+REFUSED_PORT = 9999
+
+
+def create_master(number_of_workers: int) -> Master:
+    """
+    :return: Master of unregistered workers, without server and processes
+    """
+
+    master = Master.__new__(Master)
+    master.show_debug_messages = False
+    master.worker_info_collection = WorkerInfoCollection()
+    for worker_id in range(number_of_workers):
+        master.worker_info_collection[worker_id] = WorkerInfo(
+            worker_id=worker_id,
+            input_sub_graph_path='',
+            meta_data=MetaData(worker_id, 0, 0, 0),
+            hostname='localhost'
+        )
+
+    master.message_interface = {
+        message.ALIVE: master.handle_alive,
+        message.REGISTER: master.handle_register,
+        message.PROGRESS: master.handle_progress
+    }
+
+    return master
+
+
+class AccrualFailureDetectorTest(unittest.TestCase):
+    def test_no_heartbeat(self):
+        failure_detector = AccrualFailureDetector()
+
+        self.assertEqual(failure_detector.phi(100), 0)
+        self.assertFalse(failure_detector.is_available(100))
+
+    def test_suspect_after_silence(self):
+        failure_detector = AccrualFailureDetector()
+        for i in range(20):
+            failure_detector.heartbeat(i * 0.5)
+
+        self.assertTrue(failure_detector.is_available(10))
+        # The suspicion grows with the silence, without overflowing
+        self.assertLess(failure_detector.phi(10), failure_detector.phi(11))
+        self.assertFalse(failure_detector.is_available(20))
+        self.assertGreater(failure_detector.phi(10 ** 6), failure_detector.threshold)
+
+        failure_detector.heartbeat(20)
+        self.assertTrue(failure_detector.is_available(20))
+
+    def test_adapt_to_irregular_heartbeats(self):
+        regular, irregular = AccrualFailureDetector(), AccrualFailureDetector()
+        for i in range(20):
+            regular.heartbeat(i)
+            irregular.heartbeat(i + (0.9 if i % 2 else 0))
+
+        self.assertLess(irregular.phi(22), regular.phi(22))
+
+
+class HandleMessageTest(unittest.TestCase):
+    def setUp(self):
+        self.master = create_master(2)
+        self.master.handle_message(message.REGISTER, 0, 'host', 8000, peer='host:8000')
+
+    def test_register(self):
+        worker_info = self.master.worker_info_collection[0]
+
+        self.assertEqual(worker_info.meta_data.get_connection_info(), ('host', 8000))
+        self.assertIsNotNone(worker_info.failure_detector.last_heartbeat_at)
+
+    def test_message_is_heartbeat(self):
+        self.master.handle_message(message.PROGRESS, 0, 10, peer='host:8000')
+        # Senders without server can not be told apart
+        self.master.handle_message(message.PROGRESS, 0, 20, peer=None)
+
+        self.assertEqual(self.master.worker_info_collection[0].progress, 20)
+        self.assertEqual(len(self.master.worker_info_collection[0].failure_detector.intervals), 4)
+
+    def test_ignore_unregistered_process(self):
+        # A late message of the process that was replaced
+        self.master.handle_message(message.PROGRESS, 0, 10, peer='host:7000')
+        # A message of a worker that is not registered
+        self.master.handle_message(message.PROGRESS, 1, 10, peer='host:8001')
+
+        self.assertEqual(self.master.worker_info_collection[0].progress, 0)
+        self.assertEqual(self.master.worker_info_collection[1].progress, 0)
+        self.assertIsNone(self.master.worker_info_collection[1].failure_detector.last_heartbeat_at)
+
+    def test_only_statuses_of_workers_are_heartbeats(self):
+        self.master.message_interface[message.META_DATA] = lambda all_meta_data: None
+
+        # The first argument is not the id of a worker
+        self.master.handle_message(message.META_DATA, [{'worker_id': 1}], peer='host:8000')
+        self.assertIsNone(self.master.worker_info_collection[1].failure_detector.last_heartbeat_at)
+
+
+class FanOutTest(unittest.TestCase):
+    def setUp(self):
+        self.master = create_master(3)
+        self.master.executor = ThreadPoolExecutor(max_workers=3)
+        self.sent_messages = []
+
+        def send_message_to_worker(worker_id, message_to_send):
+            if self.master.worker_info_collection[worker_id].meta_data.port == REFUSED_PORT:
+                raise ConnectionRefusedError
+            self.sent_messages.append((worker_id, message_to_send))
+
+        self.master.send_message_to_worker = send_message_to_worker
+
+    def tearDown(self):
+        self.master.executor.shutdown()
+
+    def test_concurrent_calls(self):
+        # Each call only returns once all calls were made
+        barrier = Barrier(3, timeout=5)
+
+        self.assertEqual(self.master.fan_out(lambda worker_id: barrier.wait(), [0, 1, 2]), {})
+
+    def test_collect_errors(self):
+        def send(worker_id, data):
+            if worker_id == 1:
+                raise ConnectionRefusedError
+            self.sent_messages.append((worker_id, data))
+
+        errors = self.master.fan_out(send, [0, 1, 2], b'data')
+
+        self.assertEqual(list(errors.keys()), [1])
+        self.assertIsInstance(errors[1], ConnectionRefusedError)
+        self.assertEqual(sorted(self.sent_messages), [(0, b'data'), (2, b'data')])
+
+    def test_broadcast(self):
+        self.master.worker_info_collection[0].meta_data.set_connection_info('host', 8000)
+        self.master.worker_info_collection[1].meta_data.set_connection_info('host', 8001)
+
+        # Unregistered workers are skipped
+        self.master.broadcast(b'message')
+        self.assertEqual(sorted(self.sent_messages), [(0, b'message'), (1, b'message')])
+
+        # A registered worker that refuses the connection
+        self.master.worker_info_collection[1].meta_data.port = REFUSED_PORT
+
+        self.sent_messages.clear()
+        self.master.broadcast(b'message', allow_connection_refused=True)
+        self.assertEqual(self.sent_messages, [(0, b'message')])
+
+        # Every worker is sent to before the error is raised
+        self.sent_messages.clear()
+        with self.assertRaises(ConnectionRefusedError):
+            self.master.broadcast(b'message')
+        self.assertEqual(self.sent_messages, [(0, b'message')])
+
+
+if __name__ == '__main__':
+    unittest.main()
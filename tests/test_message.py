@@ -0,0 +1,61 @@
+import unittest
+
+from lab.util import message
+
+# Encoded messages and how they are read
+MESSAGES = [
+    (lambda: message.write_alive(3), (message.ALIVE, 3)),
+    (lambda: message.write_register(3, 'host', 8000), (message.REGISTER, 3, 'host', 8000)),
+    (lambda: message.write_meta_data([{'worker_id': 0, 'min_vertex': 1}]),
+     (message.META_DATA, [{'worker_id': 0, 'min_vertex': 1}])),
+    (lambda: message.write_debug(3, 'debug ✓'), (message.DEBUG, 3, 'debug ✓')),
+    (lambda: message.write_random_walker([1, 2 ** 40, 3]), (message.RANDOM_WALKER, [1, 2 ** 40, 3])),
+    (lambda: message.write_job(message.FINISH_JOB), (message.FINISH_JOB,)),
+    (lambda: message.write_job(message.JOB_COMPLETE, 3, {'sent': {}}), (message.JOB_COMPLETE, 3, {'sent': {}})),
+    (lambda: message.write_worker_failed(), (message.WORKER_FAILED,)),
+    (lambda: message.write_random_walker_count(3, 10), (message.RANDOM_WALKER_COUNT, 3, 10)),
+    (lambda: message.write_continue(), (message.CONTINUE,)),
+    (lambda: message.write_start_send_file(3, message.GRAPH, 5, 2), (message.START_SEND_FILE, 3, message.GRAPH, 5, 2)),
+    (lambda: message.write_file_chunk(3, message.BACKUP, 4, b'\0\xff chunk'),
+     (message.FILE_CHUNK, 3, message.BACKUP, 4, b'\0\xff chunk')),
+    (lambda: message.write_acknowledge_chunks(3, message.GRAPH, [(0, 2), (5, 6)]),
+     (message.ACKNOWLEDGE_CHUNKS, 3, message.GRAPH, [(0, 2), (5, 6)])),
+    (lambda: message.write_received_file(3, message.GRAPH), (message.RECEIVED_FILE, 3, message.GRAPH)),
+    (lambda: message.write_end_send_file(3, message.GRAPH), (message.END_SEND_FILE, 3, message.GRAPH)),
+    (lambda: message.write_progress(3, 100), (message.PROGRESS, 3, 100)),
+    (lambda: message.write_stream_file(3, message.GRAPH, 'host', 8000, 2 ** 33, 123),
+     (message.STREAM_FILE, 3, message.GRAPH, 'host', 8000, 2 ** 33, 123)),
+]
+
+
+class MessageCodecTest(unittest.TestCase):
+    def setUp(self):
+        self.message_codec = message.message_codec
+
+    def tearDown(self):
+        message.message_codec = self.message_codec
+
+    def test_round_trip(self):
+        for codec in [message.JSON, message.BINARY]:
+            message.message_codec = codec
+
+            for write, expected in MESSAGES:
+                with self.subTest(codec=codec, status=expected[0]):
+                    encoded = write()
+                    self.assertEqual(message.read(encoded), expected)
+                    self.assertEqual(message.peek_status(encoded), expected[0])
+
+    def test_binary_chunk_is_not_base64_encoded(self):
+        chunk = bytes(range(256)) * 16
+
+        message.message_codec = message.JSON
+        json_message = message.write_file_chunk(3, message.GRAPH, 0, chunk)
+        message.message_codec = message.BINARY
+        binary_message = message.write_file_chunk(3, message.GRAPH, 0, chunk)
+
+        self.assertLess(len(binary_message), len(json_message))
+        self.assertEqual(message.read(binary_message), message.read(json_message))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from lab.util.meta_data import MetaData, CombinedMetaData, NO_WORKER
+
+
+def find_worker_id(combined_meta_data: CombinedMetaData, vertex: int) -> int:
+    """
+    :return: Id of the first worker that has the vertex, like a scan over the workers
+    """
+
+    for worker_id, meta_data in combined_meta_data.combined_meta_data.items():
+        if meta_data.has_vertex(vertex):
+            return worker_id
+
+    return NO_WORKER
+
+
+class CombinedMetaDataTest(unittest.TestCase):
+    def setUp(self):
+        # Worker 2 overlaps worker 0 and contains worker 3, there are gaps between 11 and 14 and between 30 and 40
+        self.combined_meta_data = CombinedMetaData([
+            MetaData(0, 10, 0, 10),
+            MetaData(2, 10, 5, 20),
+            MetaData(3, 10, 15, 18),
+            MetaData(1, 10, 22, 30),
+            MetaData(4, 10, 40, 40)
+        ])
+        self.vertices = np.arange(-5, 50)
+
+    def test_worker_id_that_has_vertex(self):
+        for vertex in self.vertices.tolist():
+            expected = find_worker_id(self.combined_meta_data, vertex)
+
+            if expected == NO_WORKER:
+                with self.assertRaises(Exception):
+                    self.combined_meta_data.get_worker_id_that_has_vertex(vertex)
+            else:
+                self.assertEqual(self.combined_meta_data.get_worker_id_that_has_vertex(vertex), expected, vertex)
+
+    def test_worker_ids_that_have_vertices(self):
+        expected = np.array([find_worker_id(self.combined_meta_data, vertex) for vertex in self.vertices.tolist()])
+        is_owned = expected != NO_WORKER
+        vertices = np.random.RandomState(0).permutation(self.vertices[is_owned])
+
+        self.assertEqual(self.combined_meta_data.get_worker_ids_that_have_vertices(vertices).tolist(),
+                         [find_worker_id(self.combined_meta_data, vertex) for vertex in vertices.tolist()])
+        self.assertEqual(self.combined_meta_data.get_worker_ids_that_have_vertices(np.zeros(0, dtype=np.int64)).shape,
+                         (0,))
+
+        # A single vertex that belongs to no worker fails the whole lookup
+        for vertex in self.vertices[~is_owned].tolist():
+            with self.assertRaises(Exception):
+                self.combined_meta_data.get_worker_ids_that_have_vertices(np.append(vertices, vertex))
+
+    def test_layers(self):
+        self.assertEqual(self.combined_meta_data.bottom_layer.worker_id, 0)
+        self.assertEqual(self.combined_meta_data.top_layer.worker_id, 4)
+        self.assertEqual(self.combined_meta_data.combined_number_of_edges, 50)
+
+    def test_without_workers(self):
+        combined_meta_data = CombinedMetaData([])
+
+        with self.assertRaises(Exception):
+            combined_meta_data.get_worker_id_that_has_vertex(0)
+        with self.assertRaises(Exception):
+            combined_meta_data.get_worker_ids_that_have_vertices(np.array([0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
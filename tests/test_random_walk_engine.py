@@ -0,0 +1,134 @@
+import unittest
+
+import numpy as np
+
+from lab.downscaling.worker.RandomWalkEngine import RandomWalkEngine, UNIFORM, DEGREE
+from lab.util.distributed_graph import DistributedGraph
+from lab.util.meta_data import MetaData, CombinedMetaData
+
+
+def create_graph(edges) -> DistributedGraph:
+    """
+    :return: Graph of worker 0, which has the vertices 0 to 9
+    """
+
+    graph = DistributedGraph(0, CombinedMetaData([
+        MetaData(0, 0, 0, 9),
+        MetaData(1, 0, 10, 19)
+    ]))
+    graph.add_edges(edges)
+
+    return graph
+
+
+class RandomWalkEngineTest(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(0)
+
+    def test_walk_along_edges(self):
+        # A cycle of the vertices 0 to 4
+        edges = [[i, (i + 1) % 5] for i in range(5)]
+        engine = RandomWalkEngine(create_graph(edges))
+        engine.add_random_walkers([0, 2, 2])
+
+        walked_edges, foreign_labels = engine.step()
+
+        self.assertEqual(walked_edges.tolist(), [[0, 1], [2, 3], [2, 3]])
+        self.assertEqual(len(foreign_labels), 0)
+        self.assertEqual(engine.graph.labels[engine.positions].tolist(), [1, 3, 3])
+
+    def test_uniform_choice_of_edges(self):
+        engine = RandomWalkEngine(create_graph([[0, 1], [0, 2], [0, 3], [0, 4]]))
+        engine.add_random_walkers(np.zeros(40000))
+
+        walked_edges, _ = engine.step()
+
+        _, counts = np.unique(walked_edges[:, 1], return_counts=True)
+        self.assertEqual(len(counts), 4)
+        self.assertTrue(np.all(np.abs(counts - 10000) < 500))
+
+    def test_foreign_and_stuck_random_walkers(self):
+        # Vertex 1 has no edges, vertex 2 only has an edge to a vertex of worker 1
+        engine = RandomWalkEngine(create_graph([[0, 1], [2, 15]]))
+        engine.add_random_walkers([0, 2, 2])
+
+        walked_edges, foreign_labels = engine.step()
+        self.assertEqual(walked_edges.tolist(), [[0, 1], [2, 15], [2, 15]])
+        self.assertEqual(foreign_labels.tolist(), [15, 15])
+        self.assertEqual(len(engine), 1)
+
+        # The random walker on vertex 1 stays there
+        walked_edges, foreign_labels = engine.step()
+        self.assertEqual(walked_edges.shape, (0, 2))
+        self.assertEqual(len(foreign_labels), 0)
+        self.assertEqual(engine.graph.labels[engine.positions].tolist(), [1])
+
+    def test_add_random_walkers(self):
+        engine = RandomWalkEngine(create_graph([[0, 1], [2, 15]]))
+        engine.add_random_walkers([])
+        self.assertEqual(len(engine), 0)
+
+        # Vertex 3 has no edges, vertex 15 belongs to worker 1
+        for labels in [[3], [15], [0, 15]]:
+            with self.assertRaises(KeyError):
+                engine.add_random_walkers(labels)
+
+        with self.assertRaises(KeyError):
+            RandomWalkEngine(create_graph([])).add_random_walkers([0])
+
+
+class SampleTest(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(0)
+        # Vertex 0 has degree 3, vertex 1 degree 1, vertex 2 degree 4 and vertex 3 has no edges
+        self.engine = RandomWalkEngine(create_graph([
+            [0, 1], [0, 2], [0, 3],
+            [1, 12],
+            [2, 0], [2, 1], [2, 3], [2, 14]
+        ]))
+
+    def assertFrequencies(self, positions, expected):
+        counts = np.bincount(positions, minlength=len(expected))
+        self.assertEqual(len(counts), len(expected))
+        self.assertTrue(np.all(np.abs(counts / len(positions) - expected) < 0.01), counts / len(positions))
+
+    def test_uniform(self):
+        positions = self.engine.sample_positions(100000, UNIFORM)
+
+        self.assertEqual(self.engine.graph.labels.tolist(), [0, 1, 2, 3])
+        self.assertFrequencies(positions, [0.25] * 4)
+
+    def test_degree(self):
+        positions = self.engine.sample_positions(100000, DEGREE)
+
+        # Vertex 3 has no edges and is never chosen
+        self.assertFrequencies(positions, [3 / 8, 1 / 8, 4 / 8, 0])
+        self.assertNotIn(3, positions)
+
+    def test_start_random_walkers(self):
+        self.engine.start_random_walkers(0)
+        self.assertEqual(len(self.engine), 0)
+
+        self.engine.start_random_walkers(10, DEGREE)
+        self.assertEqual(len(self.engine), 10)
+        self.assertTrue(np.all(self.engine.positions < 3))
+
+        # Every random walker moves along an edge of its vertex
+        labels = self.engine.graph.labels[self.engine.positions]
+        walked_edges, _ = self.engine.step()
+        self.assertEqual(walked_edges[:, 0].tolist(), labels.tolist())
+
+        number = len(self.engine)
+        self.engine.start_random_walkers(5)
+        self.assertEqual(len(self.engine), number + 5)
+
+    def test_without_vertices(self):
+        engine = RandomWalkEngine(create_graph([]))
+
+        for policy in [UNIFORM, DEGREE]:
+            with self.assertRaises(ValueError):
+                engine.sample_positions(1, policy)
+
+
+if __name__ == '__main__':
+    unittest.main()
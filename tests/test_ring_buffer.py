@@ -0,0 +1,84 @@
+import unittest
+
+from lab.util import message, ring_buffer, sockets
+from lab.util.ring_buffer import RingBuffer
+
+from test_sockets import Receiver
+
+
+@unittest.skipUnless(ring_buffer.is_available(), 'shared memory is not available')
+class RingBufferTest(unittest.TestCase):
+    def setUp(self):
+        self.writer = RingBuffer()
+        self.reader = RingBuffer(self.writer.name)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+
+    def test_write_read(self):
+        self.assertEqual(self.writer.free, ring_buffer.RING_SIZE)
+
+        self.writer.write(b'first')
+        self.writer.write(b'second')
+        self.assertEqual(self.writer.free, ring_buffer.RING_SIZE - 11)
+
+        self.assertEqual(self.reader.read(5), b'first')
+        self.assertEqual(self.reader.read(6), b'second')
+        self.assertEqual(self.writer.free, ring_buffer.RING_SIZE)
+
+    def test_wrap_around(self):
+        # Only use the first bytes of the data, such that the positions wrap around quickly
+        self.writer.size = self.reader.size = 10
+
+        for i in range(10):
+            data = bytes(range(i, i + 7))
+            self.writer.write(data)
+            self.assertEqual(self.writer.free, 3)
+            self.assertEqual(self.reader.read(7), data)
+
+    def test_unlinked_once_attached(self):
+        with self.assertRaises(FileNotFoundError):
+            RingBuffer(self.writer.name)
+
+
+@unittest.skipUnless(ring_buffer.is_available(), 'shared memory is not available')
+class RingBufferTransportTest(unittest.TestCase):
+    def setUp(self):
+        self.receiver = Receiver()
+        self.receiver.start()
+
+    def tearDown(self):
+        sockets.close_connection('localhost', self.receiver.port)
+        self.receiver.terminate()
+
+    def test_large_messages_keep_order(self):
+        large_message = message.write_random_walker(list(range(100000)))
+        self.assertGreaterEqual(len(large_message), sockets.RING_BUFFER_THRESHOLD)
+
+        # More bytes than fit in the ring buffer at once, such that the sender waits for the receiver
+        count = 2 * ring_buffer.RING_SIZE // len(large_message) + 1
+        for i in range(count):
+            sockets.send_message('localhost', self.receiver.port, large_message)
+            sockets.send_message('localhost', self.receiver.port, message.write_alive(i))
+
+        self.assertIn(('localhost', self.receiver.port), sockets.ring_buffers)
+        for i in range(count):
+            self.assertEqual(self.receiver.get(), large_message)
+            self.assertEqual(message.read(self.receiver.get()), (message.ALIVE, i))
+
+    def test_reconnect(self):
+        large_message = message.write_random_walker(list(range(100000)))
+        sockets.send_message('localhost', self.receiver.port, large_message)
+        self.assertEqual(self.receiver.get(), large_message)
+
+        # A new connection announces a new ring buffer
+        sockets.close_connection('localhost', self.receiver.port)
+        self.assertNotIn(('localhost', self.receiver.port), sockets.ring_buffers)
+
+        sockets.send_message('localhost', self.receiver.port, large_message)
+        self.assertEqual(self.receiver.get(), large_message)
+
+
+if __name__ == '__main__':
+    unittest.main()
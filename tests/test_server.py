@@ -0,0 +1,159 @@
+import unittest
+from threading import Timer
+from time import time
+
+from queue import Empty
+
+from lab.util import message, sockets
+from lab.util.server import Server, MessageQueue, BULK_MESSAGES_PER_CALL
+
+
+class ServerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = Server()
+        self.received = []
+        self.server.message_interface = {
+            message.ALIVE: lambda worker_id: self.received.append(worker_id)
+        }
+
+    def tearDown(self):
+        sockets.close_connection('localhost', self.server.port)
+        self.server.server.terminate()
+
+    def send(self, message_to_send: bytes):
+        sockets.send_message('localhost', self.server.port, message_to_send)
+
+    def test_handle_messages(self):
+        self.send(message.write_alive(1))
+        self.send(message.write_alive(2))
+
+        self.assertTrue(self.server.wait_for(lambda: len(self.received) == 2, timeout=5))
+        self.assertEqual(self.received, [1, 2])
+
+    def test_skip_undecodable_message(self):
+        self.send(b'{"status": 200, "body": ')
+        self.send(message.write_alive(1))
+
+        self.assertTrue(self.server.wait_for(lambda: len(self.received) == 1, timeout=5))
+        self.assertEqual(self.received, [1])
+
+    def test_terminate(self):
+        self.server.server.terminate()
+        self.assertFalse(self.server.server.is_alive())
+
+        # Terminating twice does nothing
+        self.server.server.terminate()
+
+        # A new server thread, which is terminated by tearDown
+        self.server.re_init()
+
+
+class WaitTest(unittest.TestCase):
+    def setUp(self):
+        self.server = Server()
+        self.received = []
+        self.server.message_interface = {
+            message.ALIVE: lambda worker_id: self.received.append(worker_id)
+        }
+
+    def tearDown(self):
+        self.server.server.terminate()
+
+    def test_wait_for_message_timeout(self):
+        started_at = time()
+        self.assertFalse(self.server.wait_for_message(0.2))
+        self.assertGreaterEqual(time() - started_at, 0.2)
+
+        self.server.server_queue.put_nowait((None, (message.ALIVE, 1)))
+        self.server.server_queue.put_nowait((None, (message.ALIVE, 2)))
+
+        # The other queued messages are handled as well
+        self.assertTrue(self.server.wait_for_message(0))
+        self.assertEqual(self.received, [1, 2])
+
+    def test_wait_for_timeout(self):
+        started_at = time()
+        self.assertFalse(self.server.wait_for(lambda: len(self.received) > 0, timeout=0.2))
+        self.assertGreaterEqual(time() - started_at, 0.2)
+
+        # The condition is checked once more when the timeout expires
+        self.assertTrue(self.server.wait_for(lambda: True, timeout=0))
+
+    def test_wake_up_on_message(self):
+        # The message arrives while waiting, long before the timeout
+        timer = Timer(0.1, lambda: self.server.server_queue.put_nowait((None, (message.ALIVE, 1))))
+        timer.start()
+
+        started_at = time()
+        self.assertTrue(self.server.wait_for(lambda: self.received == [1], timeout=10))
+        self.assertLess(time() - started_at, 5)
+        timer.join()
+
+
+class MessageQueueTest(unittest.TestCase):
+    def test_control_messages_first(self):
+        queue = MessageQueue()
+        queue.put_nowait(('a', (message.RANDOM_WALKER, [1])))
+        queue.put_nowait(('a', (message.FILE_CHUNK, 0, message.GRAPH, 0, b'')))
+        queue.put_nowait(('b', (message.ALIVE, 1)))
+        queue.put_nowait(('a', (message.RANDOM_WALKER, [2])))
+        queue.put_nowait(('b', (message.ALIVE, 2)))
+
+        self.assertEqual(queue.get_nowait(), ('b', (message.ALIVE, 1)))
+        self.assertEqual(queue.get_nowait(), ('b', (message.ALIVE, 2)))
+        self.assertEqual(queue.get_nowait(), ('a', (message.RANDOM_WALKER, [1])))
+        self.assertEqual(queue.get_nowait(), ('a', (message.FILE_CHUNK, 0, message.GRAPH, 0, b'')))
+        self.assertEqual(queue.get_nowait(), ('a', (message.RANDOM_WALKER, [2])))
+        self.assertTrue(queue.empty())
+
+    def test_exclude_bulk_messages(self):
+        queue = MessageQueue()
+        queue.put_nowait(('a', (message.RANDOM_WALKER, [1])))
+
+        with self.assertRaises(Empty):
+            queue.get_nowait(include_bulk=False)
+        with self.assertRaises(Empty):
+            queue.get(0.05, include_bulk=False)
+
+        self.assertEqual(queue.get_bulk_nowait(), ('a', (message.RANDOM_WALKER, [1])))
+        with self.assertRaises(Empty):
+            queue.get_bulk_nowait()
+
+
+class HandleQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.server = Server()
+        self.handled = []
+        self.server.message_interface = {
+            message.ALIVE: lambda worker_id: self.handled.append(message.ALIVE),
+            message.RANDOM_WALKER: lambda vertices: self.handled.append(message.RANDOM_WALKER)
+        }
+
+    def tearDown(self):
+        self.server.server.terminate()
+
+    def test_limit_bulk_messages_per_call(self):
+        for i in range(BULK_MESSAGES_PER_CALL + 10):
+            self.server.server_queue.put_nowait((None, (message.RANDOM_WALKER, [i])))
+        self.server.server_queue.put_nowait((None, (message.ALIVE, 1)))
+
+        self.server.handle_queue()
+        self.assertEqual(self.handled, [message.ALIVE] + [message.RANDOM_WALKER] * BULK_MESSAGES_PER_CALL)
+
+        # The next call handles the remaining bulk messages, after the control messages that arrived meanwhile
+        self.server.server_queue.put_nowait((None, (message.ALIVE, 1)))
+        self.handled.clear()
+        self.server.handle_queue()
+        self.assertEqual(self.handled, [message.ALIVE] + [message.RANDOM_WALKER] * 10)
+
+    def test_handle_bulk_queue(self):
+        self.server.server_queue.put_nowait((None, (message.RANDOM_WALKER, [1])))
+        self.server.server_queue.put_nowait((None, (message.ALIVE, 1)))
+
+        self.server.handle_bulk_queue()
+        self.assertEqual(self.handled, [message.RANDOM_WALKER])
+        self.assertTrue(self.server.message_in_queue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import socket
+import unittest
+from queue import Queue
+from threading import Thread
+
+from lab.util import message, sockets
+
+
+class Receiver(Thread):
+    """ Collects the messages that are received on a listening socket, and their senders
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.socket = sockets.bind('', 0)
+        self.port = sockets.get_port(self.socket)
+        self.stop_socket, self.wake_socket = socket.socketpair()
+        self.messages = Queue()
+        self.peers = []
+
+    def run(self):
+        for peer, message in sockets.get_messages(self.socket, self.stop_socket):
+            self.peers.append(peer)
+            self.messages.put(message)
+
+    def get(self) -> bytes:
+        return self.messages.get(timeout=5)
+
+    def terminate(self):
+        self.wake_socket.send(b'\0')
+        self.join()
+        self.socket.close()
+        self.stop_socket.close()
+        self.wake_socket.close()
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.receiver = Receiver()
+        self.receiver.start()
+
+    def tearDown(self):
+        sockets.close_connection('localhost', self.receiver.port)
+        self.receiver.terminate()
+
+    def test_reuse_connection(self):
+        sockets.send_message('localhost', self.receiver.port, b'first')
+        connection = sockets.connections[('localhost', self.receiver.port)]
+        sockets.send_message('localhost', self.receiver.port, b'second')
+
+        self.assertIs(sockets.connections[('localhost', self.receiver.port)], connection)
+        self.assertEqual(self.receiver.get(), b'first')
+        self.assertEqual(self.receiver.get(), b'second')
+
+    def test_reconnect_after_close(self):
+        sockets.send_message('localhost', self.receiver.port, b'first')
+        self.assertEqual(self.receiver.get(), b'first')
+
+        sockets.close_connection('localhost', self.receiver.port)
+        self.assertNotIn(('localhost', self.receiver.port), sockets.connections)
+
+        sockets.send_message('localhost', self.receiver.port, b'second')
+        self.assertEqual(self.receiver.get(), b'second')
+
+    def test_announce_listen_address(self):
+        local_address = sockets.local_address
+        sockets.local_address = None
+        try:
+            sockets.send_message('localhost', self.receiver.port, b'anonymous')
+            self.assertEqual(self.receiver.get(), b'anonymous')
+            sockets.close_connection('localhost', self.receiver.port)
+
+            sockets.set_local_address('host', 8000)
+            sockets.send_message('localhost', self.receiver.port, b'first')
+            sockets.send_message('localhost', self.receiver.port, b'second')
+            self.assertEqual(self.receiver.get(), b'first')
+            self.assertEqual(self.receiver.get(), b'second')
+        finally:
+            sockets.local_address = local_address
+
+        # A peer without server is only known by its host
+        self.assertEqual(self.receiver.peers, ['127.0.0.1', 'host:8000', 'host:8000'])
+
+    def test_connection_refused(self):
+        s = sockets.bind('', 0)
+        port = sockets.get_port(s)
+        s.close()
+
+        with self.assertRaises(ConnectionRefusedError):
+            sockets.send_message('localhost', port, b'message')
+
+
+class FramingTest(unittest.TestCase):
+    def test_read_messages(self):
+        encoded = b''.join(sockets.HEADER.pack(len(message)) + message for message in [b'a', b'', b'bc'])
+        buffer = bytearray(encoded + sockets.HEADER.pack(3) + b'de')
+
+        self.assertEqual(sockets.read_messages(buffer), [b'a', b'', b'bc'])
+        # The incomplete message stays in the buffer
+        self.assertEqual(buffer, sockets.HEADER.pack(3) + b'de')
+
+        buffer += b'f'
+        self.assertEqual(sockets.read_messages(buffer), [b'def'])
+        self.assertEqual(buffer, b'')
+
+    def test_large_message_over_tcp(self):
+        receiver = Receiver()
+        receiver.start()
+        shared_memory_transport = sockets.shared_memory_transport
+        sockets.shared_memory_transport = 0
+
+        try:
+            large_message = message.write_random_walker(list(range(200000)))
+            sockets.send_message('localhost', receiver.port, large_message)
+            sockets.send_message('localhost', receiver.port, message.write_continue())
+
+            self.assertEqual(receiver.get(), large_message)
+            self.assertEqual(message.read(receiver.get()), (message.CONTINUE,))
+        finally:
+            sockets.shared_memory_transport = shared_memory_transport
+            sockets.close_connection('localhost', receiver.port)
+            receiver.terminate()
+
+
+if __name__ == '__main__':
+    unittest.main()